@@ -1,9 +1,11 @@
 # app_gui_moderno.py
 import os
+import queue
 import threading
+import time
+from bisect import bisect_right
 from pathlib import Path
 
-import pandas as pd
 import tkinter as tk
 import tkinter.scrolledtext as st
 import tkinter.font as tkfont
@@ -13,11 +15,24 @@ import ttkbootstrap as tb
 from ttkbootstrap.constants import *
 from ttkbootstrap.toast import ToastNotification
 
-from extract_core import run_batch
+from extract_core import (
+    DEFAULT_CHECKBOX_COLUMNS,
+    DEFAULT_COURSE_PAGES,
+    DEFAULT_COURSE_Y_RANGE,
+    DEFAULT_Y_TOLERANCE,
+    parse_pages,
+    preload,
+    run_batch,
+)
+from extract_metrics import format_summary
+from extract_output import OUTPUT_FORMATS
+from extract_store import default_store_path
 
 DEFAULT_INPUT = Path("pdfs_entrada")
 DEFAULT_OUTPUT = Path("dados_extraidos.xlsx")
 APP_TITLE = "Extrator de Cursos em PDFs – TCDF"
+POLL_MS = 100               # cadência com que a janela lê os eventos da extração
+MAX_EVENTS_PER_POLL = 2000  # eventos tratados por leitura (o resto fica para a próxima)
 
 
 class App(tb.Window):
@@ -28,22 +43,51 @@ class App(tb.Window):
 
         # ----- Vars -----
         self.input_dir = tk.StringVar(value=str(DEFAULT_INPUT))
+        self.scan_nested = tk.BooleanVar(value=False)
         self.output_xlsx = tk.StringVar(value=str(DEFAULT_OUTPUT))
 
-        self.pages = tk.StringVar(value="1")  # "1" ou "1,2"
-        self.y_min = tk.DoubleVar(value=285.0)
-        self.y_max = tk.DoubleVar(value=465.0)
-        self.x_pres_ini = tk.DoubleVar(value=455.0)
-        self.x_pres_fim = tk.DoubleVar(value=475.0)
-        self.x_misto_ini = tk.DoubleVar(value=515.0)
-        self.x_misto_fim = tk.DoubleVar(value=535.0)
-        self.x_dist_ini = tk.DoubleVar(value=575.0)
-        self.x_dist_fim = tk.DoubleVar(value=595.0)
-        self.y_tol = tk.IntVar(value=12)
+        cols = DEFAULT_CHECKBOX_COLUMNS
+        self.pages = tk.StringVar(value=",".join(map(str, DEFAULT_COURSE_PAGES)))  # "1" ou "1,2"
+        self.y_min = tk.DoubleVar(value=DEFAULT_COURSE_Y_RANGE[0])
+        self.y_max = tk.DoubleVar(value=DEFAULT_COURSE_Y_RANGE[1])
+        self.x_pres_ini = tk.DoubleVar(value=cols["presencial"][0])
+        self.x_pres_fim = tk.DoubleVar(value=cols["presencial"][1])
+        self.x_misto_ini = tk.DoubleVar(value=cols["misto"][0])
+        self.x_misto_fim = tk.DoubleVar(value=cols["misto"][1])
+        self.x_dist_ini = tk.DoubleVar(value=cols["à distância"][0])
+        self.x_dist_fim = tk.DoubleVar(value=cols["à distância"][1])
+        self.y_tol = tk.IntVar(value=DEFAULT_Y_TOLERANCE)
+        self.auto_layout = tk.BooleanVar(value=False)
         self.export_dbg = tk.BooleanVar(value=False)
+        self.dbg_selective = tk.BooleanVar(value=False)
+        self.collect_metrics = tk.BooleanVar(value=False)
+        self.out_format = tk.StringVar(value="xlsx")
+        self.partition_lot = tk.BooleanVar(value=False)
+        self.use_store = tk.BooleanVar(value=False)
 
         self._hover_rowid = None
+        self._grid_df = None      # DataFrame (strings) exibido na grade
+        self._grid_offset = 0     # primeira linha visível
+        self._grid_visible = 16   # quantas linhas cabem no Treeview
+        self._grid_widths = {}    # cache de larguras medidas por coluna
+        self._live_parts = []     # FileRows recebidos durante a execução (grade ao vivo)
+        self._live_starts = []    # índice da 1ª linha de cada FileRows na grade
+        self._live_total = 0
+
+        self._events = queue.Queue()  # thread da extração -> janela (lido em _poll_events)
+        self._cancel = None           # threading.Event da execução em andamento
+        self._run = None              # estado da execução em andamento (contagens, relógio)
         self._build_ui()
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
+        # janela primeiro; pandas/pdfplumber carregam em segundo plano
+        self.after(150, lambda: threading.Thread(target=self._preload_core, daemon=True).start())
+
+    def _preload_core(self):
+        try:
+            preload()
+        except Exception:
+            pass  # a execução importa de novo e mostra o erro real
 
     # ---------------- UI ----------------
     def _build_ui(self):
@@ -70,9 +114,26 @@ class App(tb.Window):
         card_files.pack(fill=X, pady=(0, 12))
 
         self._row_entry_browse(card_files, "Pasta de PDFs:", self.input_dir, self.pick_input)
-        self._row_entry_browse(card_files, "Arquivo XLSX de saída:", self.output_xlsx,
+        tb.Checkbutton(card_files, text="Incluir subpastas e PDFs dentro de ZIP/TAR",
+                       variable=self.scan_nested, bootstyle="round-toggle")\
+          .pack(anchor=W, pady=(0, 4))
+        self._row_entry_browse(card_files, "Arquivo de saída:", self.output_xlsx,
                                self.pick_output, "Salvar…")
 
+        row = tb.Frame(card_files)
+        row.pack(fill=X, pady=4)
+        tb.Label(row, text="Formato de saída:", width=22, anchor=W).pack(side=LEFT)
+        cb = tb.Combobox(row, textvariable=self.out_format, values=OUTPUT_FORMATS,
+                         state="readonly", width=10)
+        cb.pack(side=LEFT)
+        cb.bind("<<ComboboxSelected>>", self._on_format_change)
+        tb.Checkbutton(row, text="Particionar Parquet por lotação",
+                       variable=self.partition_lot, bootstyle="round-toggle")\
+          .pack(side=LEFT, padx=(12, 0))
+        tb.Checkbutton(card_files, text="Acumular no banco de resultados (.store.sqlite)",
+                       variable=self.use_store, bootstyle="round-toggle")\
+          .pack(anchor=W, pady=(4, 0))
+
         # ----- Card: Parâmetros -----
         card_params = tb.Labelframe(left, text="Parâmetros", padding=12)
         card_params.pack(fill=X)
@@ -84,9 +145,18 @@ class App(tb.Window):
         self._grid_range(card_params, "Checkbox À distância (X0..X1):", self.x_dist_ini, self.x_dist_fim, 4)
 
         self._grid_labeled(card_params, "Tolerância Y (px):", self.y_tol, 5, 0, width=10)
+        tb.Checkbutton(card_params, text="Calibrar faixa e colunas pelos títulos",
+                       variable=self.auto_layout, bootstyle="round-toggle")\
+          .grid(row=6, column=0, columnspan=2, sticky=W, pady=(6, 0))
         tb.Checkbutton(card_params, text="Exportar PNGs de depuração",
                        variable=self.export_dbg, bootstyle="round-toggle")\
-          .grid(row=6, column=0, columnspan=2, sticky=W, pady=(6, 0))
+          .grid(row=7, column=0, columnspan=2, sticky=W, pady=(6, 0))
+        tb.Checkbutton(card_params, text="PNGs só de páginas suspeitas",
+                       variable=self.dbg_selective, bootstyle="round-toggle")\
+          .grid(row=8, column=0, columnspan=2, sticky=W, pady=(6, 0))
+        tb.Checkbutton(card_params, text="Coletar métricas de desempenho",
+                       variable=self.collect_metrics, bootstyle="round-toggle")\
+          .grid(row=9, column=0, columnspan=2, sticky=W, pady=(6, 0))
 
         # Botão principal
         btn_frame = tb.Frame(left)
@@ -94,6 +164,9 @@ class App(tb.Window):
         self.btn_run = tb.Button(btn_frame, text="Executar extração",
                                  bootstyle=SUCCESS, command=self.run_extract_thread)
         self.btn_run.pack(fill=X)
+        self.btn_cancel = tb.Button(btn_frame, text="Cancelar", bootstyle=DANGER,
+                                    command=self.cancel_extract, state=DISABLED)
+        self.btn_cancel.pack(fill=X, pady=(6, 0))
 
         # ----- Card: Resultado -----
         card_res = tb.Labelframe(right, text="Resultados", padding=8)
@@ -101,7 +174,10 @@ class App(tb.Window):
 
         # >>> CORRIGIDO: vírgula após "lotacao" e incluí "modalidade" <<<
         cols = ("arquivo", "requerente", "cargo", "lotacao", "curso_titulo", "curso_horas", "modalidade")
-        self.tree = tb.Treeview(card_res, columns=cols, show="headings", height=16, bootstyle=INFO)
+        # grade virtual: o Treeview só tem as linhas visíveis; os dados ficam no DataFrame
+        grid = tb.Frame(card_res)
+        grid.pack(fill=BOTH, expand=YES)
+        self.tree = tb.Treeview(grid, columns=cols, show="headings", height=16, bootstyle=INFO)
 
         # estilo geral
         self.style.configure("Treeview", rowheight=28, font=("-size", 10))
@@ -117,7 +193,13 @@ class App(tb.Window):
             else:
                 self.tree.column(c, width=160, anchor=W, stretch=True)
 
-        self.tree.pack(fill=BOTH, expand=YES)
+        self.vscroll = tb.Scrollbar(grid, orient=VERTICAL, command=self._on_vscroll)
+        self.vscroll.pack(side=RIGHT, fill=Y)
+        self.tree.pack(side=LEFT, fill=BOTH, expand=YES)
+        self.tree.bind("<Configure>", self._on_tree_resize)
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", lambda e: self._scroll_rows(-3))
+        self.tree.bind("<Button-5>", lambda e: self._scroll_rows(3))
 
         # zebra + hover (com fallbacks de cor)
         palette = self.style.colors
@@ -135,7 +217,9 @@ class App(tb.Window):
         bottom = tb.Frame(card_res, padding=(0, 8, 0, 0))
         bottom.pack(fill=X)
         self.progress = tb.Progressbar(bottom, mode="indeterminate")
-        self.progress.pack(fill=X, pady=(0, 8))
+        self.progress.pack(fill=X, pady=(0, 4))
+        self.progress_label = tb.Label(bottom, text="", anchor=W, bootstyle=SECONDARY)
+        self.progress_label.pack(fill=X, pady=(0, 4))
 
         self.log = st.ScrolledText(bottom, height=6)
         self.log.pack(fill=X)
@@ -183,22 +267,115 @@ class App(tb.Window):
             self.input_dir.set(p)
 
     def pick_output(self):
-        p = filedialog.asksaveasfilename(defaultextension=".xlsx",
-                                         filetypes=[("Excel", "*.xlsx")],
-                                         initialfile=DEFAULT_OUTPUT.name)
+        fmt = self.out_format.get()
+        p = filedialog.asksaveasfilename(defaultextension=f".{fmt}",
+                                         filetypes=[(fmt.upper(), f"*.{fmt}")],
+                                         initialfile=DEFAULT_OUTPUT.with_suffix(f".{fmt}").name)
         if p:
             self.output_xlsx.set(p)
 
+    def _on_format_change(self, _event=None):
+        """Troca a extensão do arquivo de saída junto com o formato."""
+        cur = self.output_xlsx.get().strip()
+        if cur:
+            self.output_xlsx.set(str(Path(cur).with_suffix(f".{self.out_format.get()}")))
+
     # ---------- Log ----------
     def append_log(self, text: str):
         self.log.insert("end", text + "\n")
         self.log.see("end")
-        self.update_idletasks()
 
     # ---------- Tree helpers ----------
     def _clear_tree(self):
-        for i in self.tree.get_children():
-            self.tree.delete(i)
+        self._grid_df = None
+        self._grid_offset = 0
+        self._live_parts, self._live_starts, self._live_total = [], [], 0
+        self._render_rows()
+
+    def _add_live_rows(self, rows):
+        """Acrescenta à grade as linhas (FileRows) de um PDF que acabou de sair."""
+        if len(rows):
+            self._live_starts.append(self._live_total)
+            self._live_parts.append(rows)
+            self._live_total += len(rows)
+
+    def _grid_len(self):
+        return len(self._grid_df) if self._grid_df is not None else self._live_total
+
+    def _grid_window(self, start, count):
+        """Valores (strings) das linhas [start, start+count) da grade."""
+        if self._grid_df is not None:
+            return self._grid_df.iloc[start:start + count].values.tolist()
+        cols = list(self.tree["columns"])
+        values = []
+        for k in range(start, min(start + count, self._live_total)):
+            part = bisect_right(self._live_starts, k) - 1
+            row = self._live_parts[part][k - self._live_starts[part]]
+            values.append(["" if row.get(c) is None else str(row.get(c)) for c in cols])
+        return values
+
+    def _set_grid_df(self, df):
+        """Prepara o DataFrame de exibição (strings, NaN -> "") e mostra o topo."""
+        import pandas as pd
+
+        cols = list(self.tree["columns"])
+        view = df.reindex(columns=cols)
+        out = {}
+        for c in cols:
+            col = view[c]
+            if c == "curso_horas":
+                col = pd.to_numeric(col, errors="coerce").astype("Int64")
+            out[c] = col.astype("string").fillna("").astype(object)
+        self._grid_df = pd.DataFrame(out).reset_index(drop=True)
+        self._grid_widths = {}
+        self._grid_offset = 0
+        self._render_rows()
+
+    def _render_rows(self):
+        """Materializa só a janela visível, reaproveitando os itens do Treeview."""
+        n = self._grid_len()
+        self._grid_offset = max(0, min(self._grid_offset, n - self._grid_visible))
+        values = self._grid_window(self._grid_offset, self._grid_visible)
+
+        slots = self.tree.get_children("")
+        for k, vals in enumerate(values):
+            tag = "odd" if (self._grid_offset + k) % 2 else "even"
+            if k < len(slots):
+                self.tree.item(slots[k], values=vals, tags=(tag,))
+            else:
+                self.tree.insert("", "end", iid=f"slot{k}", values=vals, tags=(tag,))
+        if len(slots) > len(values):
+            self.tree.delete(*slots[len(values):])
+        self._hover_rowid = None
+
+        if n:
+            self.vscroll.set(self._grid_offset / n, min(1.0, (self._grid_offset + self._grid_visible) / n))
+        else:
+            self.vscroll.set(0.0, 1.0)
+
+    def _scroll_rows(self, delta):
+        self._grid_offset += delta
+        self._render_rows()
+        return "break"
+
+    def _on_vscroll(self, *args):
+        n = self._grid_len()
+        if args[0] == "moveto":
+            self._grid_offset = int(float(args[1]) * n)
+        elif args[0] == "scroll":
+            step = self._grid_visible if args[2] == "pages" else 1
+            self._grid_offset += int(args[1]) * step
+        self._render_rows()
+
+    def _on_wheel(self, event):
+        return self._scroll_rows(-3 if event.delta > 0 else 3)
+
+    def _on_tree_resize(self, event):
+        rowheight = int(self.style.lookup("Treeview", "rowheight") or 28)
+        visible = max(1, (event.height - rowheight) // rowheight)  # desconta o cabeçalho
+        if visible != self._grid_visible:
+            self._grid_visible = visible
+            self._render_rows()
 
     def _get_tree_font(self):
         style_font = self.style.lookup("Treeview", "font")
@@ -207,19 +384,21 @@ class App(tb.Window):
         except tk.TclError:
             return tkfont.nametofont("TkDefaultFont")
 
-    def _autofit_tree(self, min_w=None, max_w=None, pad=16):
-        """Ajusta largura por conteúdo (cabeçalho + linhas)."""
+    def _autofit_tree(self, min_w=None, max_w=None, pad=16, sample=20):
+        """
+        Ajusta largura por conteúdo: mede o cabeçalho e só as `sample` strings
+        mais longas de cada coluna (comprimentos calculados no DataFrame).
+        """
         f = self._get_tree_font()
         for col in self.tree["columns"]:
-            header_text = self.tree.heading(col)["text"]
-            max_px = f.measure(header_text)
-            for iid in self.tree.get_children(""):
-                val = self.tree.set(iid, col)
-                if val is None:
-                    continue
-                px = f.measure(str(val))
-                if px > max_px:
-                    max_px = px
+            max_px = f.measure(self.tree.heading(col)["text"])
+            if self._grid_df is not None and len(self._grid_df):
+                if col not in self._grid_widths:
+                    longest = self._grid_df[col].str.len().nlargest(sample).index
+                    self._grid_widths[col] = max(
+                        (f.measure(v) for v in self._grid_df[col].loc[longest]), default=0
+                    )
+                max_px = max(max_px, self._grid_widths[col])
             w = max_px + pad
             if min_w and col in min_w:
                 w = max(w, min_w[col])
@@ -229,29 +408,26 @@ class App(tb.Window):
             self.tree.column(col, width=int(w), stretch=stretch)
 
     def _sort_by(self, col, descending):
-        """Ordena a treeview pela coluna; alterna asc/desc."""
-        data = []
-        for iid in self.tree.get_children(""):
-            val = self.tree.set(iid, col)
+        """Ordena a grade pela coluna (no DataFrame); alterna asc/desc."""
+        import pandas as pd
+
+        if self._grid_df is not None and len(self._grid_df):
+            vals = self._grid_df[col]
             if col == "curso_horas":
-                try:
-                    sort_key = int(val)
-                except (TypeError, ValueError):
-                    sort_key = float("inf")
+                key = pd.to_numeric(vals, errors="coerce")
             else:
-                sort_key = (val or "").lower()
-            data.append((sort_key, iid))
-        data.sort(reverse=descending)
-        for idx, (_, iid) in enumerate(data):
-            self.tree.move(iid, "", idx)
-            self.tree.item(iid, tags=("odd" if idx % 2 else "even",))
+                key = vals.str.lower()
+            order = key.sort_values(ascending=not descending, kind="stable", na_position="last").index
+            self._grid_df = self._grid_df.loc[order].reset_index(drop=True)
+            self._grid_offset = 0
+            self._render_rows()
         self.tree.heading(col, command=lambda c=col: self._sort_by(c, not descending))
 
     def _on_tree_hover(self, event):
         """Realça a linha sob o mouse (efeito hover)."""
         rowid = self.tree.identify_row(event.y)
         # remove highlight anterior
-        if getattr(self, "_hover_rowid", None) and self._hover_rowid != rowid:
+        if self._hover_rowid and self._hover_rowid != rowid and self.tree.exists(self._hover_rowid):
             tags = list(self.tree.item(self._hover_rowid, "tags"))
             if "hover" in tags:
                 tags.remove("hover")
@@ -264,123 +440,191 @@ class App(tb.Window):
                 self.tree.item(rowid, tags=tuple(tags))
             self._hover_rowid = rowid
 
-    # ---------- Overlay ----------
-    def _show_overlay(self, text="Processando…"):
-        self.update_idletasks()
-        self.overlay = tb.Toplevel(self)
-        self.overlay.overrideredirect(True)
-        self.overlay.attributes("-topmost", True)
-        self.overlay.geometry(
-            f"{self.winfo_width()}x{self.winfo_height()}+{self.winfo_rootx()}+{self.winfo_rooty()}"
-        )
-        try:
-            self.overlay.attributes("-alpha", 0.88)
-        except Exception:
-            pass
-
-        frm = tb.Frame(self.overlay, padding=24)
-        frm.place(relx=0.5, rely=0.5, anchor="center")
-        tb.Label(frm, text=text, font="-size 12 -weight bold").pack(pady=(0, 8))
-        self.ov_prog = tb.Progressbar(frm, mode="indeterminate")
-        self.ov_prog.pack(fill=X)
-        self.ov_prog.start(12)
-        self.overlay.grab_set()
-
-    def _hide_overlay(self):
-        if hasattr(self, "ov_prog"):
-            self.ov_prog.stop()
-        if hasattr(self, "overlay"):
-            try:
-                self.overlay.grab_release()
-                self.overlay.destroy()
-            except Exception:
-                pass
-
     # ---------- Execução ----------
-    def run_extract_thread(self):
-        t = threading.Thread(target=self.run_extract, daemon=True)
-        t.start()
-
-    def run_extract(self):
-        try:
-            # UI feedback
-            self.btn_run.configure(state=DISABLED)
-            self.progress.start(12)
-            self._show_overlay("Extraindo cursos dos PDFs…")
-            self.status.configure(text="Processando PDFs…")
-            self.log.delete("1.0", tk.END)
-            self._clear_tree()
-
-            # coleta de parâmetros
-            input_dir = Path(self.input_dir.get())
-            output_xlsx = Path(self.output_xlsx.get())
-
-            pages = []
-            for p in self.pages.get().split(","):
-                p = p.strip()
-                if p:
-                    pages.append(int(p))
-
-            y_range = (float(self.y_min.get()), float(self.y_max.get()))
-            x_cols = {
+    def _collect_params(self):
+        """Lê os campos da janela (só na thread da interface) e monta os argumentos de run_batch."""
+        output_xlsx = Path(self.output_xlsx.get())
+        export_dbg = bool(self.export_dbg.get())
+        return dict(
+            input_dir=Path(self.input_dir.get()),
+            output_xlsx=output_xlsx,
+            course_pages=parse_pages(self.pages.get()),
+            course_y_range=(float(self.y_min.get()), float(self.y_max.get())),
+            checkbox_columns={
                 "presencial": (float(self.x_pres_ini.get()), float(self.x_pres_fim.get())),
                 "misto": (float(self.x_misto_ini.get()), float(self.x_misto_fim.get())),
                 "à distância": (float(self.x_dist_ini.get()), float(self.x_dist_fim.get())),
-            }
-            y_tol = int(self.y_tol.get())
-            export_dbg = bool(self.export_dbg.get())
-            annotations_dir = Path("debug_checagem") if export_dbg else None
-
-            # chamada principal
-            self.append_log(f"🔎 Lendo PDFs em: {input_dir}")
-            df: pd.DataFrame = run_batch(
-                input_dir=input_dir,
-                output_xlsx=output_xlsx,
-                course_pages=pages,
-                course_y_range=y_range,
-                checkbox_columns=x_cols,
-                y_tolerance=y_tol,
-                export_annotations=export_dbg,
-                annotations_dir=annotations_dir,
-            )
-
-            # render preview + zebra (tratando NaN -> "")
-            tag = "even"
-            for _, r in df.iterrows():
-                values = []
-                for c in self.tree["columns"]:
-                    v = r.get(c)
-                    v = "" if (v is None or (isinstance(v, float) and pd.isna(v))) else v
-                    values.append(v)
-                self.tree.insert("", "end", values=values, tags=(tag,))
-                tag = "odd" if tag == "even" else "even"
-
-            # auto-ajuste de largura
-            self._autofit_tree(
-                min_w={
-                    "arquivo": 140,
-                    "requerente": 180,
-                    "cargo": 200,
-                    "lotacao": 160,
-                    "curso_titulo": 240,
-                    "curso_horas": 70,
-                    "modalidade": 120,
-                },
-                max_w={"curso_titulo": 520, "cargo": 360},
-            )
-
-            self.append_log(f"✅ Planilha salva em: {output_xlsx.resolve()}")
-            self.status.configure(text=f"Planilha salva em: {output_xlsx}")
-            self._toast("Extração concluída", f"Planilha salva em:\n{output_xlsx}")
+            },
+            y_tolerance=int(self.y_tol.get()),
+            auto_layout=bool(self.auto_layout.get()),
+            recursive=bool(self.scan_nested.get()),
+            archives=bool(self.scan_nested.get()),
+            export_annotations=export_dbg,
+            annotations_dir=Path("debug_checagem") if export_dbg else None,
+            annotation_mode="selective" if self.dbg_selective.get() else "all",
+            output_format=self.out_format.get(),
+            partition_by_lotacao=bool(self.partition_lot.get()),
+            collect_metrics=bool(self.collect_metrics.get()),
+            store_path=default_store_path(output_xlsx) if self.use_store.get() else None,
+        )
 
+    def run_extract_thread(self):
+        if self._run is not None:
+            return
+        try:
+            params = self._collect_params()
+        except (ValueError, tk.TclError) as e:
+            messagebox.showerror("Erro", f"Parâmetro inválido: {e}")
+            return
+
+        self.btn_run.configure(state=DISABLED)
+        self.btn_cancel.configure(state=NORMAL)
+        self.progress.configure(mode="indeterminate", value=0)
+        self.progress.start(12)
+        self.progress_label.configure(text="")
+        self.status.configure(text="Processando PDFs…")
+        self.log.delete("1.0", tk.END)
+        self._clear_tree()
+        self.append_log(f"🔎 Lendo PDFs em: {params['input_dir']}")
+
+        self._cancel = threading.Event()
+        self._run = {"params": params, "total": 0, "done": 0, "cached": 0, "errors": 0,
+                     "started": time.monotonic()}
+        threading.Thread(target=self.run_extract, args=(params, self._cancel), daemon=True).start()
+        self.after(POLL_MS, self._poll_events)
+
+    def run_extract(self, params, cancel):
+        """
+        Thread da extração: não toca na interface. Cada evento do lote e o
+        resultado final vão para `self._events`, que a janela lê em `_poll_events`.
+        """
+        try:
+            df = run_batch(**params, on_event=lambda ev: self._events.put(("event", ev)), cancel=cancel)
         except Exception as e:
-            messagebox.showerror("Erro", str(e))
-            self.append_log(f"❌ Erro: {e}")
-            self.status.configure(text="Erro na extração")
-        finally:
+            self._events.put(("error", e))
+        else:
+            self._events.put(("done", df))
+
+    def cancel_extract(self):
+        if self._cancel is not None and not self._cancel.is_set():
+            self._cancel.set()
+            self.btn_cancel.configure(state=DISABLED)
+            self.status.configure(text="Cancelando… (termina os PDFs em andamento)")
+            self.append_log("⏹️ Cancelamento pedido: a extração para entre arquivos")
+
+    def _on_close(self):
+        if self._cancel is not None:
+            self._cancel.set()
+        self.destroy()
+
+    def _poll_events(self):
+        """Trata os eventos acumulados desde a última leitura e agenda a próxima."""
+        if self._run is None:
+            return
+        new_rows = False
+        for _ in range(MAX_EVENTS_PER_POLL):
+            try:
+                kind, payload = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "event":
+                new_rows |= self._on_batch_event(payload)
+            else:
+                self._finish_run(kind, payload)
+                return
+        if new_rows:
+            self._render_rows()
+        self._update_progress(self._run)
+        self.after(POLL_MS, self._poll_events)
+
+    def _on_batch_event(self, ev):
+        """Atualiza as contagens; devolve True se chegaram linhas novas para a grade."""
+        run = self._run
+        if ev["event"] == "batch":
+            run["total"] = ev["total"]
             self.progress.stop()
-            self._hide_overlay()
-            self.btn_run.configure(state=NORMAL)
+            self.progress.configure(mode="determinate", maximum=max(1, ev["total"]), value=0)
+            if ev["cached"]:
+                self.append_log(f"♻️ {ev['cached']} de {ev['total']} arquivo(s) já estão no cache")
+        elif ev["event"] == "file":
+            run["done"] += 1
+            run["cached"] += bool(ev["cached"])
+            if ev["error"]:
+                run["errors"] += 1
+                self.append_log(f"⚠️ {ev['arquivo']}: {ev['error']}")
+            self._add_live_rows(ev["rows"])
+            return bool(len(ev["rows"]))
+        elif ev["event"] == "cancelled":
+            self.append_log(f"⏹️ Cancelado: {ev['processed']} de {ev['total']} arquivo(s) processado(s)")
+        return False
+
+    def _update_progress(self, run):
+        if not run["total"]:
+            return
+        elapsed = max(1e-6, time.monotonic() - run["started"])
+        self.progress.configure(value=run["done"])
+        text = (f"{run['done']} de {run['total']} arquivo(s) · {run['done'] / elapsed:.1f} arquivos/s"
+                f" · {self._live_total} linha(s)")
+        if run["cached"]:
+            text += f" · {run['cached']} do cache"
+        if run["errors"]:
+            text += f" · {run['errors']} com erro"
+        self.progress_label.configure(text=text)
+
+    def _finish_run(self, kind, payload):
+        run, self._run = self._run, None
+        self._update_progress(run)
+        self.progress.stop()
+        self.btn_run.configure(state=NORMAL)
+        self.btn_cancel.configure(state=DISABLED)
+        self._cancel = None
+        if kind == "error":
+            self.append_log(f"❌ Erro: {payload}")
+            self.status.configure(text="Erro na extração")
+            messagebox.showerror("Erro", str(payload))
+            return
+
+        df = payload
+        params = run["params"]
+        output_xlsx = params["output_xlsx"]
+        hits, misses = df.attrs.get("cache_hits", 0), df.attrs.get("cache_misses", 0)
+        self.append_log(f"♻️ Cache: {hits} arquivo(s) reaproveitado(s), {misses} processado(s)")
+        if not df.attrs.get("ocr"):
+            self.append_log("ℹ️ Tesseract não encontrado: páginas escaneadas ficam sem OCR")
+        if "annotations" in df.attrs:
+            ann = df.attrs["annotations"]
+            self.append_log(f"🖼️ PNGs de depuração: {ann['written']} gravado(s) em {params['annotations_dir']}")
+        if "run_id" in df.attrs:
+            self.append_log(f"🗄️ Execução {df.attrs['run_id']} gravada em {params['store_path']}")
+        if "metrics" in df.attrs:
+            for line in format_summary(df.attrs["metrics"]):
+                self.append_log(line)
+
+        # grade final: troca as linhas ao vivo pelo DataFrame (ordenável)
+        self._live_parts, self._live_starts, self._live_total = [], [], 0
+        self._set_grid_df(df)
+
+        # auto-ajuste de largura
+        self._autofit_tree(
+            min_w={
+                "arquivo": 140,
+                "requerente": 180,
+                "cargo": 200,
+                "lotacao": 160,
+                "curso_titulo": 240,
+                "curso_horas": 70,
+                "modalidade": 120,
+            },
+            max_w={"curso_titulo": 520, "cargo": 360},
+        )
+
+        self.append_log(f"✅ Saída salva em: {output_xlsx.resolve()}")
+        if df.attrs.get("cancelled"):
+            self.status.configure(text=f"Cancelado; saída parcial em: {output_xlsx}")
+            self._toast("Extração cancelada", f"Saída parcial salva em:\n{output_xlsx}")
+        else:
+            self.status.configure(text=f"Saída salva em: {output_xlsx}")
+            self._toast("Extração concluída", f"Saída salva em:\n{output_xlsx}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,221 @@
+# benchmarks/extraction.py
+"""
+Benchmark da extração sobre papeletas sintéticas (ver synthetic.py).
+
+    python benchmarks/extraction.py --files 1000 --courses 1-50 --save atual.json
+    python benchmarks/extraction.py --files 1000 --courses 1-50 --baseline atual.json
+    python benchmarks/extraction.py --long-pages 300 --max-file-mb 60 --max-rss-mb 400
+
+Mede `extract_header`, `find_course_rows_with_y`,
+`detect_checkbox_modality_by_coords` e `process_pdf` arquivo a arquivo
+(numa amostra) e `run_batch` de ponta a ponta, com arquivos/s e pico de RSS.
+Com `--long-pages`, mede também o pico de memória de um único PDF longo;
+os limites `--max-*` fazem a execução sair com código 1 quando estourados.
+"""
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import extract_core as ec  # noqa: E402
+from synthetic import generate_corpus, papeleta_page, parse_span, write_pdf  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+
+def peak_rss_mb(children: bool = False) -> Optional[float]:
+    """Pico de RSS do processo (ou dos filhos); None onde não há `resource`."""
+    if resource is None:
+        return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    kb = resource.getrusage(who).ru_maxrss
+    return kb / 1024.0 if sys.platform != "darwin" else kb / (1024.0 * 1024.0)
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {"calls": 0}
+    s = sorted(samples)
+    pick = lambda q: s[min(len(s) - 1, int(q * len(s)))]  # noqa: E731
+    total = sum(s)
+    return {
+        "calls": len(s),
+        "total_s": total,
+        "mean_ms": 1000 * total / len(s),
+        "p50_ms": 1000 * pick(0.50),
+        "p95_ms": 1000 * pick(0.95),
+        "max_ms": 1000 * s[-1],
+    }
+
+
+def bench_stages(pdfs: List[Path]) -> Dict[str, Dict[str, float]]:
+    import pdfplumber
+
+    y_range, cols, tol = ec.DEFAULT_COURSE_Y_RANGE, ec.DEFAULT_CHECKBOX_COLUMNS, ec.DEFAULT_Y_TOLERANCE
+    times: Dict[str, List[float]] = {k: [] for k in (
+        "extract_header", "find_course_rows_with_y", "detect_checkbox_modality_by_coords", "process_pdf")}
+
+    for pdf_path in pdfs:
+        with pdfplumber.open(pdf_path) as pdf:
+            page = pdf.pages[0]
+            text = ec.normalize_text(page.extract_text() or "")
+            t0 = time.perf_counter()
+            ec.extract_header(text)
+            times["extract_header"].append(time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            rows = ec.find_course_rows_with_y(page, y_range)
+            times["find_course_rows_with_y"].append(time.perf_counter() - t0)
+
+            for _, _, y in rows:
+                t0 = time.perf_counter()
+                ec.detect_checkbox_modality_by_coords(page, y, cols, tol)
+                times["detect_checkbox_modality_by_coords"].append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        ec.process_pdf(pdf_path, ec.DEFAULT_COURSE_PAGES, y_range, cols, tol)
+        times["process_pdf"].append(time.perf_counter() - t0)
+
+    return {k: summarize(v) for k, v in times.items()}
+
+
+def bench_run_batch(corpus: Path, workers: Optional[int]) -> Dict[str, float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / "saida.xlsx"
+        t0 = time.perf_counter()
+        df = ec.run_batch(
+            corpus, out, ec.DEFAULT_COURSE_PAGES, ec.DEFAULT_COURSE_Y_RANGE,
+            ec.DEFAULT_CHECKBOX_COLUMNS, ec.DEFAULT_Y_TOLERANCE,
+            workers=workers, use_cache=False,
+        )
+        elapsed = time.perf_counter() - t0
+    n_files = len(list(corpus.glob("*.pdf")))
+    return {
+        "files": n_files,
+        "rows": len(df),
+        "seconds": elapsed,
+        "files_per_sec": n_files / elapsed if elapsed else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "peak_rss_children_mb": peak_rss_mb(children=True),
+    }
+
+
+def bench_long_pdf(folder: Path, n_pages: int, courses) -> Dict[str, float]:
+    """Um PDF com `n_pages` páginas de cursos: pico de memória (tracemalloc) e tempo."""
+    import random
+
+    rnd = random.Random(1)
+    path = folder / "longo.pdf"
+    write_pdf(path, [papeleta_page(rnd, rnd.randint(*courses), header=(i == 0)) for i in range(n_pages)])
+    timings: Dict[str, float] = {}
+    t0 = time.perf_counter()
+    rows = ec.process_pdf(
+        path, list(range(1, n_pages + 1)), ec.DEFAULT_COURSE_Y_RANGE, ec.DEFAULT_CHECKBOX_COLUMNS,
+        ec.DEFAULT_Y_TOLERANCE, trace_memory=True, timings=timings,
+    )
+    return {
+        "pages": n_pages,
+        "rows": len(rows),
+        "seconds": time.perf_counter() - t0,
+        "peak_mem_mb": timings.get("peak_mem_mb"),
+    }
+
+
+def compare(current: Dict, baseline: Dict) -> None:
+    print("\nComparação com a linha de base (atual / base):")
+    for name, cur in current["stages"].items():
+        base = baseline.get("stages", {}).get(name)
+        if base and base.get("mean_ms") and cur.get("mean_ms"):
+            print(f"  {name:38s} {cur['mean_ms']:9.3f} ms / {base['mean_ms']:9.3f} ms"
+                  f"  ({cur['mean_ms'] / base['mean_ms']:.2f}x)")
+    cur, base = current["run_batch"], baseline.get("run_batch", {})
+    if base.get("files_per_sec"):
+        print(f"  {'run_batch (arquivos/s)':38s} {cur['files_per_sec']:9.1f}    / {base['files_per_sec']:9.1f}"
+              f"     ({cur['files_per_sec'] / base['files_per_sec']:.2f}x)")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--files", type=int, default=200, help="quantidade de PDFs sintéticos (1 a 10000)")
+    ap.add_argument("--courses", type=parse_span, default=(1, 15), help="cursos por página, ex.: 10 ou 1-50")
+    ap.add_argument("--corpus", type=Path, default=None, help="usa uma pasta existente em vez de gerar")
+    ap.add_argument("--sample", type=int, default=200, help="arquivos usados nas medições por etapa")
+    ap.add_argument("--workers", type=int, default=None, help="workers do run_batch (1 = série)")
+    ap.add_argument("--save", type=Path, default=None, help="grava o resultado em JSON")
+    ap.add_argument("--baseline", type=Path, default=None, help="JSON de uma execução anterior para comparar")
+    ap.add_argument("--long-pages", type=int, default=0, help="mede também um PDF com N páginas de cursos")
+    ap.add_argument("--max-file-mb", type=float, default=None,
+                    help="limite para o pico de memória do PDF longo (tracemalloc)")
+    ap.add_argument("--max-rss-mb", type=float, default=None,
+                    help="limite para o pico de RSS do run_batch (processo principal e workers)")
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = args.corpus or Path(tmp) / "corpus"
+        if args.corpus is None:
+            t0 = time.perf_counter()
+            generate_corpus(corpus, args.files, args.courses)
+            print(f"{args.files} PDFs gerados em {time.perf_counter() - t0:.1f} s")
+        pdfs = sorted(corpus.glob("*.pdf"))
+
+        result = {
+            "meta": {
+                "files": len(pdfs),
+                "courses": list(args.courses),
+                "workers": args.workers,
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            },
+            "stages": bench_stages(pdfs[: args.sample]),
+            "run_batch": bench_run_batch(corpus, args.workers),
+        }
+        if args.long_pages:
+            result["long_pdf"] = bench_long_pdf(Path(tmp), args.long_pages, args.courses)
+
+    failures: List[str] = []
+    rb = result["run_batch"]
+    long_pdf = result.get("long_pdf")
+    if args.max_file_mb is not None and long_pdf and long_pdf["peak_mem_mb"] > args.max_file_mb:
+        failures.append(f"PDF de {long_pdf['pages']} páginas chegou a {long_pdf['peak_mem_mb']:.1f} MB"
+                        f" (> {args.max_file_mb} MB)")
+    if args.max_rss_mb is not None:
+        for label, key in (("processo principal", "peak_rss_mb"), ("workers", "peak_rss_children_mb")):
+            if rb[key] is not None and rb[key] > args.max_rss_mb:
+                failures.append(f"pico de RSS ({label}) {rb[key]:.1f} MB (> {args.max_rss_mb} MB)")
+    result["failures"] = failures
+
+    for name, st in result["stages"].items():
+        if st["calls"]:
+            print(f"{name:38s} n={st['calls']:6d}  média {st['mean_ms']:8.3f} ms"
+                  f"  p50 {st['p50_ms']:8.3f}  p95 {st['p95_ms']:8.3f}  máx {st['max_ms']:8.3f}")
+    mb = lambda v: "n/d" if v is None else f"{v:.1f} MB"  # noqa: E731
+    print(f"run_batch: {rb['files']} arquivos, {rb['rows']} linhas em {rb['seconds']:.2f} s"
+          f" ({rb['files_per_sec']:.1f} arquivos/s); pico RSS {mb(rb['peak_rss_mb'])}"
+          f" (workers {mb(rb['peak_rss_children_mb'])})")
+    if long_pdf:
+        print(f"PDF longo: {long_pdf['pages']} páginas, {long_pdf['rows']} linhas em {long_pdf['seconds']:.2f} s;"
+              f" pico {mb(long_pdf['peak_mem_mb'])}")
+
+    if args.save:
+        args.save.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"resultado salvo em {args.save}")
+    if args.baseline:
+        compare(result, json.loads(args.baseline.read_text(encoding="utf-8")))
+    for f in failures:
+        print(f"FALHA: {f}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
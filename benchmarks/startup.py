@@ -0,0 +1,119 @@
+# benchmarks/startup.py
+"""
+Mede o tempo de abertura da GUI e o custo de import dos módulos.
+
+    python benchmarks/startup.py            # relatório
+    python benchmarks/startup.py --json     # saída em JSON (para acompanhar no CI)
+
+Sai com código 1 se `app_gui`/`extract_core` puxarem no import algum módulo
+pesado que deveria ser carregado sob demanda (pandas, pdfplumber, ...), ou
+se um dos limites de tempo informados for excedido.
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# não podem aparecer no import da GUI nem do núcleo
+DEFERRED_MODULES = ("pandas", "numpy", "pdfplumber", "pdfminer", "openpyxl", "pyarrow", "pytesseract")
+
+FIRST_WINDOW_SNIPPET = """
+import time
+t0 = time.perf_counter()
+import app_gui
+t1 = time.perf_counter()
+app = app_gui.App()
+app.update()
+t2 = time.perf_counter()
+print(f"{t1 - t0:.6f} {t2 - t0:.6f}")
+app.destroy()
+"""
+
+
+def import_profile(module: str) -> Tuple[float, List[Tuple[str, float]]]:
+    """Roda `python -X importtime -c 'import <module>'`; devolve (total_ms, [(módulo, cumulativo_ms)])."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"falha ao importar {module}")
+    entries: List[Tuple[str, float]] = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _self_us, cumulative, name = line[len("import time:"):].split("|", 2)
+        entries.append((name.strip(), int(cumulative) / 1000.0))
+    total = next((ms for name, ms in entries if name == module), 0.0)
+    return total, entries
+
+
+def first_window_time() -> Optional[Dict[str, float]]:
+    """Tempo (s) até o import de app_gui e até a primeira janela desenhada; None sem display."""
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", FIRST_WINDOW_SNIPPET], cwd=ROOT, capture_output=True, text=True)
+    wall = time.perf_counter() - t0
+    if proc.returncode != 0:
+        return None
+    imp, win = (float(v) for v in proc.stdout.split())
+    return {"import_s": imp, "first_window_s": win, "process_wall_s": wall}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--json", action="store_true", help="imprime o resultado em JSON")
+    ap.add_argument("--top", type=int, default=15, help="quantos imports mais caros listar")
+    ap.add_argument("--max-import-ms", type=float, default=None, help="limite para o import de extract_core")
+    ap.add_argument("--max-window-s", type=float, default=None, help="limite para a primeira janela")
+    args = ap.parse_args(argv)
+
+    result: Dict[str, object] = {}
+    failures: List[str] = []
+    for module in ("extract_core", "app_gui"):
+        try:
+            total, entries = import_profile(module)
+        except RuntimeError as e:
+            result[module] = {"error": str(e)}
+            continue
+        heavy = sorted({n.split(".")[0] for n, _ in entries} & set(DEFERRED_MODULES))
+        top = sorted(entries, key=lambda e: e[1], reverse=True)[: args.top]
+        result[module] = {"total_ms": total, "deferred_violations": heavy, "top": top}
+        if heavy:
+            failures.append(f"{module} importa no carregamento: {', '.join(heavy)}")
+        if module == "extract_core" and args.max_import_ms and total > args.max_import_ms:
+            failures.append(f"import de extract_core levou {total:.1f} ms (> {args.max_import_ms} ms)")
+
+    window = first_window_time()
+    result["first_window"] = window
+    if window and args.max_window_s and window["first_window_s"] > args.max_window_s:
+        failures.append(f"primeira janela em {window['first_window_s']:.2f} s (> {args.max_window_s} s)")
+    result["failures"] = failures
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        for module in ("extract_core", "app_gui"):
+            info = result[module]
+            if "error" in info:
+                print(f"{module}: não foi possível importar ({info['error']})")
+                continue
+            print(f"{module}: {info['total_ms']:.1f} ms")
+            for name, ms in info["top"]:
+                print(f"  {ms:9.1f} ms  {name}")
+        if window:
+            print(f"primeira janela: {window['first_window_s']:.2f} s "
+                  f"(import app_gui {window['import_s']:.2f} s, processo {window['process_wall_s']:.2f} s)")
+        else:
+            print("primeira janela: indisponível (sem display ou ttkbootstrap)")
+        for f in failures:
+            print(f"FALHA: {f}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+# benchmarks/synthetic.py
+"""
+Gera "Papeletas de Benefícios – AQ" sintéticas, sem dependências externas
+(o PDF é escrito à mão com Helvetica/WinAnsi).
+
+    python benchmarks/synthetic.py saida/ --files 1000 --courses 1-50
+
+Cada arquivo tem os campos de cabeçalho, N linhas de curso com horas dentro
+da faixa Y padrão (285–465) e a marca do checkbox (um "X" ou um quadradinho
+preenchido) em uma das colunas X padrão, além de linhas que devem ser
+ignoradas ("Saldo de ...").
+"""
+import argparse
+import random
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+PAGE_W, PAGE_H = 595, 842
+BAND = (290.0, 460.0)  # dentro de DEFAULT_COURSE_Y_RANGE, com folga
+CHECKBOX_X = {"presencial": 458.0, "misto": 518.0, "à distância": 578.0}
+
+NOMES = ["MARIA DA SILVA", "JOÃO PEREIRA", "ANA SOUZA", "CARLOS ALBERTO LIMA", "FERNANDA COSTA"]
+CARGOS = ["Auditor de Controle Externo", "Técnico de Administração Pública", "Analista de Sistemas"]
+LOTACOES = ["SECOF", "SEGEP", "SEAUD", "GAB-PRES", "DIVTI"]
+TEMAS = ["Gestão pública", "Licitações e contratos", "Python para análise de dados",
+         "Auditoria baseada em riscos", "Direito administrativo", "Excel avançado",
+         "Liderança e comunicação", "Controle interno"]
+
+# (tipo, x, top, tamanho/largura, texto/altura); "line" é (tipo, x0, top0, x1, top1)
+Item = Tuple[str, float, float, float, object]
+
+
+def _pdf_string(text: str) -> bytes:
+    raw = text.encode("cp1252")
+    return b"(" + raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def _content_stream(items: Sequence[Item]) -> bytes:
+    out = []
+    for kind, x, top, a, b in items:
+        if kind == "text":  # a = tamanho da fonte, b = texto
+            y = PAGE_H - top - a
+            out.append(b"BT /F1 %.2f Tf %.2f %.2f Td " % (a, x, y) + _pdf_string(b) + b" Tj ET")
+        elif kind == "line":  # a, b = x e top do fim do traço
+            out.append(b"1 w %.2f %.2f m %.2f %.2f l S" % (x, PAGE_H - top, a, PAGE_H - b))
+        else:  # "box": a = largura, b = altura
+            out.append(b"%.2f %.2f %.2f %.2f re f" % (x, PAGE_H - top - b, a, b))
+    return b"\n".join(out)
+
+
+def write_pdf(path: Path, pages: Sequence[Sequence[Item]]) -> None:
+    """Grava um PDF mínimo (uma fonte, um content stream por página)."""
+    objs: List[bytes] = [b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"]
+    pages_id = 1 + 2 * len(pages) + 1
+    kids = []
+    for items in pages:
+        stream = _content_stream(items)
+        objs.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        objs.append(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << /F1 1 0 R >> >> /Contents %d 0 R >>"
+            % (pages_id, PAGE_W, PAGE_H, len(objs))
+        )
+        kids.append(len(objs))
+    objs.append(b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % k for k in kids), len(kids)))
+    objs.append(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    buf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objs, start=1):
+        offsets.append(len(buf))
+        buf += b"%d 0 obj\n" % i + obj + b"\nendobj\n"
+    xref = len(buf)
+    buf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objs) + 1)
+    for off in offsets:
+        buf += b"%010d 00000 n \n" % off
+    buf += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objs) + 1, len(objs), xref)
+    path.write_bytes(bytes(buf))
+
+
+def papeleta_page(rnd: random.Random, n_courses: int, header: bool = True) -> List[Item]:
+    items: List[Item] = []
+    if header:
+        items += [
+            ("text", 40, 40, 14, "Papeleta de Benefícios – AQ"),
+            ("text", 40, 80, 10, f"Requerente: {rnd.choice(NOMES)}"),
+            ("text", 40, 95, 10, f"Matrícula: {rnd.randint(10000, 99999)}"),
+            ("text", 40, 110, 10, f"Cargo: {rnd.choice(CARGOS)}"),
+            ("text", 40, 125, 10, f"Lotação: {rnd.choice(LOTACOES)} Ramal: {rnd.randint(100, 999)}"),
+        ]
+    items += [
+        ("text", 440, 270, 8, "Presencial"),
+        ("text", 505, 270, 8, "Misto"),
+        ("text", 555, 270, 8, "À distância"),
+    ]
+    step = (BAND[1] - BAND[0]) / max(n_courses, 1)
+    size = min(8.0, step * 0.8)
+    for i in range(n_courses):
+        top = BAND[0] + i * step + rnd.random() * step * 0.1  # leve variação de baseline
+        titulo = f"{rnd.choice(TEMAS)} – turma {i + 1}"
+        items.append(("text", 40, top, size, f"{titulo} {rnd.randint(4, 120)}h"))
+        col = rnd.choice([*CHECKBOX_X.values(), None])
+        if col is not None:
+            if rnd.random() < 0.5:
+                items.append(("text", col, top, size, "X"))
+            else:
+                items.append(("box", col, top + size * 0.1, size * 0.75, size * 0.75))
+    items.append(("text", 40, 520, 10, f"Saldo de horas: {rnd.randint(0, 300)}h"))
+    return items
+
+
+def parse_span(text: str) -> Tuple[int, int]:
+    """'10' -> (10, 10); '1-50' -> (1, 50)."""
+    lo, _, hi = text.partition("-")
+    return int(lo), int(hi or lo)
+
+
+def generate_corpus(
+    out_dir: Path,
+    n_files: int,
+    courses: Tuple[int, int] = (1, 15),
+    extra_page_every: Optional[int] = 3,
+    seed: int = 1,
+) -> List[Path]:
+    """Gera `n_files` papeletas em `out_dir`; a cada `extra_page_every` arquivos, uma 2ª página."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rnd = random.Random(seed)
+    paths = []
+    for i in range(n_files):
+        pages = [papeleta_page(rnd, rnd.randint(*courses))]
+        if extra_page_every and i % extra_page_every == 0:
+            pages.append(papeleta_page(rnd, rnd.randint(*courses), header=False))
+        path = out_dir / f"papeleta_{i:05d}.pdf"
+        write_pdf(path, pages)
+        paths.append(path)
+    return paths
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("out_dir", type=Path)
+    ap.add_argument("--files", type=int, default=100)
+    ap.add_argument("--courses", type=parse_span, default=(1, 15), help="cursos por página, ex.: 10 ou 1-50")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args(argv)
+    paths = generate_corpus(args.out_dir, args.files, args.courses, seed=args.seed)
+    print(f"{len(paths)} PDFs gerados em {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
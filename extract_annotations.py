@@ -0,0 +1,154 @@
+# extract_annotations.py
+import multiprocessing as mp
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
+
+from extract_sources import PdfSource, as_source
+
+if TYPE_CHECKING:  # concurrent.futures só é importado quando há PNG a desenhar
+    from concurrent.futures import Future, ProcessPoolExecutor
+
+# "all": toda página processada; "selective": só as suspeitas (ver `page_reasons`)
+ANNOTATION_MODES = ("all", "selective")
+DEFAULT_ANNOTATION_RESOLUTION = 160
+PLAUSIBLE_HOURS = (2, 480)  # carga horária fora disso é tratada como anômala
+
+
+def page_reasons(hours: List[int], modalities: List[Optional[str]]) -> List[str]:
+    """Motivos para uma página merecer PNG no modo seletivo (lista vazia = página ok)."""
+    reasons = []
+    if not hours:
+        reasons.append("sem_cursos")
+    if any(m is None for m in modalities):
+        reasons.append("modalidade_nula")
+    lo, hi = PLAUSIBLE_HOURS
+    if any(not (lo <= h <= hi) for h in hours):
+        reasons.append("horas_anomalas")
+    return reasons
+
+
+def draw_page(
+    page,
+    out_path: Path,
+    course_y_range: Tuple[float, float],
+    checkbox_columns: Dict[str, Tuple[float, float]],
+    ys: List[float],
+    resolution: int = DEFAULT_ANNOTATION_RESOLUTION,
+    crop_margin: Optional[float] = None,
+) -> None:
+    """
+    Desenha a faixa Y (azul), as colunas dos checkboxes (vermelho) e as linhas
+    de curso (verde) sobre a página. Com `crop_margin`, rasteriza só a faixa Y
+    (mais a margem), o que barateia bastante o PNG.
+    """
+    y0, y1 = course_y_range
+    if crop_margin is not None:
+        page = page.crop((0, max(0.0, y0 - crop_margin), page.width, min(page.height, y1 + crop_margin)))
+    top, bottom = page.bbox[1], page.bbox[3]
+    img = page.to_image(resolution=resolution)
+    img.draw_rect((0, y0, page.width, y1), stroke="blue", fill=None)
+    for x0, x1 in checkbox_columns.values():
+        img.draw_rect((x0, top, x1, bottom), stroke="red", fill=None)
+    for y in ys:
+        img.draw_line([(0, y), (page.width, y)], stroke="green")
+    img.save(str(out_path))
+
+
+def render_file(
+    pdf_path: Union[Path, PdfSource],
+    pages: List[Dict],
+    annotations_dir: Path,
+    course_y_range: Tuple[float, float],
+    checkbox_columns: Dict[str, Tuple[float, float]],
+    resolution: int,
+    crop_margin: Optional[float],
+) -> Tuple[int, int, float]:
+    """Reabre o PDF e grava os PNGs de `pages`; devolve (gravados, falhas, segundos)."""
+    import pdfplumber
+
+    t0 = time.perf_counter()
+    ok = failed = 0
+    source = as_source(pdf_path)
+    annotations_dir.mkdir(parents=True, exist_ok=True)
+    with pdfplumber.open(source.open()) as pdf:
+        for p in pages:
+            try:
+                draw_page(
+                    pdf.pages[p["page"] - 1],
+                    annotations_dir / f"{source.stem}_p{p['page']}.png",
+                    p.get("course_y_range", course_y_range), p.get("checkbox_columns", checkbox_columns),
+                    p["ys"], resolution, crop_margin,
+                )
+                ok += 1
+            except Exception:
+                failed += 1
+    return ok, failed, time.perf_counter() - t0
+
+
+class AnnotationRenderer:
+    """
+    Fila de PNGs de depuração renderizados em processos próprios, fora do
+    caminho da extração. `submit` recebe as páginas que `process_pdf` anotou
+    (com os motivos) e filtra pelo modo; `close` espera a fila esvaziar.
+    """
+
+    def __init__(
+        self,
+        annotations_dir: Path,
+        course_y_range: Tuple[float, float],
+        checkbox_columns: Dict[str, Tuple[float, float]],
+        mode: str = "all",
+        resolution: int = DEFAULT_ANNOTATION_RESOLUTION,
+        crop_margin: Optional[float] = None,
+        workers: Optional[int] = None,
+    ):
+        if mode not in ANNOTATION_MODES:
+            raise ValueError(f"Modo de anotação desconhecido: {mode!r} (use {', '.join(ANNOTATION_MODES)})")
+        self.annotations_dir = annotations_dir
+        self.course_y_range = course_y_range
+        self.checkbox_columns = checkbox_columns
+        self.mode = mode
+        self.resolution = resolution
+        self.crop_margin = crop_margin
+        self.workers = workers or max(1, (os.cpu_count() or 2) // 2)
+        self._pool: Optional["ProcessPoolExecutor"] = None
+        self._futures: List[Tuple["Future", int]] = []
+        self.queued = 0
+
+    def submit(self, pdf_path: Union[Path, PdfSource], pages: List[Dict]) -> int:
+        """Enfileira as páginas de um PDF; devolve quantas foram para a fila."""
+        if self.mode == "selective":
+            pages = [p for p in pages if p["reasons"]]
+        if not pages:
+            return 0
+        if self._pool is None:  # só sobe os processos se houver algo a desenhar
+            from concurrent.futures import ProcessPoolExecutor
+
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=mp.get_context("spawn"))
+        fut = self._pool.submit(
+            render_file, pdf_path, pages, self.annotations_dir,
+            self.course_y_range, self.checkbox_columns, self.resolution, self.crop_margin,
+        )
+        self._futures.append((fut, len(pages)))
+        self.queued += len(pages)
+        return len(pages)
+
+    def close(self, cancel: bool = False) -> Dict[str, float]:
+        """Espera os PNGs pendentes (ou descarta a fila com `cancel`) e resume o trabalho."""
+        written = failed = 0
+        render_s = 0.0
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=cancel)
+            for fut, n_pages in self._futures:
+                if fut.cancelled():
+                    continue
+                try:
+                    ok, bad, secs = fut.result()
+                except Exception:  # PDF ilegível na reabertura, processo morto...
+                    failed += n_pages
+                    continue
+                written, failed, render_s = written + ok, failed + bad, render_s + secs
+            self._pool = None
+        return {"queued": self.queued, "written": written, "failed": failed, "render_s": round(render_s, 6)}
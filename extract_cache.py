@@ -0,0 +1,224 @@
+# extract_cache.py
+import hashlib
+import json
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from extract_rows import FileRows, as_file_rows
+from extract_sources import PdfSource, as_source
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path      TEXT PRIMARY KEY,
+    size      INTEGER NOT NULL,
+    mtime_ns  INTEGER NOT NULL,
+    sha256    TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    sha256       TEXT NOT NULL,
+    fingerprint  TEXT NOT NULL,
+    version      TEXT NOT NULL,
+    rows_json    TEXT NOT NULL,
+    PRIMARY KEY (sha256, fingerprint, version)
+);
+"""
+
+
+def default_cache_path(output_xlsx: Path) -> Path:
+    """Arquivo SQLite ao lado da planilha: 'dados_extraidos.cache.sqlite'."""
+    return output_xlsx.with_name(output_xlsx.stem + ".cache.sqlite")
+
+
+def file_sha256(path: Path, chunk: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class ExtractionCache:
+    """
+    Cache persistente das linhas de `process_pdf`, chaveado por
+    (hash do conteúdo do PDF, fingerprint dos parâmetros, versão do extrator).
+
+    O hash de cada caminho fica memorizado por (tamanho, mtime), então
+    arquivos intocados nem chegam a ser relidos numa nova execução (e um
+    arquivo alterado durante a execução é relido). Membros de ZIP/TAR
+    (`PdfSource`) entram como "<pacote>!<membro>", memorizados pelo
+    tamanho e CRC/mtime do próprio membro.
+    """
+
+    def __init__(self, db_path: Path, fingerprint: str, version: str, commit_every: int = 200):
+        self.db_path = db_path
+        self.fingerprint = fingerprint
+        self.version = version
+        self.commit_every = commit_every
+        self.hits = 0
+        self.misses = 0
+        self._pending = 0
+        self._sha: Dict[str, Tuple[int, int, str]] = {}  # caminho -> (tamanho, mtime, hash)
+        self.conn = sqlite3.connect(str(db_path))
+        self.conn.executescript(_SCHEMA)
+
+    def known_digest(self, pdf_path: Union[Path, PdfSource]) -> Optional[str]:
+        """sha256 já memorizado para o (tamanho, mtime) atual, sem ler o conteúdo; None se não houver."""
+        source = as_source(pdf_path)
+        key = source.key
+        size, stamp = source.signature()
+        memo = self._sha.get(key)
+        if memo and memo[0] == size and memo[1] == stamp:
+            return memo[2]
+        row = self.conn.execute(
+            "SELECT size, mtime_ns, sha256 FROM files WHERE path = ?", (key,)
+        ).fetchone()
+        if row and row[0] == size and row[1] == stamp:
+            self._sha[key] = (size, stamp, row[2])
+            return row[2]
+        return None
+
+    def digest(self, pdf_path: Union[Path, PdfSource]) -> str:
+        """sha256 do conteúdo, memorizado por (tamanho, mtime). Usa o `data` já lido, se houver."""
+        source = as_source(pdf_path)
+        sha = self.known_digest(source)
+        if sha is not None:
+            return sha
+        size, stamp = source.signature()
+        if source.data is not None:
+            sha = hashlib.sha256(source.data).hexdigest()
+        elif source.member is None:
+            sha = file_sha256(source.path)
+        else:
+            sha = hashlib.sha256(source.read_bytes()).hexdigest()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO files (path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?)",
+            (source.key, size, stamp, sha),
+        )
+        self._touch()
+        self._sha[source.key] = (size, stamp, sha)
+        return sha
+
+    def contains(self, pdf_path: Union[Path, PdfSource]) -> bool:
+        """Consulta sem carregar as linhas; conta acerto/erro do cache."""
+        row = self.conn.execute(
+            "SELECT 1 FROM results WHERE sha256 = ? AND fingerprint = ? AND version = ?",
+            (self.digest(pdf_path), self.fingerprint, self.version),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def get(self, pdf_path: Union[Path, PdfSource]) -> Optional[FileRows]:
+        row = self.conn.execute(
+            "SELECT rows_json FROM results WHERE sha256 = ? AND fingerprint = ? AND version = ?",
+            (self.digest(pdf_path), self.fingerprint, self.version),
+        ).fetchone()
+        return FileRows.from_json(json.loads(row[0])) if row else None
+
+    def put(self, pdf_path: Union[Path, PdfSource], rows: Union[FileRows, List[Dict[str, Optional[str]]]]) -> None:
+        """Grava as linhas com o cabeçalho uma vez só (`FileRows.to_json`)."""
+        data = as_file_rows(rows, as_source(pdf_path).name).to_json()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO results (sha256, fingerprint, version, rows_json) VALUES (?, ?, ?, ?)",
+            (self.digest(pdf_path), self.fingerprint, self.version, json.dumps(data, ensure_ascii=False)),
+        )
+        self._touch()
+
+    def _touch(self) -> None:
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.commit()
+
+    def commit(self) -> None:
+        self.conn.commit()
+        self._pending = 0
+
+    def stats(self) -> Tuple[int, int]:
+        return self.hits, self.misses
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
+
+
+def default_ocr_cache_path(output_xlsx: Path) -> Path:
+    """Cache de OCR ao lado da planilha: 'dados_extraidos.ocr.sqlite'."""
+    return output_xlsx.with_name(output_xlsx.stem + ".ocr.sqlite")
+
+
+class OcrCache:
+    """
+    Palavras do Tesseract por recorte de página, chaveadas pelo hash da
+    imagem (ver `extract_ocr.ocr_regions`). Independe dos parâmetros de
+    extração: a mesma imagem sempre dá o mesmo OCR. Cada processo
+    trabalhador abre sua própria conexão; `timeout` cobre a disputa pela
+    escrita entre eles.
+    """
+
+    def __init__(self, db_path: Path, timeout: float = 30.0):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(str(db_path), timeout=timeout)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS ocr (image_sha256 TEXT PRIMARY KEY, words_json TEXT NOT NULL)"
+        )
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        row = self.conn.execute("SELECT words_json FROM ocr WHERE image_sha256 = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, words: List[Dict]) -> None:
+        # OCR é caro: grava na hora, para não perder nada se o processo morrer
+        self.conn.execute(
+            "INSERT OR REPLACE INTO ocr (image_sha256, words_json) VALUES (?, ?)",
+            (key, json.dumps(words, ensure_ascii=False)),
+        )
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def default_layout_cache_path(output_xlsx: Path) -> Path:
+    """Geometrias calibradas ao lado da planilha: 'dados_extraidos.layouts.sqlite'."""
+    return output_xlsx.with_name(output_xlsx.stem + ".layouts.sqlite")
+
+
+class LayoutStore:
+    """
+    Geometria calibrada de cada modelo de formulário (ver
+    `extract_layout.LayoutCache`), chaveada pela impressão digital do modelo
+    e pela altura da faixa padrão. Como o `OcrCache`, cada processo abre sua
+    conexão e grava na hora.
+    """
+
+    def __init__(self, db_path: Path, timeout: float = 30.0):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(str(db_path), timeout=timeout)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS layouts ("
+            "fingerprint TEXT NOT NULL, band_height REAL NOT NULL, layout_json TEXT NOT NULL, "
+            "PRIMARY KEY (fingerprint, band_height))"
+        )
+
+    def get(self, fingerprint: str, band_height: float):
+        row = self.conn.execute(
+            "SELECT layout_json FROM layouts WHERE fingerprint = ? AND band_height = ?",
+            (fingerprint, band_height),
+        ).fetchone()
+        if row is None:
+            return None
+        y_range, columns = json.loads(row[0])
+        return tuple(y_range), {label: tuple(rng) for label, rng in columns.items()}
+
+    def put(self, fingerprint: str, band_height: float, layout) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO layouts (fingerprint, band_height, layout_json) VALUES (?, ?, ?)",
+            (fingerprint, band_height, json.dumps(layout, ensure_ascii=False)),
+        )
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
@@ -1,9 +1,70 @@
 # extract_core.py
+import hashlib
+import json
+import multiprocessing as mp
+import multiprocessing.connection as mp_connection
+import os
 import re
+import signal
+import sys
+import time
+from bisect import bisect_right
 from pathlib import Path
-from typing import Dict, Optional, List, Tuple
-import pandas as pd
-import pdfplumber
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, Optional, List, Tuple, Union
+
+from extract_annotations import (
+    ANNOTATION_MODES,
+    DEFAULT_ANNOTATION_RESOLUTION,
+    AnnotationRenderer,
+    draw_page,
+    page_reasons,
+)
+from extract_cache import (
+    ExtractionCache,
+    OcrCache,
+    default_cache_path,
+    default_layout_cache_path,
+    default_ocr_cache_path,
+)
+from extract_layout import LAYOUTS
+from extract_metrics import BatchMetrics, profile_call, save_report, stage_timer
+from extract_ocr import OcrPage, ocr_available, ocr_regions
+from extract_output import OUTPUT_FORMATS, StreamingXlsxWriter, infer_output_format, write_frame
+from extract_rows import OUTPUT_COLUMNS, FileRows, rows_frame
+from extract_store import ResultStore
+from extract_sources import (
+    DEFAULT_PREFETCH_MB,
+    PdfSource,
+    Prefetcher,
+    as_source,
+    close_archives,
+    expand_sources,
+    list_sources,
+    read_file_list,
+)
+
+# pandas/pdfplumber (e pdfminer/Pillow por baixo) são importados só quando
+# usados: a GUI e a CLI abrem rápido e `preload()` pode aquecer em segundo plano
+if TYPE_CHECKING:
+    import pandas as pd
+
+try:  # teto de memória por processo (indisponível no Windows)
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+# mude sempre que a lógica de extração alterar as linhas produzidas
+EXTRACTOR_VERSION = "2"
+
+# parâmetros padrão do formulário (mesmos da GUI)
+DEFAULT_COURSE_PAGES = [1]
+DEFAULT_COURSE_Y_RANGE = (285.0, 465.0)
+DEFAULT_CHECKBOX_COLUMNS = {
+    "presencial": (455.0, 475.0),
+    "misto": (515.0, 535.0),
+    "à distância": (575.0, 595.0),
+}
+DEFAULT_Y_TOLERANCE = 12
 
 HOURS_INLINE_RX = r"(\d{1,3})\s*h\b"
 HOURS_WORD_RX = r"(\d{1,3})\s*horas?\b"
@@ -23,12 +84,31 @@ EXCLUDE_PREFIXES = (
 )
 
 
+def preload() -> None:
+    """Importa a pilha pesada de extração (pandas, pdfplumber, openpyxl)."""
+    import openpyxl  # noqa: F401
+    import pandas  # noqa: F401
+    import pdfplumber  # noqa: F401
+
+
+def parse_pages(text: str) -> List[int]:
+    """'1' ou '1,2' -> [1] / [1, 2]; vazio = todas as páginas."""
+    pages = []
+    for p in text.split(","):
+        p = p.strip()
+        if p:
+            pages.append(int(p))
+    return pages
+
+
 def normalize_text(txt: str) -> str:
-    lines = [re.sub(r"\s+", " ", line).strip() for line in txt.splitlines()]
+    lines = [_WS_RX.sub(" ", line).strip() for line in txt.splitlines()]
     return "\n".join([l for l in lines if l])
 
 
 def extract_text_pages(pdf_path: Path) -> List[str]:
+    import pdfplumber
+
     pages: List[str] = []
     with pdfplumber.open(pdf_path) as pdf:
         for page in pdf.pages:
@@ -36,14 +116,85 @@ def extract_text_pages(pdf_path: Path) -> List[str]:
     return pages
 
 
+def extract_header_from_pdf(
+    pdf,
+    header_pages: Optional[List[int]] = None,
+    ocr_pages: Optional[Dict[int, "OcrPage"]] = None,
+    header_y_range: Optional[Tuple[float, float]] = None,
+    keep_pages: Optional[Iterable[int]] = None,
+) -> Dict[str, Optional[str]]:
+    """
+    Lê o texto só das páginas necessárias para o cabeçalho, reaproveitando os
+    objetos `Page` já abertos. Avança página a página (`HeaderScanner`: só
+    as linhas novas são examinadas) e para quando nada adiante pode mudar o
+    resultado, que é o mesmo da leitura do documento inteiro. Páginas
+    presentes em `ocr_pages` (escaneadas) são lidas do OCR. Com
+    `header_y_range`, só o texto dessa faixa Y de cada página entra.
+
+    Com `keep_pages` (as páginas de cursos, que ainda vão ser lidas), as
+    demais são fechadas assim que o texto sai: procurar um campo que não
+    existe não acumula as páginas do arquivo inteiro na memória.
+    """
+    keep = None if keep_pages is None else set(keep_pages)
+    scanner = HeaderScanner()
+    for page_idx, page in enumerate(pdf.pages, start=1):
+        if header_pages and (page_idx not in header_pages):
+            continue
+        pdf_page = page
+        if ocr_pages and page_idx in ocr_pages:
+            page = ocr_pages[page_idx]
+        if header_y_range:
+            page = region_view(page, header_y_range)
+        # mesmo texto de "\n".join(normalize_text(...) por página), já em linhas
+        scanner.feed(normalize_text(page.extract_text() or "").split("\n"))
+        if keep is not None and page_idx not in keep:
+            pdf_page.close()
+        if scanner.done:
+            break
+    return scanner.result()
+
+
 def first_match(patterns: List[re.Pattern], text: str) -> Optional[str]:
     for rx in patterns:
         m = rx.search(text)
         if m:
-            return re.sub(r"\s+", " ", m.group(1)).strip()
+            return _WS_RX.sub(" ", m.group(1)).strip()
     return None
 
 
+# --- padrões do cabeçalho (compilados uma vez) ---
+
+_WS_RX = re.compile(r"\s+")
+_REQUERENTE_RX = re.compile(r"\brequerente\s*:\s*(.+)", re.I)
+_NOME_RX = re.compile(r"\bnome\s*:\s*(.+)", re.I)
+_MATRICULA_RX = re.compile(r"\bmatr[ií]cula\s*:\s*([^\n]+)", re.I)
+_CARGO_RX = re.compile(r"\bcargo\s*:\s*([^\n]+)", re.I)
+_LOTACAO_RX = re.compile(r"\blota[çc][aã]o\s*:\s*([^\n]+)", re.I)  # base (pode vir suja)
+_NOME_MATRICULA_RX = re.compile(r"\n([A-ZÁÉÍÓÚÃÕÇ ]{3,})\s+(\d{3,})\b")
+
+_MATRICULA_PREFIX_RX = re.compile(r"^\s*Matr[ií]cula:\s*", re.I)
+_CARGO_PREFIX_RX = re.compile(r"^\s*Cargo:\s*", re.I)
+_REQUERENTE_PREFIX_RX = re.compile(r"^\s*(Requerente|Matr[ií]cula)\s*:\s*", re.I)
+
+_LOTACAO_LABEL_RX = re.compile(r"\bLota[çc][aã]o\s*:", re.I)
+_LOTACAO_SPLIT_RX = re.compile(r"\bLota[çc][aã]o\s*:\s*", re.I)
+_RAMAL_SPLIT_RX = re.compile(r"\bRamal\b\s*:\s*", re.I)
+_RAMAL_START_RX = re.compile(r"^Ramal\b", re.I)
+_RAMAL_PREFIX_RX = re.compile(r"^\s*(Ramal\s*:\s*)?", re.I)
+_RAMAL_NUMBER_RX = re.compile(r"\bRamal\b\s*:\s*\d+\b", re.I)
+_TRAILING_NUMBER_RX = re.compile(r"[\s\-–—]*\d+\s*$")
+_HAS_LETTER_RX = re.compile(r"[A-Za-zÁÉÍÓÚÃÕÇ]")
+
+# (campo, padrão, trecho minúsculo que precisa existir na linha)
+_HEADER_SCAN = (
+    ("requerente", _REQUERENTE_RX, "requerente"),
+    ("nome", _NOME_RX, "nome"),
+    ("matricula", _MATRICULA_RX, "matr"),
+    ("cargo", _CARGO_RX, "cargo"),
+    ("lotacao", _LOTACAO_RX, "lota"),
+)
+
+
 # --- helpers para Lotação ---
 
 def _sanitize_lotacao(val: Optional[str]) -> Optional[str]:
@@ -54,110 +205,232 @@ def _sanitize_lotacao(val: Optional[str]) -> Optional[str]:
     if not val:
         return val
     # remove "Ramal: 123" em qualquer posição
-    val = re.sub(r"\bRamal\b\s*:\s*\d+\b", "", val, flags=re.I)
+    val = _RAMAL_NUMBER_RX.sub("", val)
     # remove número solto no final: "SECOF 107" / "SECOF - 107"
-    val = re.sub(r"[\s\-–—]*\d+\s*$", "", val)
+    val = _TRAILING_NUMBER_RX.sub("", val)
     # normaliza espaços e traços finais
-    val = re.sub(r"\s+", " ", val).strip(" -–—").strip()
+    val = _WS_RX.sub(" ", val).strip(" -–—").strip()
     return val or None
 
 
+def _lotacao_at(lines: List[str], i: int) -> Tuple[bool, Optional[str]]:
+    """
+    Valor de 'Lotação:' na linha i (mesma linha ou nas próximas 1–2).
+    Devolve (decidido, valor): quando decidido, a busca termina aqui mesmo
+    que o valor saneado seja vazio.
+    """
+    # trecho após 'Lotação:' na MESMA linha
+    after = _LOTACAO_SPLIT_RX.split(lines[i], maxsplit=1)[1].strip()
+    # corta 'Ramal: ...' se vier colado
+    after = _RAMAL_SPLIT_RX.split(after, maxsplit=1)[0].strip(" -–—").strip()
+    if after and not _RAMAL_START_RX.match(after):
+        return True, _sanitize_lotacao(after)
+
+    # senão, tenta nas próximas duas linhas
+    for j in (1, 2):
+        if i + j < len(lines):
+            cand = _RAMAL_PREFIX_RX.sub("", lines[i + j], count=1).strip()
+            if not cand or _RAMAL_START_RX.match(cand):
+                continue
+            # exige pelo menos uma letra para evitar capturar só números
+            if _HAS_LETTER_RX.search(cand):
+                return True, _sanitize_lotacao(cand)
+    return False, None
+
+
 def extract_lotacao_from_lines(all_text: str) -> Optional[str]:
     """
     Varre por linhas para achar 'Lotação:' e capturar o valor mesmo se estiver
     na mesma linha ou nas próximas 1–2 linhas. Remove qualquer 'Ramal: ...'.
     """
-    lines = [re.sub(r"\s+", " ", l).strip() for l in all_text.splitlines()]
+    lines = [_WS_RX.sub(" ", l).strip() for l in all_text.splitlines()]
     for i, line in enumerate(lines):
-        if re.search(r"\bLota[çc][aã]o\s*:", line, re.I):
-            # trecho após 'Lotação:' na MESMA linha
-            after = re.split(r"\bLota[çc][aã]o\s*:\s*", line, maxsplit=1, flags=re.I)[1].strip()
-            # corta 'Ramal: ...' se vier colado
-            after = re.split(r"\bRamal\b\s*:\s*", after, maxsplit=1, flags=re.I)[0].strip(" -–—").strip()
-            if after and not re.match(r"^Ramal\b", after, re.I):
-                return _sanitize_lotacao(after)
-
-            # senão, tenta nas próximas duas linhas
-            for j in (1, 2):
-                if i + j < len(lines):
-                    cand = re.sub(r"^\s*(Ramal\s*:\s*)?", "", lines[i + j], flags=re.I).strip()
-                    if not cand or re.match(r"^Ramal\b", cand, re.I):
-                        continue
-                    # exige pelo menos uma letra para evitar capturar só números
-                    if re.search(r"[A-Za-zÁÉÍÓÚÃÕÇ]", cand):
-                        return _sanitize_lotacao(cand)
+        if _LOTACAO_LABEL_RX.search(line):
+            decided, value = _lotacao_at(lines, i)
+            if decided:
+                return value
     return None
 
 
+def _match_from_line(rx: re.Pattern, lines: List[str], i: int) -> Optional[re.Match]:
+    r"""
+    Primeira ocorrência de `rx` que COMEÇA na linha i, como numa busca sobre o
+    texto inteiro. Como `\s*` pode atravessar quebras ('Cargo:' no fim da
+    linha), a janela inclui as duas linhas não vazias seguintes, o máximo que
+    os padrões do cabeçalho conseguem alcançar.
+    """
+    window = [lines[i]]
+    for nxt in lines[i + 1:]:
+        if nxt:
+            window.append(nxt)
+            if len(window) == 3:
+                break
+    m = rx.search("\n".join(window))
+    return m if (m and m.start() < len(lines[i])) else None
 
-def extract_header(all_text: str) -> Dict[str, Optional[str]]:
-    patterns = {
-        "requerente": [
-            re.compile(r"\brequerente\s*:\s*(.+)", re.I),
-            re.compile(r"\bnome\s*:\s*(.+)", re.I),
-        ],
-        "matricula": [re.compile(r"\bmatr[ií]cula\s*:\s*([^\n]+)", re.I)],
-        "cargo":     [re.compile(r"\bcargo\s*:\s*([^\n]+)", re.I)],
-        "lotacao":   [re.compile(r"\blota[çc][aã]o\s*:\s*([^\n]+)", re.I)],  # base (pode vir suja)
-    }
-    out = {k: first_match(v, all_text) for k, v in patterns.items()}
 
-    # Fallback nome + matrícula (MAIÚSCULAS + números)
-    if not out["requerente"] or not out["matricula"]:
-        m = re.search(r"\n([A-ZÁÉÍÓÚÃÕÇ ]{3,})\s+(\d{3,})\b", "\n" + all_text)
-        if m:
-            out["requerente"] = out["requerente"] or m.group(1).strip()
-            out["matricula"]  = out["matricula"]  or m.group(2).strip()
+class HeaderScanner:
+    """
+    Varredura do cabeçalho aos pedaços: as linhas normalizadas (ver
+    `normalize_text`) chegam página a página por `feed` e cada uma é
+    examinada uma vez só, quando as linhas seguintes que os padrões
+    alcançam já chegaram (uma quebra de página não corta nada). `done` diz
+    que todos os campos definitivos apareceram e que nada mais adiante muda
+    o resultado; `result` fecha a varredura. Mesmo resultado das buscas por
+    regex sobre o texto inteiro.
+    """
+
+    def __init__(self):
+        self.lines: List[str] = []
+        self.found: Dict[str, str] = {}
+        self.lot_decided = False
+        self.lot_by_lines: Optional[str] = None
+        self.done = False
+        self._next = 0  # próxima linha a examinar
 
-    # Limpezas básicas
-    if out.get("matricula"):
-        out["matricula"] = re.sub(r"^\s*Matr[ií]cula:\s*", "", out["matricula"], flags=re.I).strip()
-    if out.get("cargo"):
-        out["cargo"] = re.sub(r"^\s*Cargo:\s*", "", out["cargo"], flags=re.I).strip()
-    if out.get("requerente"):
-        out["requerente"] = re.sub(r"^\s*(Requerente|Matr[ií]cula)\s*:\s*", "", out["requerente"], flags=re.I).strip()
+    def feed(self, lines: List[str]) -> None:
+        self.lines.extend(lines)
+        if self.done:
+            return
+        # `_match_from_line` lê as duas linhas não vazias seguintes; `_lotacao_at`, i+1 e i+2
+        n = len(self.lines)
+        ready, nonempty = n - 2, 0
+        for j in range(n - 1, -1, -1):
+            if self.lines[j]:
+                nonempty += 1
+                if nonempty == 2:
+                    ready = min(ready, j)
+                    break
+        else:
+            ready = 0
+        self._scan(ready)
 
-    # -------- Lotação robusta --------
-    lot_by_lines = extract_lotacao_from_lines(all_text)  # leitura por linhas (mais confiável)
+    def _scan(self, end: int) -> None:
+        lines, found = self.lines, self.found
+        for i in range(self._next, end):
+            self._next = i + 1
+            line = lines[i]
+            if not line:
+                continue
+            low = line.lower()
+            for field, rx, hint in _HEADER_SCAN:
+                if field in found or hint not in low:
+                    continue
+                m = _match_from_line(rx, lines, i)
+                if m:
+                    found[field] = _WS_RX.sub(" ", m.group(1)).strip()
+            if not self.lot_decided and "lota" in low and _LOTACAO_LABEL_RX.search(line):
+                self.lot_decided, self.lot_by_lines = _lotacao_at(lines, i)
+            # 'requerente:' tem prioridade sobre 'nome:'; lotação por linhas sobre a crua
+            if self.lot_by_lines and all(k in found for k in ("requerente", "matricula", "cargo")):
+                self.done = True
+                break
 
-    # saneia a captura "crua" (uma linha) se existir
-    lot_raw = out.get("lotacao") or ""
-    lot_raw = re.split(r"\bRamal\b\s*:\s*", lot_raw, maxsplit=1, flags=re.I)[0].strip(" -–—").strip()
-    if re.match(r"^Ramal\b", lot_raw, re.I):
-        lot_raw = ""
+    def result(self) -> Dict[str, Optional[str]]:
+        if not self.done:
+            self._scan(len(self.lines))
+        found, lines = self.found, self.lines
+        out: Dict[str, Optional[str]] = {
+            "requerente": found.get("requerente", found.get("nome")),
+            "matricula": found.get("matricula"),
+            "cargo": found.get("cargo"),
+            "lotacao": found.get("lotacao"),
+        }
 
-    out["lotacao"] = lot_by_lines or _sanitize_lotacao(lot_raw)
+        # Fallback nome + matrícula (MAIÚSCULAS + números)
+        if not out["requerente"] or not out["matricula"]:
+            m = _NOME_MATRICULA_RX.search("\n" + "\n".join(lines))
+            if m:
+                out["requerente"] = out["requerente"] or m.group(1).strip()
+                out["matricula"]  = out["matricula"]  or m.group(2).strip()
+
+        # Limpezas básicas
+        if out.get("matricula"):
+            out["matricula"] = _MATRICULA_PREFIX_RX.sub("", out["matricula"], count=1).strip()
+        if out.get("cargo"):
+            out["cargo"] = _CARGO_PREFIX_RX.sub("", out["cargo"], count=1).strip()
+        if out.get("requerente"):
+            out["requerente"] = _REQUERENTE_PREFIX_RX.sub("", out["requerente"], count=1).strip()
+
+        # -------- Lotação robusta --------
+        # saneia a captura "crua" (uma linha) se existir
+        lot_raw = out.get("lotacao") or ""
+        lot_raw = _RAMAL_SPLIT_RX.split(lot_raw, maxsplit=1)[0].strip(" -–—").strip()
+        if _RAMAL_START_RX.match(lot_raw):
+            lot_raw = ""
+
+        out["lotacao"] = self.lot_by_lines or _sanitize_lotacao(lot_raw)
+
+        return out
+
+
+def scan_header_lines(lines: List[str]) -> Dict[str, Optional[str]]:
+    """
+    Extrai requerente, matrícula, cargo e lotação numa única passada pelas
+    linhas normalizadas (ver `normalize_text`), parando assim que todos os
+    campos definitivos aparecem. Resultado idêntico ao das buscas por regex
+    sobre o texto inteiro.
+    """
+    scanner = HeaderScanner()
+    scanner.feed(lines)
+    return scanner.result()
 
-    return out
 
+def extract_header(all_text: str) -> Dict[str, Optional[str]]:
+    """Cabeçalho a partir do texto do documento (normalizado linha a linha)."""
+    return scan_header_lines([_WS_RX.sub(" ", l).strip() for l in all_text.splitlines()])
+
+
+_HOURS_INLINE = re.compile(HOURS_INLINE_RX)
+_HOURS_WORD = re.compile(HOURS_WORD_RX, re.I)
 
 
 def hours_in_line(line: str) -> Optional[int]:
-    m = re.search(HOURS_INLINE_RX, line)
+    m = _HOURS_INLINE.search(line)
     if m:
         return int(m.group(1))
-    m = re.search(HOURS_WORD_RX, line, re.I)
+    m = _HOURS_WORD.search(line)
     if m:
         return int(m.group(1))
     return None
 
 
-def collect_lines_with_y(page) -> List[Tuple[str, float]]:
+LINE_GAP_FRACTION = 0.5  # nova linha quando o topo salta mais que essa fração da altura típica
+
+
+def collect_lines_with_y(page, gap_fraction: float = LINE_GAP_FRACTION) -> List[Tuple[str, float]]:
+    """
+    Linhas da página como (texto, y do meio), de cima para baixo. As
+    palavras são ordenadas uma vez pelo topo e a linha só quebra onde o
+    salto passa de `gap_fraction` da altura mediana das palavras: um desvio
+    pequeno de baseline (ex.: 300,4 / 300,6) não parte um título em dois.
+    """
     words = page.extract_words(use_text_flow=True, keep_blank_chars=False)
     if not words:
         return []
-    rows: Dict[int, List[dict]] = {}
-    for w in words:
-        key = int(round(w["top"]))
-        rows.setdefault(key, []).append(w)
+    import numpy as np
+
+    n = len(words)
+    tops = np.fromiter((w["top"] for w in words), float, n)
+    bottoms = np.fromiter((w["bottom"] for w in words), float, n)
+    x0s = np.fromiter((w["x0"] for w in words), float, n)
+
+    by_top = np.argsort(tops, kind="stable")
+    gap = gap_fraction * float(np.median(bottoms - tops)) or 1.0
+    labels = np.empty(n, dtype=np.intp)
+    labels[by_top] = np.concatenate(([0], np.cumsum(np.diff(tops[by_top]) > gap)))
+
+    order = np.lexsort((x0s, labels))  # linha, depois da esquerda para a direita
+    starts = np.flatnonzero(np.concatenate(([True], np.diff(labels[order]) != 0)))
+    bounds = np.append(starts, n)
+    y_mid = np.add.reduceat(((tops + bottoms) / 2)[order], starts) / np.diff(bounds)
+
+    texts = [words[i]["text"] for i in order.tolist()]
     lines: List[Tuple[str, float]] = []
-    for key in sorted(rows.keys()):
-        ws = sorted(rows[key], key=lambda x: x["x0"])
-        text = " ".join(w["text"] for w in ws).strip()
-        if not text:
-            continue
-        y_mid = sum(w["top"] + (w["bottom"] - w["top"]) / 2 for w in ws) / len(ws)
-        lines.append((text, y_mid))
+    for k, (a, b) in enumerate(zip(bounds[:-1].tolist(), bounds[1:].tolist())):
+        text = " ".join(texts[a:b]).strip()
+        if text:
+            lines.append((text, float(y_mid[k])))
     return lines
 
 
@@ -168,7 +441,7 @@ def find_course_rows_with_y(
     lines = [(t, y) for (t, y) in collect_lines_with_y(page) if y_min <= y <= y_max]
     raw = []
     for text, y in lines:
-        m = re.search(HOURS_INLINE_RX, text) or re.search(HOURS_WORD_RX, text, re.I)
+        m = _HOURS_INLINE.search(text) or _HOURS_WORD.search(text)
         if not m:
             continue
         if text.startswith(EXCLUDE_PREFIXES):
@@ -181,7 +454,7 @@ def find_course_rows_with_y(
     # dedup
     seen, out = set(), []
     for title, hrs, y in raw:
-        key = (int(round(y)), re.sub(r"\s+", " ", title.lower()), hrs)
+        key = (int(round(y)), _WS_RX.sub(" ", title.lower()), hrs)
         if key in seen:
             continue
         seen.add(key)
@@ -189,29 +462,87 @@ def find_course_rows_with_y(
     return out
 
 
-def detect_checkbox_modality_by_coords(
-    page, y_mid: float, x_cols: Dict[str, Tuple[float, float]], y_tol: int
-) -> Optional[str]:
-    y0, y1 = y_mid - y_tol, y_mid + y_tol
-    marked = {label: False for label in x_cols.keys()}
+# --- recortes das regiões de interesse ---
+
+CROP_LINE_PAD = 20.0  # folga (pt) na faixa Y para não perder letras de linhas na borda
+
+
+def _region_test(y0: float, y1: float, x_ranges: Optional[List[Tuple[float, float]]] = None):
+    """
+    Objeto que encosta na faixa Y (e, se dado, em alguma das faixas X).
+    Traços (`lines`) são testados por y0/y1, o referencial em que
+    `build_checkbox_index` os posiciona.
+    """
+    def keep(obj) -> bool:
+        if obj.get("object_type") == "line":
+            top, bottom = obj["y0"], obj["y1"]
+        else:
+            top, bottom = obj["top"], obj["bottom"]
+        if bottom < y0 or top > y1:
+            return False
+        if x_ranges is None:
+            return True
+        for a, b in x_ranges:
+            if obj["x1"] >= a and obj["x0"] <= b:
+                return True
+        return False
+
+    return keep
+
+
+def region_view(page, y_range: Tuple[float, float], x_ranges: Optional[List[Tuple[float, float]]] = None):
+    """
+    Visão da página só com os objetos que encostam na região (`page.filter`:
+    nada é recortado ao meio, então palavras e caixas continuam iguais). O
+    agrupamento de palavras e as varreduras de objetos passam a ser
+    proporcionais à região, não à página.
+    """
+    return page.filter(_region_test(y_range[0], y_range[1], x_ranges))
+
+
+def course_band_view(page, course_y_range: Tuple[float, float], y_tolerance: int):
+    """Faixa Y dos cursos com folga para a tolerância e para a altura das letras."""
+    pad = y_tolerance + CROP_LINE_PAD
+    return region_view(page, (course_y_range[0] - pad, course_y_range[1] + pad))
+
+
+def checkbox_view(
+    band, course_y_range: Tuple[float, float], checkbox_columns: Dict[str, Tuple[float, float]], y_tolerance: int
+):
+    """Só as colunas X dos checkboxes, dentro do alcance (`y_tolerance`) das linhas de curso."""
+    return region_view(
+        band, (course_y_range[0] - y_tolerance, course_y_range[1] + y_tolerance), list(checkbox_columns.values())
+    )
+
+
+# --- índice espacial dos checkboxes ---
+
+MODALITY_PRIORITY = ("presencial", "misto", "à distância")
+
+CheckboxIndex = Dict[str, Tuple[List[float], List[float]]]
+
+
+def build_checkbox_index(page, x_cols: Dict[str, Tuple[float, float]]) -> CheckboxIndex:
+    """
+    Varre chars, lines e rects da página UMA vez e guarda, por coluna de
+    checkbox, os intervalos Y dos objetos que caem nela: inícios ordenados +
+    máximo acumulado dos fins. Uma consulta vira um bisect.
+    """
+    spans: Dict[str, List[Tuple[float, float]]] = {label: [] for label in x_cols}
 
     for ch in page.chars:
         cy0, cy1 = ch.get("top", 0), ch.get("bottom", 0)
         cx0, cx1 = ch.get("x0", 0), ch.get("x1", 0)
-        if cy1 < y0 or cy0 > y1:
-            continue
         for label, (x0c, x1c) in x_cols.items():
             if cx0 >= x0c and cx1 <= x1c:
-                marked[label] = True
+                spans[label].append((cy0, cy1))
 
     for ln in getattr(page, "lines", []):
         cx = (ln.get("x0", 0) + ln.get("x1", 0)) / 2
         cy = (ln.get("y0", 0) + ln.get("y1", 0)) / 2
-        if cy < y0 or cy > y1:
-            continue
         for label, (x0c, x1c) in x_cols.items():
             if x0c <= cx <= x1c:
-                marked[label] = True
+                spans[label].append((cy, cy))
 
     for r in page.rects:
         rx0, ry0, rx1, ry1 = (
@@ -220,61 +551,197 @@ def detect_checkbox_modality_by_coords(
             r.get("x1", 0),
             r.get("bottom", 0),
         )
-        if ry1 < y0 or ry0 > y1:
-            continue
         if (rx1 - rx0) < 20 and (ry1 - ry0) < 20:
             for label, (x0c, x1c) in x_cols.items():
                 if not (rx1 < x0c or rx0 > x1c):
-                    marked[label] = True
+                    spans[label].append((ry0, ry1))
 
-    for label in ["presencial", "misto", "à distância"]:
-        if marked[label]:
-            return label
-    return None
+    index: CheckboxIndex = {}
+    for label, items in spans.items():
+        items.sort()
+        starts = [y0 for y0, _ in items]
+        max_ends: List[float] = []
+        cur = float("-inf")
+        for _, y1 in items:
+            cur = max(cur, y1)
+            max_ends.append(cur)
+        index[label] = (starts, max_ends)
+    return index
+
+
+def _column_marked(entry: Tuple[List[float], List[float]], y0: float, y1: float) -> bool:
+    starts, max_ends = entry
+    k = bisect_right(starts, y1)  # objetos que começam até y1...
+    return k > 0 and max_ends[k - 1] >= y0  # ...e algum termina depois de y0
+
+
+def detect_checkbox_modalities(
+    index: CheckboxIndex, y_mids: List[float], y_tol: int
+) -> List[Optional[str]]:
+    """Classifica todas as linhas de curso de uma página contra o índice."""
+    out: List[Optional[str]] = []
+    for y_mid in y_mids:
+        y0, y1 = y_mid - y_tol, y_mid + y_tol
+        found = None
+        for label in MODALITY_PRIORITY:
+            entry = index.get(label)
+            if entry and _column_marked(entry, y0, y1):
+                found = label
+                break
+        out.append(found)
+    return out
+
+
+def detect_checkbox_modality_by_coords(
+    page, y_mid: float, x_cols: Dict[str, Tuple[float, float]], y_tol: int
+) -> Optional[str]:
+    return detect_checkbox_modalities(build_checkbox_index(page, x_cols), [y_mid], y_tol)[0]
 
 
 def process_pdf(
-    pdf_path: Path,
+    pdf_path: Union[Path, PdfSource],
     course_pages: List[int],
     course_y_range: Tuple[float, float],
     checkbox_columns: Dict[str, Tuple[float, float]],
     y_tolerance: int,
     export_annotations: bool = False,
     annotations_dir: Optional[Path] = None,
-) -> List[Dict[str, Optional[str]]]:
+    header_pages: Optional[List[int]] = None,
+    ocr: bool = False,
+    ocr_cache_path: Optional[Path] = None,
+    header_y_range: Optional[Tuple[float, float]] = None,
+    trace_memory: bool = False,
+    auto_layout: bool = False,
+    layout_cache_path: Optional[Path] = None,
+    timings: Optional[Dict[str, float]] = None,
+    annotation_pages: Optional[List[Dict]] = None,
+) -> FileRows:
+    """
+    Extrai as linhas de curso de um PDF (`FileRows`: cabeçalho uma vez só,
+    cursos em colunas; itera como a lista de dicts de sempre). Se `timings`
+    for passado, recebe o tempo (s) de cada etapa (ver
+    `extract_metrics.FILE_STAGES`) e o total.
 
-    rows: List[Dict[str, Optional[str]]] = []
-    pages_text = extract_text_pages(pdf_path)
-    header = extract_header("\n".join(pages_text))
+    `pdf_path` pode ser um `extract_sources.PdfSource` (ex.: membro de um
+    ZIP/TAR, lido em memória); a coluna "arquivo" recebe o `arquivo` dele.
 
-    with pdfplumber.open(pdf_path) as pdf:
+    Com `export_annotations`, cada página vira um pedido de PNG
+    ({"page", "ys", "reasons"}) anexado a `annotation_pages`, para ser
+    desenhado depois por um `AnnotationRenderer`; sem essa lista, o PNG é
+    desenhado na hora em `annotations_dir` (comportamento antigo).
+
+    Com `ocr`, páginas sem camada de texto passam pelo Tesseract (ver
+    `_ocr_scanned_pages`) e seguem pelo mesmo caminho das demais.
+
+    As etapas de cursos e checkboxes trabalham sobre visões filtradas da
+    página (`course_band_view`, `checkbox_view`); o cabeçalho também, se
+    `header_y_range` for dado.
+
+    Cada página tem os caches do pdfplumber (chars, layout...) liberados
+    assim que termina, então a memória fica limitada a uma página por vez.
+    Com `trace_memory`, o pico alocado pelo Python (tracemalloc) no arquivo
+    vai para `timings["peak_mem_mb"]`.
+
+    Com `auto_layout`, a faixa Y e as colunas dos checkboxes de cada página
+    vêm dos títulos "Presencial / Misto / À distância" (ver
+    `extract_layout`), calibradas uma vez por modelo de formulário; páginas
+    sem esses títulos (e as de OCR) ficam com os valores passados. Com
+    `layout_cache_path`, as calibrações ficam gravadas nesse SQLite.
+    """
+    if trace_memory:
+        import tracemalloc
+
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        try:
+            return process_pdf(
+                pdf_path, course_pages, course_y_range, checkbox_columns, y_tolerance,
+                export_annotations, annotations_dir, header_pages, ocr, ocr_cache_path, header_y_range,
+                False, auto_layout, layout_cache_path, timings, annotation_pages,
+            )
+        finally:
+            if timings is not None:
+                timings["peak_mem_mb"] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            if started:
+                tracemalloc.stop()
+
+    import pdfplumber
+
+    t_start = time.perf_counter()
+    source = as_source(pdf_path)
+    if auto_layout:
+        LAYOUTS.attach(layout_cache_path)
+
+    # uma única abertura: cabeçalho e cursos compartilham os mesmos objetos
+    # Page (chars/layout do pdfminer são calculados uma vez por página)
+    with stage_timer(timings, "open"):
+        stream = source.open()
+        pdf = pdfplumber.open(stream)
+    with pdf:
+        if course_pages:
+            selected = [(i, pdf.pages[i - 1]) for i in sorted(set(course_pages)) if 1 <= i <= len(pdf.pages)]
+        else:
+            selected = list(enumerate(pdf.pages, start=1))
+
+        ocr_pages: Dict[int, OcrPage] = {}
+        if ocr:
+            with stage_timer(timings, "ocr"):
+                if isinstance(stream, Path):
+                    ocr_input = stream
+                else:  # mesmo conteúdo já em memória: não relê o arquivo
+                    ocr_input = source.read_bytes() if source.data is not None else stream.getvalue()
+                ocr_pages = _ocr_scanned_pages(
+                    ocr_input, pdf, selected, header_pages, course_y_range, checkbox_columns, y_tolerance,
+                    ocr_cache_path, header_y_range,
+                )
+
+        with stage_timer(timings, "header"):
+            header = extract_header_from_pdf(
+                pdf, header_pages, ocr_pages, header_y_range, keep_pages=[i for i, _ in selected],
+            )
+        # REQUERENTE (nome + matrícula)
+        nome = (header.get("requerente") or "").strip()
+        matr = (header.get("matricula") or "").strip()
+        if nome and matr:
+            requerente_display = f"{nome} {matr}"
+        elif nome:
+            requerente_display = nome
+        else:
+            requerente_display = matr  # fallback
+        rows = FileRows(
+            source.name, requerente_display, header.get("matricula"), header.get("cargo"), header.get("lotacao"),
+        )
+        course_idx = {i for i, _ in selected}
         for page_idx, page in enumerate(pdf.pages, start=1):
-            if course_pages and (page_idx not in course_pages):
-                continue
+            if page_idx not in course_idx:
+                page.close()  # lida só para o cabeçalho: libera já
+                ocr_pages.pop(page_idx, None)
 
-            course_rows = find_course_rows_with_y(page, course_y_range)
+        for page_idx, pdf_page in selected:
+            page = ocr_pages.pop(page_idx, pdf_page)
+            y_range, columns, layout = course_y_range, checkbox_columns, None
+            if auto_layout and page is pdf_page:
+                with stage_timer(timings, "layout"):
+                    _, layout = LAYOUTS.lookup(page, course_y_range[1] - course_y_range[0])
+                if layout:
+                    y_range, columns = layout
 
-            if export_annotations and annotations_dir:
-                try:
-                    annotations_dir.mkdir(exist_ok=True)
-                    img = page.to_image(resolution=160)
-                    img.draw_rect(
-                        (0, course_y_range[0], page.width, course_y_range[1]),
-                        stroke="blue",
-                        fill=None,
-                    )
-                    for x0, x1 in checkbox_columns.values():
-                        img.draw_rect((x0, 0, x1, page.height), stroke="red", fill=None)
-                    for _, _, y in course_rows:
-                        img.draw_line((0, y, page.width, y), stroke="green")
-                    img.save(str(annotations_dir / f"{pdf_path.stem}_p{page_idx}.png"))
-                except Exception:
-                    pass
-
-            for title, hours, y in course_rows:
-                modality = detect_checkbox_modality_by_coords(
-                    page, y, checkbox_columns, y_tolerance
+            with stage_timer(timings, "course_rows"):
+                band = course_band_view(page, y_range, y_tolerance)
+                course_rows = find_course_rows_with_y(band, y_range)
+
+            with stage_timer(timings, "checkbox"):
+                modalities = detect_checkbox_modalities(
+                    build_checkbox_index(checkbox_view(band, y_range, columns, y_tolerance),
+                                         columns) if course_rows else {},
+                    [y for _, _, y in course_rows],
+                    y_tolerance,
                 )
+
+            final_modalities: List[Optional[str]] = []
+            for (title, hours, y), modality in zip(course_rows, modalities):
                 if modality is None:
                     if MODALITY_HINTS["presencial"].search(title):
                         modality = "presencial"
@@ -282,33 +749,510 @@ def process_pdf(
                         modality = "misto"
                     elif MODALITY_HINTS["à distância"].search(title):
                         modality = "à distância"
+                final_modalities.append(modality)
+                rows.add(page_idx, title, hours, modality)
 
-                # REQUERENTE (nome + matrícula)
-                nome = (header.get("requerente") or "").strip()
-                matr = (header.get("matricula") or "").strip()
-                if nome and matr:
-                    requerente_display = f"{nome} {matr}"
-                elif nome:
-                    requerente_display = nome
-                else:
-                    requerente_display = matr  # fallback
-
-                rows.append(
-                    {
-                        "arquivo": pdf_path.name,
-                        "pagina": page_idx,
-                        "requerente": requerente_display,
-                        "matricula": header.get("matricula"),
-                        "cargo": header.get("cargo"),
-                        "lotacao": header.get("lotacao"),
-                        "curso_titulo": title,
-                        "curso_horas": hours,
-                        "modalidade": modality,
-                    }
-                )
+            if export_annotations and annotations_dir:
+                with stage_timer(timings, "annotations"):
+                    ys = [y for _, _, y in course_rows]
+                    if annotation_pages is not None:
+                        request = {
+                            "page": page_idx,
+                            "ys": ys,
+                            "reasons": page_reasons([h for _, h, _ in course_rows], final_modalities),
+                        }
+                        if layout:  # o PNG mostra a geometria calibrada
+                            request["course_y_range"], request["checkbox_columns"] = layout
+                        annotation_pages.append(request)
+                    else:
+                        try:
+                            annotations_dir.mkdir(exist_ok=True)
+                            draw_page(
+                                pdf_page, annotations_dir / f"{source.stem}_p{page_idx}.png",
+                                y_range, columns, ys,
+                            )
+                        except Exception:
+                            pass
+
+            # página pronta: solta chars/layout/objetos guardados pelo pdfplumber
+            del page, band
+            pdf_page.close()
+    if timings is not None:
+        timings["total"] = time.perf_counter() - t_start
     return rows
 
 
+def _ocr_scanned_pages(
+    pdf_path: Union[Path, bytes],
+    pdf,
+    selected: List[Tuple[int, object]],
+    header_pages: Optional[List[int]],
+    course_y_range: Tuple[float, float],
+    checkbox_columns: Dict[str, Tuple[float, float]],
+    y_tolerance: int,
+    ocr_cache_path: Optional[Path],
+    header_y_range: Optional[Tuple[float, float]] = None,
+) -> Dict[int, OcrPage]:
+    """
+    OCR das páginas sem camada de texto (nenhum char). Só duas faixas são
+    rasterizadas: o cabeçalho (`header_y_range`, ou do topo até a faixa Y) nas páginas de
+    cabeçalho (`header_pages`, ou a 1ª) e a faixa Y dos cursos (mais
+    `y_tolerance`) nas páginas de cursos; nas colunas dos checkboxes, a
+    tinta vira `rects`. Sem Tesseract, devolve {} e as páginas ficam como
+    antes (sem linhas).
+    """
+    y0, y1 = course_y_range
+    regions: Dict[int, List[Tuple[float, float]]] = {}
+    for page_idx in sorted(set(header_pages or [1])):
+        if 1 <= page_idx <= len(pdf.pages):
+            regions.setdefault(page_idx, []).append(header_y_range or (0.0, y0 - y_tolerance))
+    for page_idx, _ in selected:
+        regions.setdefault(page_idx, []).append((y0 - y_tolerance, y1 + y_tolerance))
+    regions = {i: bands for i, bands in regions.items() if not pdf.pages[i - 1].chars}
+    if not regions or not ocr_available():
+        return {}
+
+    sizes = {i: (float(pdf.pages[i - 1].width), float(pdf.pages[i - 1].height)) for i in regions}
+    cache = OcrCache(ocr_cache_path) if ocr_cache_path else None
+    try:
+        return ocr_regions(pdf_path, regions, sizes, cache, checkbox_columns)
+    finally:
+        if cache:
+            cache.close()
+
+
+def params_fingerprint(
+    course_pages: List[int],
+    course_y_range: Tuple[float, float],
+    checkbox_columns: Dict[str, Tuple[float, float]],
+    y_tolerance: int,
+    header_pages: Optional[List[int]] = None,
+    ocr: bool = False,
+    header_y_range: Optional[Tuple[float, float]] = None,
+    auto_layout: bool = False,
+) -> str:
+    """Resumo estável dos parâmetros que influenciam as linhas extraídas."""
+    payload = {
+        "course_pages": sorted(set(course_pages or [])),
+        "course_y_range": [float(v) for v in course_y_range],
+        "checkbox_columns": {k: [float(v) for v in rng] for k, rng in sorted(checkbox_columns.items())},
+        "y_tolerance": y_tolerance,
+        "header_pages": sorted(set(header_pages or [])),
+    }
+    if ocr:  # sem OCR o resumo fica igual ao de antes (caches antigos continuam valendo)
+        payload["ocr"] = True
+    if header_y_range:
+        payload["header_y_range"] = [float(v) for v in header_y_range]
+    if auto_layout:
+        payload["auto_layout"] = True
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+# --- execução paralela ---
+
+DEFAULT_FILE_TIMEOUT = 300.0  # segundos por PDF (apenas no modo paralelo)
+
+
+def _error_row(arquivo: str, msg: str) -> FileRows:
+    return FileRows.error(arquivo, msg)
+
+
+def _limit_memory(max_memory_mb: Optional[int]) -> None:
+    """Aplica teto de memória virtual ao processo atual (só POSIX)."""
+    if not max_memory_mb or resource is None:
+        return
+    limit = int(max_memory_mb) * 1024 * 1024
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ValueError, OSError):
+        pass
+
+
+def _worker_main(conn, max_memory_mb: Optional[int]) -> None:
+    """Laço do processo trabalhador: recebe (idx, args) e devolve (idx, linhas, erro, tempos, PNGs)."""
+    # Ctrl+C vai para o grupo todo: o trabalhador termina o arquivo atual e
+    # quem para o lote é o pai, pelo evento de cancelamento
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _limit_memory(max_memory_mb)
+    import numpy  # noqa: F401
+    import pdfplumber  # noqa: F401  (importa já: o processo fica "quente" esperando trabalho)
+
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        idx, args = task
+        timings: Dict[str, float] = {}
+        pages: List[Dict] = []
+        t0 = time.perf_counter()
+        try:
+            rows, err = process_pdf(*args, timings=timings, annotation_pages=pages), None
+        except MemoryError:
+            rows, err = None, f"limite de memória excedido ({max_memory_mb} MB)"
+        except Exception as e:
+            rows, err = None, str(e)
+        timings.setdefault("total", time.perf_counter() - t0)
+        conn.send((idx, rows, err, timings, pages))
+    conn.close()
+
+
+class _Worker:
+    def __init__(self, ctx, max_memory_mb: Optional[int]):
+        self.conn, child_conn = ctx.Pipe()
+        self.proc = ctx.Process(target=_worker_main, args=(child_conn, max_memory_mb), daemon=True)
+        self.proc.start()
+        child_conn.close()
+        self.task: Optional[int] = None
+        self.started = 0.0
+        self.deadline: Optional[float] = None
+
+    def submit(self, idx: int, args: tuple, timeout: Optional[float]) -> None:
+        self.task = idx
+        self.started = time.monotonic()
+        self.deadline = (self.started + timeout) if timeout else None
+        self.conn.send((idx, args))
+
+    def kill(self) -> None:
+        try:
+            self.proc.kill()
+            self.proc.join(5)
+        finally:
+            self.conn.close()
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        self.proc.join(5)
+        if self.proc.is_alive():
+            self.proc.kill()
+        self.conn.close()
+
+
+class WorkerPool:
+    """
+    Processos trabalhadores persistentes. `run_batch` cria um por lote; quem
+    processa vários lotes seguidos (ex.: `extract_watch`) mantém o mesmo pool
+    e os processos continuam aquecidos entre um lote e outro.
+    """
+
+    def __init__(self, workers: int, max_memory_mb: Optional[int] = None):
+        self.ctx = mp.get_context("spawn")  # seguro com a GUI em thread e igual no Windows
+        self.max_memory_mb = max_memory_mb
+        self.workers = [_Worker(self.ctx, max_memory_mb) for _ in range(max(1, workers))]
+
+    def replace(self, pos: int) -> None:
+        """Mata o trabalhador `pos` (travado ou morto) e põe um novo no lugar."""
+        self.workers[pos].kill()
+        self.workers[pos] = _Worker(self.ctx, self.max_memory_mb)
+
+    def close(self) -> None:
+        for w in self.workers:
+            w.stop()
+
+
+def _iter_parallel(
+    pdfs: List[PdfSource],
+    args_for,
+    workers: int,
+    file_timeout: Optional[float],
+    max_memory_mb: Optional[int],
+    cancel=None,
+    worker_pool: Optional[WorkerPool] = None,
+) -> Iterator[tuple]:
+    """
+    Distribui os PDFs entre processos trabalhadores persistentes. Gera
+    ("start", índice) ao despachar e ("done", índice, linhas, tempos, PNGs)
+    conforme cada um termina; ("cached", índice) se `args_for` devolver None
+    (resultado já no cache). Um PDF que estoura o tempo ou derruba o processo vira
+    linha `_erro`; o trabalhador é substituído e o lote segue. Com `cancel`
+    acionado, nada novo é despachado e os que estão em andamento terminam.
+    Com `worker_pool`, usa (e não encerra) os processos dele.
+    """
+    if not pdfs:
+        return
+    pending = list(range(len(pdfs)))
+    pending.reverse()
+    owner = worker_pool is None
+    if owner:
+        worker_pool = WorkerPool(min(workers, len(pdfs)), max_memory_mb)
+    pool = worker_pool.workers
+    try:
+        while pending or any(w.task is not None for w in pool):
+            if cancel is not None and cancel.is_set():
+                pending.clear()
+            for w in pool:
+                while w.task is None and pending:
+                    idx = pending.pop()
+                    args = args_for(pdfs[idx])
+                    if args is None:
+                        yield "cached", idx
+                        continue
+                    w.submit(idx, args, file_timeout)
+                    yield "start", idx
+            if not any(w.task is not None for w in pool):
+                break
+
+            busy = [w for w in pool if w.task is not None]
+            deadlines = [w.deadline for w in busy if w.deadline is not None]
+            wait_for = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+            ready = mp_connection.wait([w.conn for w in busy] + [w.proc.sentinel for w in busy], wait_for)
+
+            for pos, w in enumerate(pool):
+                if w.task is None:
+                    continue
+                idx = w.task
+                if w.conn in ready:
+                    try:
+                        _, rows, err, timings, pages = w.conn.recv()
+                    except (EOFError, OSError):
+                        rows, err = None, f"processo encerrado inesperadamente (código {w.proc.exitcode})"
+                    else:
+                        w.task = w.deadline = None
+                        rows = rows if err is None else _error_row(pdfs[idx].name, err)
+                        yield "done", idx, rows, timings, pages
+                        continue
+                elif w.proc.sentinel in ready:
+                    w.proc.join(1)
+                    err = f"processo encerrado inesperadamente (código {w.proc.exitcode})"
+                elif w.deadline is not None and time.monotonic() >= w.deadline:
+                    err = f"tempo limite excedido ({file_timeout:g} s)"
+                else:
+                    continue
+                elapsed = time.monotonic() - w.started
+                worker_pool.replace(pos)
+                yield "done", idx, _error_row(pdfs[idx].name, err), {"total": elapsed}, []
+    finally:
+        if owner:
+            worker_pool.close()
+        else:  # lote abandonado no meio (ex.: cancelado): descarta o que ainda está em andamento
+            for pos, w in enumerate(pool):
+                if w.task is not None:
+                    worker_pool.replace(pos)
+
+
+def iter_batch(
+    input_dir: Path,
+    course_pages: List[int],
+    course_y_range: Tuple[float, float],
+    checkbox_columns: Dict[str, Tuple[float, float]],
+    y_tolerance: int,
+    export_annotations: bool = False,
+    annotations_dir: Optional[Path] = None,
+    header_pages: Optional[List[int]] = None,
+    workers: Optional[int] = None,
+    file_timeout: Optional[float] = DEFAULT_FILE_TIMEOUT,
+    max_memory_mb: Optional[int] = None,
+    cache: Optional[ExtractionCache] = None,
+    cancel=None,
+    ocr: bool = False,
+    ocr_cache_path: Optional[Path] = None,
+    header_y_range: Optional[Tuple[float, float]] = None,
+    files: Optional[List[Union[Path, PdfSource]]] = None,
+    worker_pool: Optional[WorkerPool] = None,
+    trace_memory: bool = False,
+    auto_layout: bool = False,
+    layout_cache_path: Optional[Path] = None,
+    recursive: bool = False,
+    archives: bool = False,
+    prefetch: int = 0,
+    prefetch_memory_mb: int = DEFAULT_PREFETCH_MB,
+) -> Iterator[Dict]:
+    """
+    Processa os PDFs de `input_dir` gerando eventos (dicts) à medida que o
+    lote avança:
+
+    - {"event": "batch", "total", "cached"}: antes do primeiro arquivo;
+    - {"event": "start", "index", "total", "arquivo"}: arquivo despachado;
+    - {"event": "file", "index", "total", "arquivo", "path", "source", "rows",
+      "cached", "error", "elapsed", "timings", "annotations"}: arquivo
+      concluído, SEMPRE na ordem dos arquivos (há um buffer de reordenação no
+      modo paralelo); "rows" é um `extract_rows.FileRows`; "source" é o
+      `PdfSource` e "path" o arquivo no disco
+      (o pacote, para membros de ZIP/TAR); "annotations" são os pedidos de
+      PNG de `process_pdf` (vazio sem `export_annotations`);
+    - {"event": "cancelled", "processed", "total"}: se `cancel` foi acionado.
+
+    `cancel` é qualquer objeto com `is_set()` (ex.: `threading.Event`); o lote
+    para entre arquivos e os eventos "file" já emitidos continuam válidos.
+    Acertos de `cache` são lidos na hora de emitir; resultados novos sem erro
+    são gravados nele.
+
+    `recursive` desce nas subpastas de `input_dir` e `archives` lê os PDFs
+    de dentro dos ZIP/TAR encontrados, direto em memória (ver
+    `extract_sources.list_sources`); "arquivo" vira o caminho relativo.
+    `files` troca a varredura por uma lista explícita (PDFs ou pacotes) e
+    `worker_pool` reaproveita processos já aquecidos (ver `WorkerPool`).
+
+    `layout_cache_path` grava as calibrações de `auto_layout` (ver
+    `extract_layout.LayoutCache.attach`).
+
+    `prefetch=K` lê os próximos K PDFs numa thread de E/S enquanto o atual
+    é processado, até `prefetch_memory_mb` (ver `extract_sources.Prefetcher`);
+    o parser e o OCR recebem o conteúdo em memória. Nesse modo o hash dos
+    arquivos que o cache ainda não conhece sai do conteúdo lido, e não de
+    uma leitura antes do lote; os que se revelarem já extraídos (ex.: cópia
+    com outro nome) saem do cache sem contar no "cached" do evento "batch".
+    """
+    if files is not None:
+        pdfs = expand_sources(files, input_dir)
+    else:
+        pdfs = list_sources(input_dir, recursive, archives)
+    total = len(pdfs)
+
+    prefetcher: Optional[Prefetcher] = None
+    unchecked: set = set()  # chaves cujo hash só sai do conteúdo lido pelo prefetcher
+
+    def args_for(pdf: PdfSource) -> Optional[tuple]:
+        if prefetcher is not None:
+            key = pdf.key
+            pdf = prefetcher.take(pdf)
+            if key in unchecked:
+                unchecked.discard(key)
+                if cache.contains(pdf):
+                    pdf.release()
+                    return None
+        return (
+            pdf,
+            course_pages,
+            course_y_range,
+            checkbox_columns,
+            y_tolerance,
+            export_annotations,
+            annotations_dir,
+            header_pages,
+            ocr,
+            ocr_cache_path,
+            header_y_range,
+            trace_memory,
+            auto_layout,
+            layout_cache_path,
+        )
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    cancelled = lambda: cancel is not None and cancel.is_set()  # noqa: E731
+
+    if prefetch and cache:
+        # hash desconhecido fica para depois: ler o arquivo inteiro agora só para
+        # o hash faria o prefetcher buscá-lo de novo no compartilhamento
+        todo = []
+        for i, pdf in enumerate(pdfs):
+            if cache.known_digest(pdf) is None:
+                unchecked.add(pdf.key)
+                todo.append(i)
+            elif not cache.contains(pdf):
+                todo.append(i)
+    else:
+        todo = [i for i, pdf in enumerate(pdfs) if not (cache and cache.contains(pdf))]
+    todo_pdfs = [pdfs[i] for i in todo]
+    missing = set(todo)
+    yield {"event": "batch", "total": total, "cached": total - len(todo)}
+
+    parallel = worker_pool is not None or (workers > 1 and len(todo_pdfs) > 1)
+    if prefetch and todo_pdfs:
+        prefetcher = Prefetcher(todo_pdfs, prefetch, prefetch_memory_mb, use_mmap=not parallel)
+    if parallel:
+        fresh = _iter_parallel(todo_pdfs, args_for, workers, file_timeout, max_memory_mb, cancel, worker_pool)
+    else:
+        def _serial():
+            for j, pdf in enumerate(todo_pdfs):
+                if cancelled():
+                    return
+                args = args_for(pdf)
+                if args is None:
+                    yield "cached", j
+                    continue
+                yield "start", j
+                yield ("done", j, *_process_one(args))
+
+        fresh = _serial()
+
+    done: Dict[int, Tuple[FileRows, Dict[str, float], List[Dict]]] = {}
+    next_i = 0
+    emitted = 0
+
+    def file_event(i, rows, cached, timings, pages):
+        err = rows.erro
+        return {
+            "event": "file",
+            "index": i,
+            "total": total,
+            "arquivo": pdfs[i].name,
+            "path": pdfs[i].path,
+            "source": pdfs[i],
+            "rows": rows,
+            "cached": cached,
+            "error": err,
+            "elapsed": timings.get("total"),
+            "timings": timings,
+            "annotations": pages,
+        }
+
+    def drain(final: bool = False):
+        nonlocal next_i, emitted
+        while next_i < total:
+            if next_i in done:
+                rows, timings, pages = done.pop(next_i)
+                yield file_event(next_i, rows, False, timings, pages)
+            elif next_i not in missing and not cancelled():
+                rows = cache.get(pdfs[next_i])
+                rows.arquivo = pdfs[next_i].name  # mesmo conteúdo pode ter outro nome de arquivo
+                yield file_event(next_i, rows, True, {}, [])
+            elif not (final and cancelled()):
+                break
+            else:
+                next_i += 1  # cancelado: pula o que não chegou a ser processado
+                continue
+            emitted += 1
+            next_i += 1
+
+    try:
+        yield from drain()  # prefixo que já está no cache sai antes de qualquer processamento
+        for item in fresh:
+            if item[0] == "start":
+                j = item[1]
+                yield {"event": "start", "index": todo[j], "total": total, "arquivo": todo_pdfs[j].name}
+                continue
+            if item[0] == "cached":  # hash conhecido só agora (prefetch): sai do cache
+                missing.discard(todo[item[1]])
+                yield from drain()
+                continue
+            _, j, rows, timings, pages = item
+            i = todo[j]
+            if cache and rows.erro is None:
+                cache.put(pdfs[i], rows)
+            done[i] = (rows, timings, pages)
+            yield from drain()
+        yield from drain(final=True)
+    finally:
+        if prefetcher is not None:
+            prefetcher.close()
+        close_archives()
+
+    if cancelled():
+        yield {"event": "cancelled", "processed": emitted, "total": total}
+
+
+def _process_one(args: tuple) -> Tuple[FileRows, Dict[str, float], List[Dict]]:
+    pdf: PdfSource = args[0]
+    timings: Dict[str, float] = {}
+    pages: List[Dict] = []
+    t0 = time.perf_counter()
+    try:
+        rows = process_pdf(*args, timings=timings, annotation_pages=pages)
+    except Exception as e:
+        rows = _error_row(pdf.name, str(e))
+    finally:
+        pdf.release()
+    timings.setdefault("total", time.perf_counter() - t0)
+    return rows, timings, pages
+
+
 def run_batch(
     input_dir: Path,
     output_xlsx: Path,
@@ -318,53 +1262,472 @@ def run_batch(
     y_tolerance: int,
     export_annotations: bool = False,
     annotations_dir: Optional[Path] = None,
-) -> pd.DataFrame:
+    header_pages: Optional[List[int]] = None,
+    workers: Optional[int] = None,
+    file_timeout: Optional[float] = DEFAULT_FILE_TIMEOUT,
+    max_memory_mb: Optional[int] = None,
+    use_cache: bool = True,
+    cache_path: Optional[Path] = None,
+    stream_output: bool = False,
+    output_format: Optional[str] = None,
+    partition_by_lotacao: bool = False,
+    on_progress: Optional[Callable[[int, int, PdfSource, FileRows, bool], None]] = None,
+    collect_metrics: bool = False,
+    metrics_path: Optional[Path] = None,
+    profile_slowest: int = 0,
+    profile_dir: Optional[Path] = None,
+    on_event: Optional[Callable[[Dict], None]] = None,
+    cancel=None,
+    annotation_mode: str = "all",
+    annotation_resolution: int = DEFAULT_ANNOTATION_RESOLUTION,
+    annotation_crop: bool = False,
+    annotation_workers: Optional[int] = None,
+    ocr: bool = True,
+    ocr_cache_path: Optional[Path] = None,
+    header_y_range: Optional[Tuple[float, float]] = None,
+    trace_memory: bool = False,
+    auto_layout: bool = False,
+    recursive: bool = False,
+    archives: bool = False,
+    files: Optional[List[Union[Path, PdfSource]]] = None,
+    store_path: Optional[Path] = None,
+    prefetch: int = 0,
+    prefetch_memory_mb: int = DEFAULT_PREFETCH_MB,
+) -> "pd.DataFrame":
+    """
+    Processa todos os PDFs de `input_dir` e grava a planilha.
 
-    all_rows: List[Dict[str, Optional[str]]] = []
-    pdfs = sorted(input_dir.glob("*.pdf"))
-    for pdf in pdfs:
-        try:
-            all_rows.extend(
-                process_pdf(
-                    pdf,
-                    course_pages,
-                    course_y_range,
-                    checkbox_columns,
-                    y_tolerance,
-                    export_annotations,
-                    annotations_dir,
-                )
-            )
-        except Exception as e:
-            all_rows.append(
-                {
-                    "arquivo": pdf.name,
-                    "pagina": None,
-                    "requerente": None,
-                    "matricula": None,
-                    "cargo": None,
-                    "lotacao": None,
-                    "curso_titulo": None,
-                    "curso_horas": None,
-                    "modalidade": None,
-                    "_erro": str(e),
-                }
-            )
+    `workers` define quantos processos usar (padrão: número de CPUs); com
+    `workers=1` roda em série no próprio processo, útil para depuração.
+    `file_timeout` e `max_memory_mb` só valem no modo paralelo.
+
+    Com `use_cache`, arquivos já extraídos com os mesmos parâmetros são lidos
+    do SQLite ao lado da saída (ou `cache_path`); acertos/erros do cache ficam
+    em `df.attrs["cache_hits"]` / `df.attrs["cache_misses"]`, contados só
+    nos arquivos que chegaram ao fim (um cancelamento não os infla).
+
+    Com `stream_output`, as linhas vão para a planilha (openpyxl write-only)
+    à medida que cada PDF termina, sem acumular nada em memória; o retorno
+    é então um DataFrame vazio com `df.attrs["rows_written"]`.
+
+    `output_format` (xlsx, parquet, csv, jsonl) vem da extensão da saída se
+    omitido; os formatos colunares gravam com esquema tipado (ver
+    `extract_output.typed_frame`) e o Parquet pode ser particionado por lotação.
+
+    `on_progress(índice, total, pdf, linhas, veio_do_cache)` é chamado a cada
+    PDF concluído, na ordem dos arquivos.
+
+    Com `collect_metrics`, os tempos por etapa (abertura, cabeçalho, linhas de
+    curso, checkboxes, PNGs, escrita) viram um relatório JSON ao lado da saída
+    (ou em `metrics_path`) e ficam em `df.attrs["metrics"]`. `profile_slowest=N`
+    reexecuta os N arquivos mais lentos sob cProfile e grava um .prof de cada.
+
+    É um consumidor de `iter_batch`: `on_event` recebe cada evento do lote e
+    `cancel` (ex.: `threading.Event`) interrompe entre arquivos; a saída é
+    gravada com o que já foi processado e `df.attrs["cancelled"]` fica True.
+
+    Os PNGs de `export_annotations` são desenhados por um pool próprio
+    (`AnnotationRenderer`) enquanto a extração segue. `annotation_mode`
+    "selective" só desenha páginas sem cursos, com modalidade None ou horas
+    anômalas; `annotation_resolution` é o dpi e `annotation_crop` recorta a
+    faixa Y (com `y_tolerance` de margem). O resumo fica em
+    `df.attrs["annotations"]`.
+
+    Com `ocr` (padrão), páginas escaneadas passam pelo Tesseract se ele
+    estiver instalado (`df.attrs["ocr"]` diz se estava); o OCR de cada
+    recorte fica em cache pelo hash da imagem, ao lado da saída (ou em
+    `ocr_cache_path`).
+
+    `header_y_range` restringe o cabeçalho a uma faixa Y (útil quando o
+    resto da página tem texto que confunde os padrões).
+
+    `trace_memory` mede o pico de memória (tracemalloc) de cada arquivo; o
+    relatório de `collect_metrics` ganha a distribuição em "memory". Deixa
+    a extração bem mais lenta, então é só para diagnóstico.
+
+    Com `auto_layout`, cada página tem a faixa Y e as colunas dos checkboxes
+    calibradas pelos títulos de modalidade, uma vez por modelo de
+    formulário (ver `extract_layout`); uma pasta com revisões diferentes do
+    formulário sai numa passada só. `course_y_range`/`checkbox_columns`
+    continuam valendo para as páginas em que os títulos não aparecem. Com
+    `use_cache`, as calibrações ficam em "<saída>.layouts.sqlite" e a
+    próxima execução não recalibra os modelos já vistos.
+
+    `recursive`, `archives` e `files` escolhem as entradas como em
+    `iter_batch`: subpastas, PDFs dentro de ZIP/TAR (lidos em memória, sem
+    extrair para o disco) ou uma lista explícita. Nesses casos "arquivo"
+    traz o caminho relativo, ex.: "2024/03/x.pdf" ou "lote.zip/x.pdf".
+
+    Com `store_path`, as linhas de cada PDF são acrescentadas a um banco
+    local (`extract_store.ResultStore`) sob um número de execução novo
+    (`df.attrs["run_id"]`), e a saída é gravada a partir de uma consulta a
+    ele, sem acumular as linhas em memória durante o lote.
+
+    `prefetch=K` lê os próximos K PDFs em segundo plano enquanto o atual é
+    processado (útil com a pasta num compartilhamento SMB/NFS lento), com
+    no máximo `prefetch_memory_mb` lidos à frente; ver `iter_batch`.
+
+    As linhas do lote ficam guardadas como `FileRows` (cabeçalho uma vez por
+    arquivo, títulos repetidos uma vez por lote) e o DataFrame devolvido
+    sai de `extract_rows.rows_frame`: `category` nas colunas de texto,
+    `Int64` em página e horas.
+    """
+    fmt = output_format or infer_output_format(output_xlsx)
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Formato de saída desconhecido: {fmt!r} (use {', '.join(OUTPUT_FORMATS)})")
+    if stream_output and fmt != "xlsx":
+        raise ValueError("stream_output só está disponível para saída xlsx")
+
+    ocr = ocr and ocr_available()
+    if ocr and use_cache:
+        ocr_cache_path = ocr_cache_path or default_ocr_cache_path(output_xlsx)
+    elif not ocr:
+        ocr_cache_path = None
+    layout_cache_path = default_layout_cache_path(output_xlsx) if auto_layout and use_cache else None
 
-    df = pd.DataFrame(
-        all_rows,
-        columns=[
-            "arquivo",
-            "pagina",
-            "requerente",
-            "matricula",
-            "cargo",
-            "lotacao",
-            "curso_titulo",
-            "curso_horas",
-            "modalidade",
-            "_erro",
-        ],
+    fingerprint = params_fingerprint(
+        course_pages, course_y_range, checkbox_columns, y_tolerance, header_pages, ocr, header_y_range, auto_layout,
     )
-    df.to_excel(output_xlsx, index=False)
+    # PNGs de depuração exigem reprocessar a página, então o cache fica de fora
+    cache: Optional[ExtractionCache] = None
+    if use_cache and not export_annotations:
+        cache = ExtractionCache(cache_path or default_cache_path(output_xlsx), fingerprint, EXTRACTOR_VERSION)
+
+    store: Optional[ResultStore] = None
+    run_id: Optional[int] = None
+    if store_path:
+        store = ResultStore(store_path)
+        run_id = store.begin_run(str(input_dir), fingerprint, EXTRACTOR_VERSION)
+
+    renderer: Optional[AnnotationRenderer] = None
+    if export_annotations and annotations_dir:
+        renderer = AnnotationRenderer(
+            annotations_dir, course_y_range, checkbox_columns,
+            mode=annotation_mode,
+            resolution=annotation_resolution,
+            crop_margin=float(y_tolerance) if annotation_crop else None,
+            workers=annotation_workers,
+        )
+
+    metrics = BatchMetrics()
+    writer = StreamingXlsxWriter(output_xlsx, OUTPUT_COLUMNS) if stream_output else None
+    files_done = 0
+    hits = misses = 0  # só arquivos que chegaram: um cancelamento não conta os despachados
+    all_rows: List[FileRows] = []
+    strings: Dict[str, str] = {}  # textos repetidos entre arquivos, uma cópia só (`FileRows.intern`)
+    processed: Dict[str, Path] = {}
+    cancelled = False
+    try:
+        events = iter_batch(
+            input_dir, course_pages, course_y_range, checkbox_columns, y_tolerance,
+            export_annotations, annotations_dir, header_pages,
+            workers, file_timeout, max_memory_mb, cache, cancel,
+            ocr, ocr_cache_path, header_y_range, files=files, trace_memory=trace_memory,
+            auto_layout=auto_layout, layout_cache_path=layout_cache_path, recursive=recursive, archives=archives,
+            prefetch=prefetch, prefetch_memory_mb=prefetch_memory_mb,
+        )
+        for ev in events:
+            if on_event:
+                on_event(ev)
+            if ev["event"] == "cancelled":
+                cancelled = True
+            if ev["event"] != "file":
+                continue
+            rows, cached = ev["rows"], ev["cached"]
+            files_done += 1
+            if cached:
+                hits += 1
+            else:
+                misses += 1
+            processed[ev["arquivo"]] = ev["source"]
+            metrics.add_file(ev["arquivo"], ev["timings"], cached)
+            if renderer and ev["annotations"]:
+                renderer.submit(ev["source"], ev["annotations"])
+            if on_progress:
+                on_progress(ev["index"], ev["total"], ev["source"], rows, cached)
+            if store:
+                with metrics.batch_stage("store"):
+                    store.append(run_id, rows)
+            elif writer:
+                with metrics.batch_stage("write"):
+                    flushed = writer.write_rows(rows)
+                if flushed and cache:
+                    cache.commit()
+            else:
+                all_rows.append(rows.intern(strings))
+        if store:
+            store.finish_run(run_id, files_done, "cancelled" if cancelled else "done")
+            if writer:  # a planilha em streaming sai do banco, bloco a bloco
+                with metrics.batch_stage("write"):
+                    for chunk in store.iter_rows(run_id):
+                        writer.write_rows(chunk)
+        if writer:
+            with metrics.batch_stage("write"):
+                writer.close()
+    except BaseException:
+        if store:
+            store.close()  # a execução fica "running" no banco: foi interrompida
+        raise
+    finally:
+        if cache:
+            cache.close()
+        if renderer:
+            with metrics.batch_stage("annotations"):
+                annotation_summary = renderer.close(cancel=cancelled)
+
+    if writer:
+        df = rows_frame([])
+        df.attrs["rows_written"] = writer.rows_written
+    else:
+        if store:
+            with metrics.batch_stage("store"):
+                df = store.frame(run_id=run_id)
+        else:
+            df = rows_frame(all_rows)
+        with metrics.batch_stage("write"):
+            write_frame(df, output_xlsx, fmt, partition_by_lotacao)
+    if store:
+        store.close()
+        df.attrs["run_id"] = run_id
+    df.attrs["cache_hits"], df.attrs["cache_misses"] = hits, misses
+    df.attrs["cancelled"] = cancelled
+    df.attrs["ocr"] = ocr
+    if renderer:
+        df.attrs["annotations"] = annotation_summary
+
+    if profile_slowest:
+        # reexecuta só os N mais lentos sob cProfile, no próprio processo
+        prof_dir = profile_dir or output_xlsx.with_name(output_xlsx.stem + "_profiles")
+        for arquivo, _ in metrics.slowest(profile_slowest):
+            out = prof_dir / f"{processed[arquivo].stem}.prof"
+            try:
+                profile_call(
+                    out, process_pdf, processed[arquivo], course_pages, course_y_range,
+                    checkbox_columns, y_tolerance, False, None, header_pages, ocr, ocr_cache_path,
+                    header_y_range, False, auto_layout, layout_cache_path,
+                )
+            except Exception:
+                pass
+            metrics.profiles.append(str(out))
+
+    if collect_metrics or profile_slowest:
+        summary = metrics.summary()
+        save_report(summary, metrics_path or output_xlsx.with_name(output_xlsx.stem + "_metrics.json"))
+        df.attrs["metrics"] = summary
     return df
+
+
+# --- linha de comando ---
+
+def _build_arg_parser():
+    import argparse
+
+    ap = argparse.ArgumentParser(
+        prog="python -m extract_core",
+        description="Extrai cursos das Papeletas (TCDF) sem interface gráfica.",
+    )
+    ap.add_argument("--input-dir", type=Path, default=Path("pdfs_entrada"), help="pasta com os PDFs")
+    ap.add_argument("--recursive", action="store_true", help="inclui os PDFs das subpastas")
+    ap.add_argument("--archives", action="store_true",
+                    help="lê os PDFs de dentro dos ZIP/TAR da pasta, sem extrair para o disco")
+    ap.add_argument("--files-from", default=None, metavar="LISTA",
+                    help="arquivo com um PDF/ZIP/TAR por linha ('-' = entrada padrão) no lugar da pasta")
+    ap.add_argument("--prefetch", type=int, default=0, metavar="K",
+                    help="lê os próximos K PDFs em segundo plano (pasta em rede lenta)")
+    ap.add_argument("--prefetch-memory-mb", type=int, default=DEFAULT_PREFETCH_MB,
+                    help="teto de memória para os PDFs lidos à frente (--prefetch)")
+    ap.add_argument("--output", type=Path, default=Path("dados_extraidos.xlsx"), help="arquivo de saída")
+    ap.add_argument("--format", choices=OUTPUT_FORMATS, default=None,
+                    help="formato da saída (padrão: pela extensão de --output)")
+    ap.add_argument("--partition-by-lotacao", action="store_true", help="particiona o Parquet por lotação")
+    ap.add_argument("--pages", default=",".join(map(str, DEFAULT_COURSE_PAGES)),
+                    help="páginas dos cursos, ex.: 1 ou 1,2 (vazio = todas)")
+    ap.add_argument("--header-pages", default="", help="páginas do cabeçalho (vazio = automático)")
+    ap.add_argument("--header-y-range", nargs=2, type=float, metavar=("MIN", "MAX"), default=None,
+                    help="faixa Y do cabeçalho (padrão: página inteira)")
+    ap.add_argument("--y-range", nargs=2, type=float, metavar=("MIN", "MAX"),
+                    default=DEFAULT_COURSE_Y_RANGE, help="faixa Y dos cursos")
+    ap.add_argument("--presencial", nargs=2, type=float, metavar=("X0", "X1"),
+                    default=DEFAULT_CHECKBOX_COLUMNS["presencial"], help="coluna X do checkbox Presencial")
+    ap.add_argument("--misto", nargs=2, type=float, metavar=("X0", "X1"),
+                    default=DEFAULT_CHECKBOX_COLUMNS["misto"], help="coluna X do checkbox Misto")
+    ap.add_argument("--distancia", nargs=2, type=float, metavar=("X0", "X1"),
+                    default=DEFAULT_CHECKBOX_COLUMNS["à distância"], help="coluna X do checkbox À distância")
+    ap.add_argument("--y-tolerance", type=int, default=DEFAULT_Y_TOLERANCE, help="tolerância Y (px)")
+    ap.add_argument("--auto-layout", action="store_true",
+                    help="calibra faixa Y e colunas pelos títulos de modalidade, por modelo de formulário")
+    ap.add_argument("--export-annotations", action="store_true", help="exporta PNGs de depuração")
+    ap.add_argument("--annotations-dir", type=Path, default=Path("debug_checagem"), help="pasta dos PNGs")
+    ap.add_argument("--annotation-mode", choices=ANNOTATION_MODES, default="all",
+                    help="all = toda página; selective = só páginas suspeitas")
+    ap.add_argument("--annotation-resolution", type=int, default=DEFAULT_ANNOTATION_RESOLUTION,
+                    help="dpi dos PNGs")
+    ap.add_argument("--annotation-crop", action="store_true", help="recorta os PNGs na faixa Y")
+    ap.add_argument("--workers", type=int, default=None, help="processos paralelos (1 = série)")
+    ap.add_argument("--file-timeout", type=float, default=DEFAULT_FILE_TIMEOUT, help="tempo máximo por PDF (s)")
+    ap.add_argument("--max-memory-mb", type=int, default=None, help="teto de memória por processo")
+    ap.add_argument("--no-cache", action="store_true", help="ignora o cache de extração")
+    ap.add_argument("--no-ocr", action="store_true", help="não faz OCR das páginas escaneadas")
+    ap.add_argument("--stream", action="store_true", help="grava o xlsx em streaming")
+    ap.add_argument("--store", type=Path, default=None, metavar="BANCO",
+                    help="acrescenta as linhas a um banco SQLite de resultados (consulte com extract_store.py)")
+    ap.add_argument("--metrics", action="store_true", help="grava relatório de tempos por etapa (JSON)")
+    ap.add_argument("--profile-slowest", type=int, default=0, metavar="N",
+                    help="grava cProfile dos N arquivos mais lentos")
+    ap.add_argument("--trace-memory", action="store_true",
+                    help="mede o pico de memória de cada PDF (tracemalloc; mais lento)")
+    ap.add_argument("--watch", action="store_true",
+                    help="fica observando a pasta e acrescenta as linhas dos PDFs novos (saída csv/jsonl)")
+    ap.add_argument("--settle", type=float, default=2.0, help="segundos sem mudança antes de ler um PDF (--watch)")
+    ap.add_argument("--poll", action="store_true", help="varre a pasta em vez de usar inotify (--watch)")
+    return ap
+
+
+def _emit(event: Dict) -> None:
+    sys.stderr.write(json.dumps(event, ensure_ascii=False) + "\n")
+    sys.stderr.flush()
+
+
+def _watch_main(args, cancel) -> int:
+    from extract_watch import watch_folder
+
+    def on_event(ev):
+        if ev["event"] == "watch":
+            _emit(ev)
+        elif ev["event"] == "file":
+            _emit({
+                "event": "file",
+                "file": ev["arquivo"],
+                "cached": ev["cached"],
+                "rows": 0 if ev["error"] else len(ev["rows"]),
+                "error": ev["error"],
+                "elapsed": None if ev["elapsed"] is None else round(ev["elapsed"], 4),
+            })
+
+    try:
+        processed = watch_folder(
+            input_dir=args.input_dir,
+            output=args.output,
+            course_pages=parse_pages(args.pages),
+            course_y_range=tuple(args.y_range),
+            checkbox_columns={
+                "presencial": tuple(args.presencial),
+                "misto": tuple(args.misto),
+                "à distância": tuple(args.distancia),
+            },
+            y_tolerance=args.y_tolerance,
+            header_pages=parse_pages(args.header_pages) or None,
+            header_y_range=tuple(args.header_y_range) if args.header_y_range else None,
+            auto_layout=args.auto_layout,
+            workers=args.workers,
+            file_timeout=args.file_timeout,
+            max_memory_mb=args.max_memory_mb,
+            output_format=args.format,
+            ocr=not args.no_ocr,
+            settle=args.settle,
+            use_inotify=not args.poll,
+            on_event=on_event,
+            cancel=cancel,
+        )
+    except Exception as e:
+        _emit({"event": "fatal", "error": str(e)})
+        return 1
+    _emit({"event": "done", "processed": processed, "output": str(args.output)})
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Executa um lote pela linha de comando. O progresso sai como JSON Lines
+    no stderr; o código de saída é 1 se algum PDF falhar ou se o lote for
+    interrompido (Ctrl+C para entre arquivos e grava o que já foi feito).
+    Com `--watch`, não termina: observa a pasta até o Ctrl+C.
+    """
+    import threading
+
+    args = _build_arg_parser().parse_args(argv)
+    errors = 0
+    cancel = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: cancel.set())
+
+    if args.watch:
+        return _watch_main(args, cancel)
+
+    def on_event(ev):
+        nonlocal errors
+        if ev["event"] == "file":
+            errors += ev["error"] is not None
+            _emit({
+                "event": "file",
+                "index": ev["index"] + 1,
+                "total": ev["total"],
+                "file": ev["arquivo"],
+                "rows": 0 if ev["error"] else len(ev["rows"]),
+                "cached": ev["cached"],
+                "error": ev["error"],
+                "elapsed": None if ev["elapsed"] is None else round(ev["elapsed"], 4),
+            })
+        elif ev["event"] == "cancelled":
+            _emit(ev)
+
+    try:
+        df = run_batch(
+            input_dir=args.input_dir,
+            output_xlsx=args.output,
+            course_pages=parse_pages(args.pages),
+            course_y_range=tuple(args.y_range),
+            checkbox_columns={
+                "presencial": tuple(args.presencial),
+                "misto": tuple(args.misto),
+                "à distância": tuple(args.distancia),
+            },
+            y_tolerance=args.y_tolerance,
+            export_annotations=args.export_annotations,
+            annotations_dir=args.annotations_dir if args.export_annotations else None,
+            annotation_mode=args.annotation_mode,
+            annotation_resolution=args.annotation_resolution,
+            annotation_crop=args.annotation_crop,
+            header_pages=parse_pages(args.header_pages) or None,
+            header_y_range=tuple(args.header_y_range) if args.header_y_range else None,
+            auto_layout=args.auto_layout,
+            recursive=args.recursive,
+            archives=args.archives,
+            files=read_file_list(args.files_from) if args.files_from else None,
+            prefetch=args.prefetch,
+            prefetch_memory_mb=args.prefetch_memory_mb,
+            workers=args.workers,
+            file_timeout=args.file_timeout,
+            max_memory_mb=args.max_memory_mb,
+            use_cache=not args.no_cache,
+            ocr=not args.no_ocr,
+            stream_output=args.stream,
+            store_path=args.store,
+            output_format=args.format,
+            partition_by_lotacao=args.partition_by_lotacao,
+            on_event=on_event,
+            cancel=cancel,
+            collect_metrics=args.metrics or args.trace_memory,
+            trace_memory=args.trace_memory,
+            profile_slowest=args.profile_slowest,
+        )
+    except Exception as e:
+        _emit({"event": "fatal", "error": str(e)})
+        return 1
+
+    _emit({
+        "event": "done",
+        "rows": int(df.attrs.get("rows_written", len(df))),
+        "errors": errors,
+        "cache_hits": df.attrs.get("cache_hits", 0),
+        "cache_misses": df.attrs.get("cache_misses", 0),
+        "output": str(args.output),
+        "cancelled": df.attrs.get("cancelled", False),
+        **({"metrics": df.attrs["metrics"]} if "metrics" in df.attrs else {}),
+        **({"annotations": df.attrs["annotations"]} if "annotations" in df.attrs else {}),
+        **({"run_id": df.attrs["run_id"]} if "run_id" in df.attrs else {}),
+    })
+    return 1 if (errors or df.attrs.get("cancelled")) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+# extract_layout.py
+"""
+Calibração automática da geometria da papeleta (faixa Y dos cursos e
+colunas X dos checkboxes) a partir dos títulos "Presencial / Misto / À
+distância" da própria página. Cada modelo de formulário é reconhecido
+por uma impressão digital (tamanho da página + posição dos títulos e dos
+rótulos do cabeçalho) e calibrado uma vez só; com um `LayoutStore`, a
+calibração fica gravada para as próximas execuções.
+
+    python extract_layout.py pasta/ [outro.pdf ...]
+
+lista os modelos encontrados e a geometria calibrada de cada um.
+"""
+import hashlib
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+Layout = Tuple[Tuple[float, float], Dict[str, Tuple[float, float]]]
+Box = Tuple[float, float, float, float]  # x0, top, x1, bottom
+
+HEADING_PATTERNS = {
+    "presencial": re.compile(r"^presencial$", re.I),
+    "misto": re.compile(r"^misto$", re.I),
+    "à distância": re.compile(r"^dist[aâ]ncia$", re.I),
+}
+# os mesmos títulos na varredura dos chars (texto da linha colado, já minúsculo)
+HEADING_SCAN = (re.compile("presencial"), re.compile("misto"), re.compile("dist[aâ]ncia"))
+# linhas que marcam o fim da tabela de cursos
+BAND_END_RX = re.compile(r"^saldo\s+de\b", re.I)
+
+SAME_LINE_TOL = 3.0    # pt: palavras com topo até essa distância estão na mesma linha
+FINGERPRINT_GRID = 2.0  # pt: posições arredondadas para a impressão digital
+COLUMN_PAD = 2.0       # pt de folga nas colunas além da largura do título
+BAND_GAP = 2.0         # pt entre o título/rodapé e a faixa dos cursos
+
+
+def find_headings(words: List[Dict]) -> Optional[Dict[str, Box]]:
+    """
+    Caixas dos três títulos de modalidade na mesma linha (a mais alta da
+    página, se houver mais de uma). "À distância" junta o "À" à esquerda.
+    """
+    found: Dict[str, List[Dict]] = {label: [] for label in HEADING_PATTERNS}
+    for w in words:
+        for label, rx in HEADING_PATTERNS.items():
+            if rx.match(w["text"]):
+                found[label].append(w)
+
+    for p in sorted(found["presencial"], key=lambda w: w["top"]):
+        line = {"presencial": p}
+        for label in ("misto", "à distância"):
+            near = [w for w in found[label] if abs(w["top"] - p["top"]) <= SAME_LINE_TOL]
+            if not near:
+                break
+            line[label] = near[0]
+        else:
+            boxes = {label: (w["x0"], w["top"], w["x1"], w["bottom"]) for label, w in line.items()}
+            dist = line["à distância"]
+            for w in words:  # "À" / "A" logo antes de "distância"
+                if (w["text"].lower() in ("à", "a") and abs(w["top"] - dist["top"]) <= SAME_LINE_TOL
+                        and 0 <= dist["x0"] - w["x1"] <= 6):
+                    x0, top, x1, bottom = boxes["à distância"]
+                    boxes["à distância"] = (w["x0"], top, x1, bottom)
+            return boxes
+    return None
+
+
+def _lines(words: List[Dict]) -> List[List[Dict]]:
+    """Palavras agrupadas por linha (de cima para baixo, cada linha da esquerda para a direita)."""
+    lines: List[List[Dict]] = []
+    for w in sorted(words, key=lambda w: w["top"]):
+        if lines and w["top"] - lines[-1][0]["top"] <= SAME_LINE_TOL:
+            lines[-1].append(w)
+        else:
+            lines.append([w])
+    return [sorted(line, key=lambda w: w["x0"]) for line in lines]
+
+
+def _header_labels(words: List[Dict], above: float) -> List[Tuple[str, float, float]]:
+    """Rótulos do cabeçalho ("Requerente:", "Cargo:"...): 1ª palavra da linha, terminada em ':'."""
+    return [
+        (line[0]["text"], line[0]["x0"], line[0]["top"])
+        for line in _lines([w for w in words if w["top"] < above])
+        if line[0]["text"].endswith(":")
+    ]
+
+
+def heading_words(page) -> Optional[List[Dict]]:
+    """
+    Palavras só do topo da página até a linha dos títulos de modalidade,
+    achada por uma varredura dos chars (sem montar as palavras da tabela de
+    cursos, a maior parte da página). None se a varredura não achar a linha.
+    """
+    text: Dict[int, List[str]] = {}
+    for ch in page.chars:
+        text.setdefault(int(ch["top"]), []).append(ch["text"])
+    lines = {k: "".join(v).lower() for k, v in text.items()}
+    reach = int(SAME_LINE_TOL) + 1
+    for k in sorted(lines):
+        near = " ".join(lines.get(j, "") for j in range(k, k + reach))
+        if all(rx.search(near) for rx in HEADING_SCAN):
+            limit = k + reach
+            return page.filter(lambda obj: obj.get("top", 0) < limit).extract_words()
+    return None
+
+
+def layout_fingerprint(width: float, height: float, words: List[Dict], headings: Dict[str, Box]) -> str:
+    """Resumo do modelo da página: tamanho, títulos de modalidade e rótulos do cabeçalho."""
+    q = lambda v: round(v / FINGERPRINT_GRID)  # noqa: E731
+    top = min(b[1] for b in headings.values())
+    parts = [f"{round(width)}x{round(height)}"]
+    parts += [f"{label}@{q(x0)},{q(t)},{q(x1)}" for label, (x0, t, x1, _) in sorted(headings.items())]
+    parts += [f"{text}@{q(x0)},{q(t)}" for text, x0, t in sorted(_header_labels(words, top))]
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def calibrate_layout(words: List[Dict], headings: Dict[str, Box], band_height: float) -> Layout:
+    """
+    Colunas = largura de cada título (com folga, sem invadir a vizinha);
+    faixa Y = logo abaixo dos títulos até a primeira linha "Saldo de ...",
+    ou `band_height` pt se o formulário não tiver essa linha.
+    """
+    heading_bottom = max(b[3] for b in headings.values())
+    ends = [
+        line[0]["top"]
+        for line in _lines([w for w in words if w["top"] > heading_bottom])
+        if BAND_END_RX.match(" ".join(w["text"] for w in line))
+    ]
+    y0 = heading_bottom + BAND_GAP
+    y1 = min(ends) - BAND_GAP if ends else y0 + band_height
+
+    spans = sorted((b[0], b[2], label) for label, b in headings.items())
+    columns: Dict[str, Tuple[float, float]] = {}
+    for k, (x0, x1, label) in enumerate(spans):
+        lo, hi = x0 - COLUMN_PAD, x1 + COLUMN_PAD
+        if k > 0:
+            lo = max(lo, (spans[k - 1][1] + x0) / 2)
+        if k + 1 < len(spans):
+            hi = min(hi, (x1 + spans[k + 1][0]) / 2)
+        columns[label] = (round(lo, 2), round(hi, 2))
+    return (round(y0, 2), round(y1, 2)), {label: columns[label] for label in HEADING_PATTERNS}
+
+
+class LayoutCache:
+    """
+    Geometria calibrada por impressão digital do modelo. A impressão
+    digital sai de cada página, mas só das palavras até os títulos
+    (`heading_words`); a calibração, que lê a página inteira, uma vez por
+    modelo. Vive no processo; com `attach`, também num `LayoutStore`
+    compartilhado entre os workers e entre execuções.
+    """
+
+    def __init__(self):
+        self._layouts: Dict[Tuple[str, float], Layout] = {}
+        self.store = None
+        self.hits = 0
+        self.misses = 0
+
+    def attach(self, db_path: Optional[Path]) -> None:
+        """Passa a ler/gravar as calibrações em `db_path` (None desliga)."""
+        if self.store is not None and self.store.db_path == db_path:
+            return
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+        if db_path is not None:
+            from extract_cache import LayoutStore
+
+            self.store = LayoutStore(db_path)
+
+    def lookup(self, page, band_height: float) -> Tuple[Optional[str], Optional[Layout]]:
+        """(impressão digital, geometria) da página; (None, None) sem os títulos de modalidade."""
+        words, all_words = heading_words(page), None
+        headings = find_headings(words) if words is not None else None
+        if headings is None:  # a varredura falhou: confere na página inteira
+            words = all_words = page.extract_words()
+            headings = find_headings(words)
+            if headings is None:
+                return None, None
+        fp = layout_fingerprint(float(page.width), float(page.height), words, headings)
+        key = (fp, band_height)
+        layout = self._layouts.get(key)
+        if layout is None and self.store is not None:
+            layout = self.store.get(fp, band_height)
+        if layout is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            layout = calibrate_layout(all_words or page.extract_words(), headings, band_height)
+            if self.store is not None:
+                self.store.put(fp, band_height, layout)
+        self._layouts[key] = layout
+        return fp, layout
+
+
+LAYOUTS = LayoutCache()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import pdfplumber
+
+    from extract_core import DEFAULT_COURSE_Y_RANGE
+
+    targets = [Path(a) for a in (argv if argv is not None else sys.argv[1:])]
+    if not targets:
+        print(__doc__.strip())
+        return 2
+    pdfs = [p for t in targets for p in (sorted(t.glob("*.pdf")) if t.is_dir() else [t])]
+    band_height = DEFAULT_COURSE_Y_RANGE[1] - DEFAULT_COURSE_Y_RANGE[0]
+    models: Dict[str, Tuple[Layout, List[str]]] = {}
+    unknown: List[str] = []
+    for pdf_path in pdfs:
+        with pdfplumber.open(pdf_path) as pdf:
+            fp, layout = LAYOUTS.lookup(pdf.pages[0], band_height) if pdf.pages else (None, None)
+        if fp is None:
+            unknown.append(pdf_path.name)
+        else:
+            models.setdefault(fp, (layout, []))[1].append(pdf_path.name)
+
+    for fp, ((y_range, columns), names) in models.items():
+        print(f"modelo {fp[:12]}: {len(names)} PDF(s), ex.: {names[0]}")
+        print(f"  faixa Y dos cursos: {y_range[0]:.1f} – {y_range[1]:.1f}")
+        for label, (x0, x1) in columns.items():
+            print(f"  checkbox {label}: {x0:.1f} – {x1:.1f}")
+    if unknown:
+        print(f"sem títulos de modalidade (geometria configurada): {len(unknown)} PDF(s), ex.: {unknown[0]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
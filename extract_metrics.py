@@ -0,0 +1,135 @@
+# extract_metrics.py
+import cProfile
+import json
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# etapas medidas em process_pdf, na ordem em que acontecem
+FILE_STAGES = ("open", "ocr", "header", "layout", "course_rows", "checkbox", "annotations")
+# pico de memória (MB) de `process_pdf(trace_memory=True)`, guardado junto dos tempos
+MEMORY_KEY = "peak_mem_mb"
+
+
+@contextmanager
+def stage_timer(timings: Optional[Dict[str, float]], stage: str) -> Iterator[None]:
+    """Soma o tempo do bloco em `timings[stage]` (não faz nada se `timings` for None)."""
+    if timings is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - t0
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    s = sorted(values)
+    pick = lambda q: s[min(len(s) - 1, int(q * len(s)))]  # noqa: E731
+    return {
+        "count": len(s),
+        "total_s": round(sum(s), 6),
+        "p50_ms": round(1000 * pick(0.50), 3),
+        "p95_ms": round(1000 * pick(0.95), 3),
+        "max_ms": round(1000 * s[-1], 3),
+    }
+
+
+class BatchMetrics:
+    """
+    Acumula os tempos por arquivo (etapas de `process_pdf`) e por lote
+    (escrita da saída etc.) e gera o relatório agregado.
+    """
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.files: List[Tuple[str, Dict[str, float], bool]] = []
+        self.batch: Dict[str, float] = {}
+        self.profiles: List[str] = []
+
+    def add_file(self, arquivo: str, timings: Dict[str, float], cached: bool = False) -> None:
+        self.files.append((arquivo, dict(timings), cached))
+
+    @contextmanager
+    def batch_stage(self, stage: str) -> Iterator[None]:
+        with stage_timer(self.batch, stage):
+            yield
+
+    def slowest(self, n: int) -> List[Tuple[str, Dict[str, float]]]:
+        timed = [(a, t) for a, t, cached in self.files if not cached and "total" in t]
+        return sorted(timed, key=lambda item: item[1]["total"], reverse=True)[:n]
+
+    def summary(self, top: int = 10) -> Dict[str, object]:
+        wall = time.perf_counter() - self.t0
+        stages: Dict[str, Dict[str, float]] = {}
+        for stage in FILE_STAGES + ("total",):
+            values = [t[stage] for _, t, cached in self.files if not cached and stage in t]
+            if values:
+                stages[stage] = _percentiles(values)
+        peaks = sorted(t[MEMORY_KEY] for _, t, cached in self.files if not cached and MEMORY_KEY in t)
+        memory = {}
+        if peaks:
+            pick = lambda q: peaks[min(len(peaks) - 1, int(q * len(peaks)))]  # noqa: E731
+            heaviest = max(
+                ((a, t[MEMORY_KEY]) for a, t, cached in self.files if not cached and MEMORY_KEY in t),
+                key=lambda item: item[1],
+            )
+            memory = {
+                "count": len(peaks),
+                "p50_mb": round(pick(0.50), 3),
+                "p95_mb": round(pick(0.95), 3),
+                "max_mb": round(peaks[-1], 3),
+                "max_arquivo": heaviest[0],
+            }
+        return {
+            "files": len(self.files),
+            "cached_files": sum(1 for _, _, cached in self.files if cached),
+            "wall_s": round(wall, 3),
+            "files_per_sec": round(len(self.files) / wall, 2) if wall else 0.0,
+            "stages": stages,
+            "batch_stages_s": {k: round(v, 6) for k, v in self.batch.items()},
+            **({"memory": memory} if memory else {}),
+            "slowest_files": [
+                {"arquivo": a, **{k: round(v, 6) for k, v in t.items()}} for a, t in self.slowest(top)
+            ],
+            "profiles": list(self.profiles),
+        }
+
+
+def profile_call(out_path: Path, func, *args, **kwargs):
+    """Executa `func` sob cProfile e grava as estatísticas em `out_path` (.prof)."""
+    prof = cProfile.Profile()
+    try:
+        return prof.runcall(func, *args, **kwargs)
+    finally:
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        prof.dump_stats(str(out_path))
+
+
+def save_report(summary: Dict[str, object], path: Path) -> None:
+    path.write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def format_summary(summary: Dict[str, object], top: int = 3) -> List[str]:
+    """Linhas curtas para o log da GUI/CLI."""
+    lines = [
+        f"⏱️ {summary['files']} arquivo(s) em {summary['wall_s']:.1f} s "
+        f"({summary['files_per_sec']:.1f} arquivos/s, {summary['cached_files']} do cache)"
+    ]
+    stages = summary.get("stages", {})
+    parts = [f"{k} p50 {v['p50_ms']:.0f} ms / p95 {v['p95_ms']:.0f} ms" for k, v in stages.items() if k != "total"]
+    if parts:
+        lines.append("   " + "; ".join(parts))
+    mem = summary.get("memory")
+    if mem:
+        lines.append(f"   memória por arquivo: p50 {mem['p50_mb']:.1f} MB / p95 {mem['p95_mb']:.1f} MB"
+                     f" / máx {mem['max_mb']:.1f} MB ({mem['max_arquivo']})")
+    for stage, secs in summary.get("batch_stages_s", {}).items():
+        lines.append(f"   {stage}: {secs:.2f} s")
+    for item in summary.get("slowest_files", [])[:top]:
+        lines.append(f"   🐢 {item['arquivo']}: {item['total']:.2f} s")
+    for path in summary.get("profiles", []):
+        lines.append(f"   perfil: {path}")
+    return lines
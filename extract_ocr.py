@@ -0,0 +1,209 @@
+# extract_ocr.py
+import hashlib
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+OCR_DPI = 300
+OCR_LANG = "por"
+OCR_THREADS = 2      # tesseract roda em subprocesso: threads bastam para paralelizar
+OCR_MIN_CONF = 30.0  # palavras com confiança abaixo disso são descartadas
+INK_THRESHOLD = 128  # tom de cinza abaixo disso conta como tinta
+INK_MIN_SIZE = 6  # px; manchas mais finas que isso não são marca
+INK_BORDER_FRACTION = 0.25  # margem ignorada em cada lado da mancha (a borda da caixa)
+INK_FILL_FRACTION = 0.08  # fração mínima de tinta no miolo para contar como marca
+
+
+@lru_cache(maxsize=1)
+def ocr_available() -> bool:
+    """pytesseract instalado e binário do Tesseract encontrado."""
+    try:
+        import pytesseract
+
+        pytesseract.get_tesseract_version()
+    except Exception:
+        return False
+    return True
+
+
+class OcrPage:
+    """
+    Página "virtual" montada a partir das palavras do OCR, já em coordenadas
+    do PDF. Expõe o pedaço da API de `pdfplumber.Page` que a extração usa
+    (`extract_text`, `extract_words`, `filter`, `chars`, `lines`, `rects`), então
+    `find_course_rows_with_y` e o índice de checkboxes funcionam sem mudança.
+    """
+
+    def __init__(
+        self, page_number: int, width: float, height: float, words: List[Dict], rects: Optional[List[Dict]] = None
+    ):
+        self.page_number = page_number
+        self.width = width
+        self.height = height
+        self.words = sorted(words, key=lambda w: (w["top"], w["x0"]))
+        self.lines: List[Dict] = []  # página escaneada não tem objetos vetoriais...
+        self.rects = rects or []      # ...mas as marcas de tinta nas colunas viram "rects"
+
+    @property
+    def chars(self) -> List[Dict]:
+        # divide a caixa de cada palavra igualmente entre as letras
+        out = []
+        for w in self.words:
+            step = (w["x1"] - w["x0"]) / max(1, len(w["text"]))
+            for k, c in enumerate(w["text"]):
+                x0 = w["x0"] + k * step
+                out.append({"text": c, "x0": x0, "x1": x0 + step, "top": w["top"], "bottom": w["bottom"]})
+        return out
+
+    def filter(self, test_function) -> "OcrPage":
+        """Como `pdfplumber.Page.filter`: mantém palavras e marcas aprovadas."""
+        return OcrPage(
+            self.page_number, self.width, self.height,
+            [w for w in self.words if test_function(w)],
+            [r for r in self.rects if test_function(r)],
+        )
+
+    def extract_words(self, **kwargs) -> List[Dict]:
+        return [dict(w) for w in self.words]
+
+    def extract_text(self, **kwargs) -> str:
+        # mantém as linhas do próprio Tesseract (bloco/parágrafo/linha)
+        lines: Dict[Tuple[int, ...], List[Dict]] = {}
+        for w in self.words:
+            lines.setdefault(w["line"], []).append(w)
+        ordered = sorted(lines.values(), key=lambda ws: min(w["top"] for w in ws))
+        return "\n".join(" ".join(w["text"] for w in sorted(ws, key=lambda w: w["x0"])) for ws in ordered)
+
+
+def _ocr_image(img, lang: str) -> List[Dict]:
+    """Palavras do Tesseract em pixels da imagem (left/top/width/height)."""
+    import pytesseract
+
+    data = pytesseract.image_to_data(img, lang=lang, output_type=pytesseract.Output.DICT)
+    words = []
+    for i, text in enumerate(data["text"]):
+        text = (text or "").strip()
+        if not text or float(data["conf"][i]) < OCR_MIN_CONF:
+            continue
+        words.append({
+            "text": text,
+            "left": data["left"][i],
+            "top": data["top"][i],
+            "width": data["width"][i],
+            "height": data["height"][i],
+            "line": [data["block_num"][i], data["par_num"][i], data["line_num"][i]],
+        })
+    return words
+
+
+def ink_boxes(img, x_ranges: List[Tuple[int, int]]) -> List[Tuple[int, int, int, int]]:
+    """
+    Caixas (x0, top, x1, bottom), em pixels, das marcas de tinta dentro de
+    cada faixa X: é como uma marca de checkbox (X à mão, quadradinho
+    preenchido) aparece numa página escaneada, onde não há rect vetorial.
+    Só conta a tinta do miolo de cada mancha, longe das bordas: o contorno
+    de um checkbox vazio não é marca.
+    """
+    import numpy as np
+
+    arr = np.asarray(img.convert("L")) < INK_THRESHOLD
+    boxes = []
+    for c0, c1 in x_ranges:
+        sub = arr[:, max(0, c0):max(0, c1)]
+        if sub.size == 0:
+            continue
+        inked = sub.any(axis=1)
+        # trechos contíguos de linhas com tinta: uma mancha (caixa, X, texto) cada
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], inked.astype(np.int8), [0]))))
+        for top, bottom in zip(edges[::2], edges[1::2]):
+            cols = np.flatnonzero(sub[top:bottom].any(axis=0))
+            left, right = int(cols[0]), int(cols[-1]) + 1
+            h, w = int(bottom - top), right - left
+            if min(h, w) < INK_MIN_SIZE:
+                continue  # risco solto (traço de tabela, sublinhado) ou sujeira
+            m = max(1, int(min(h, w) * INK_BORDER_FRACTION))
+            inner = sub[top + m:bottom - m, left + m:right - m]
+            if inner.size and inner.mean() >= INK_FILL_FRACTION:
+                boxes.append((c0 + left, int(top), c0 + right, int(bottom)))
+    return boxes
+
+
+def ocr_regions(
+    pdf_path: Union[Path, bytes],
+    regions: Dict[int, List[Tuple[float, float]]],
+    page_sizes: Dict[int, Tuple[float, float]],
+    cache=None,
+    ink_columns: Optional[Dict[str, Tuple[float, float]]] = None,
+    dpi: int = OCR_DPI,
+    lang: str = OCR_LANG,
+    threads: int = OCR_THREADS,
+) -> Dict[int, OcrPage]:
+    """
+    Rasteriza só as faixas Y pedidas (`regions[página] = [(topo, base), ...]`,
+    em pontos do PDF) e passa cada recorte pelo Tesseract. Os recortes são
+    gerados em série (pdfium não é thread-safe) e o OCR roda em paralelo; com
+    `cache` (`extract_cache.OcrCache`), o resultado fica guardado pelo hash
+    da imagem e uma nova execução não chama o Tesseract. `pdf_path` também
+    pode ser o conteúdo do PDF (membro de um pacote lido em memória).
+
+    Nas faixas X de `ink_columns` (colunas dos checkboxes), as manchas de
+    tinta viram `rects` da página, como os quadradinhos de um PDF digital.
+    """
+    import pypdfium2 as pdfium
+
+    scale = dpi / 72.0
+    crops = []  # (página, topo da faixa, imagem, chave)
+    doc = pdfium.PdfDocument(pdf_path if isinstance(pdf_path, bytes) else str(pdf_path))
+    try:
+        for page_idx, bands in regions.items():
+            width, height = page_sizes[page_idx]
+            page = doc[page_idx - 1]
+            for top, bottom in bands:
+                top, bottom = max(0.0, top), min(height, bottom)
+                if bottom <= top:
+                    continue
+                img = page.render(scale=scale, crop=(0, height - bottom, 0, top), grayscale=True).to_pil()
+                key = hashlib.sha256(
+                    f"{lang}|{img.mode}|{img.size}|".encode("utf-8") + img.tobytes()
+                ).hexdigest()
+                crops.append((page_idx, top, img, key))
+    finally:
+        doc.close()
+
+    found: Dict[str, List[Dict]] = {}
+    if cache is not None:
+        for _, _, _, key in crops:
+            hit = cache.get(key)
+            if hit is not None:
+                found[key] = hit
+    missing = {key: img for _, _, img, key in crops if key not in found}
+    if missing:
+        from concurrent.futures import ThreadPoolExecutor
+
+        os.environ.setdefault("OMP_THREAD_LIMIT", "1")  # um núcleo por Tesseract
+        with ThreadPoolExecutor(max(1, min(threads, len(missing)))) as ex:
+            results = dict(zip(missing, ex.map(lambda img: _ocr_image(img, lang), missing.values())))
+        for key, words in results.items():
+            found[key] = words
+            if cache is not None:
+                cache.put(key, words)
+
+    pages: Dict[int, List[Dict]] = {p: [] for p in regions}
+    rects: Dict[int, List[Dict]] = {p: [] for p in regions}
+    x_ranges = [(int(x0 * scale), int(x1 * scale) + 1) for x0, x1 in (ink_columns or {}).values()]
+    for page_idx, top, img, key in crops:
+        for x0, y0, x1, y1 in ink_boxes(img, x_ranges) if x_ranges else []:
+            rects[page_idx].append({
+                "x0": x0 / scale, "x1": x1 / scale, "top": top + y0 / scale, "bottom": top + y1 / scale,
+            })
+        for w in found[key]:  # pixels do recorte -> pontos do PDF
+            pages[page_idx].append({
+                "text": w["text"],
+                "x0": w["left"] / scale,
+                "x1": (w["left"] + w["width"]) / scale,
+                "top": top + w["top"] / scale,
+                "bottom": top + (w["top"] + w["height"]) / scale,
+                "line": (top, *w["line"]),
+            })
+    return {p: OcrPage(p, *page_sizes[p], words, rects[p]) for p, words in pages.items()}
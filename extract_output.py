@@ -0,0 +1,128 @@
+# extract_output.py
+from pathlib import Path
+from typing import Dict, List, Optional
+
+EXCEL_MAX_ROWS = 1_048_576  # limite de linhas por planilha do Excel (com cabeçalho)
+
+
+class StreamingXlsxWriter:
+    """
+    Grava linhas numa planilha .xlsx conforme chegam, usando o modo
+    write-only do openpyxl (cada linha vai para um arquivo temporário e não
+    fica em memória). Ao encher uma aba, continua em "Sheet2", "Sheet3"...
+
+    `write_rows` devolve True a cada `flush_every` linhas, para quem chama
+    persistir o próprio estado (ex.: o cache) no mesmo ritmo. O .xlsx em si
+    só fica válido depois de `close()`.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        columns: List[str],
+        flush_every: int = 5000,
+        max_rows_per_sheet: int = EXCEL_MAX_ROWS - 1,
+    ):
+        self.path = path
+        self.columns = columns
+        self.flush_every = flush_every
+        self.max_rows_per_sheet = max_rows_per_sheet
+        self.rows_written = 0
+        self._since_flush = 0
+        self._sheet_rows = 0
+        from openpyxl import Workbook
+
+        self._wb = Workbook(write_only=True)
+        self._ws = None
+        self._new_sheet()
+
+    def _new_sheet(self) -> None:
+        self._ws = self._wb.create_sheet(f"Sheet{len(self._wb.worksheets) + 1}")
+        self._ws.append(self.columns)
+        self._sheet_rows = 0
+
+    def write_rows(self, rows: List[Dict[str, Optional[str]]]) -> bool:
+        for row in rows:
+            if self._sheet_rows >= self.max_rows_per_sheet:
+                self._new_sheet()
+            self._ws.append([row.get(c) for c in self.columns])
+            self._sheet_rows += 1
+        self.rows_written += len(rows)
+        self._since_flush += len(rows)
+        if self._since_flush >= self.flush_every:
+            self._since_flush = 0
+            return True
+        return False
+
+    def close(self) -> None:
+        self._wb.save(str(self.path))
+
+
+# --- saídas tipadas (Parquet / CSV / JSONL) ---
+
+OUTPUT_FORMATS = ("xlsx", "parquet", "csv", "jsonl")
+
+MODALIDADES = ["presencial", "misto", "à distância"]
+
+
+def infer_output_format(path: Path) -> str:
+    """Formato pela extensão do arquivo; sem extensão conhecida, xlsx."""
+    fmt = path.suffix.lower().lstrip(".")
+    return fmt if fmt in OUTPUT_FORMATS else "xlsx"
+
+
+def typed_frame(df):
+    """
+    Aplica o esquema explícito da saída: inteiros anuláveis para página e
+    horas, modalidade categórica com categorias fixas e texto como `string`
+    (linhas de erro viram <NA> sem transformar as colunas em float/object).
+    """
+    import pandas as pd
+
+    out = df.copy()
+    for col in ("pagina", "curso_horas"):
+        out[col] = pd.to_numeric(out[col], errors="coerce").astype("Int64")
+    out["modalidade"] = pd.Categorical(out["modalidade"], categories=MODALIDADES)
+    for col in out.columns:
+        if col not in ("pagina", "curso_horas", "modalidade"):
+            out[col] = out[col].astype("string")
+    return out
+
+
+def write_frame(df, path: Path, fmt: str, partition_by_lotacao: bool = False) -> None:
+    """Grava o DataFrame no formato pedido (xlsx continua sem tipagem extra)."""
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Formato de saída desconhecido: {fmt!r} (use {', '.join(OUTPUT_FORMATS)})")
+    if fmt == "xlsx":
+        df.to_excel(path, index=False)
+        return
+
+    typed = typed_frame(df)
+    if fmt == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise RuntimeError("Saída Parquet requer o pacote 'pyarrow' (pip install pyarrow).") from e
+        if partition_by_lotacao:
+            typed.to_parquet(path, index=False, partition_cols=["lotacao"])
+        else:
+            typed.to_parquet(path, index=False)
+    elif fmt == "csv":
+        typed.to_csv(path, index=False, encoding="utf-8")
+    else:  # jsonl
+        typed.to_json(path, orient="records", lines=True, force_ascii=False)
+
+
+APPEND_FORMATS = ("csv", "jsonl")  # formatos que crescem no fim sem reescrever o arquivo
+
+
+def append_frame(df, path: Path, fmt: str) -> None:
+    """Acrescenta as linhas ao fim de um CSV/JSONL (cria o arquivo, com cabeçalho, se preciso)."""
+    if fmt not in APPEND_FORMATS:
+        raise ValueError(f"Só dá para acrescentar linhas em {', '.join(APPEND_FORMATS)} (pedido: {fmt!r})")
+    typed = typed_frame(df)
+    if fmt == "csv":
+        fresh = not path.exists() or path.stat().st_size == 0
+        typed.to_csv(path, mode="a", header=fresh, index=False, encoding="utf-8")
+    else:  # jsonl
+        typed.to_json(path, orient="records", lines=True, force_ascii=False, mode="a")
@@ -0,0 +1,214 @@
+# extract_rows.py
+"""
+Linhas de saída em forma compacta. Cada PDF vira um `FileRows`: o
+cabeçalho (arquivo, requerente, matrícula, cargo, lotação) fica uma vez
+só e as linhas de curso são colunas (listas) de página, título, horas e
+modalidade. O lote inteiro vira DataFrame por `rows_frame`, com
+categorias nas colunas repetitivas e inteiros anuláveis nas numéricas.
+"""
+from collections.abc import Sequence
+from itertools import chain
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Union
+
+from extract_output import MODALIDADES
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+OUTPUT_COLUMNS = [
+    "arquivo",
+    "pagina",
+    "requerente",
+    "matricula",
+    "cargo",
+    "lotacao",
+    "curso_titulo",
+    "curso_horas",
+    "modalidade",
+    "_erro",
+]
+HEADER_COLUMNS = ("arquivo", "requerente", "matricula", "cargo", "lotacao")  # uma vez por arquivo
+COURSE_COLUMNS = ("pagina", "curso_titulo", "curso_horas", "modalidade")     # uma por linha
+CATEGORY_COLUMNS = HEADER_COLUMNS + ("curso_titulo", "modalidade", "_erro")
+INT_COLUMNS = ("pagina", "curso_horas")
+
+Row = Dict[str, Optional[Union[str, int]]]
+
+
+class FileRows(Sequence):
+    """
+    Linhas de um PDF. Funciona como a lista de dicts de antes (len, índice,
+    iteração: os dicts são montados na hora), mas guarda o cabeçalho uma vez
+    só. Com `erro`, o arquivo falhou e vale como uma linha só, com
+    "arquivo" e "_erro" preenchidos.
+    """
+
+    __slots__ = HEADER_COLUMNS + COURSE_COLUMNS + ("erro",)
+
+    def __init__(
+        self,
+        arquivo: str,
+        requerente: Optional[str] = None,
+        matricula: Optional[str] = None,
+        cargo: Optional[str] = None,
+        lotacao: Optional[str] = None,
+        erro: Optional[str] = None,
+    ):
+        self.arquivo = arquivo
+        self.requerente = requerente
+        self.matricula = matricula
+        self.cargo = cargo
+        self.lotacao = lotacao
+        self.erro = erro
+        self.pagina: List[int] = []
+        self.curso_titulo: List[str] = []
+        self.curso_horas: List[Optional[int]] = []
+        self.modalidade: List[Optional[str]] = []
+
+    @classmethod
+    def error(cls, arquivo: str, msg: str) -> "FileRows":
+        return cls(arquivo, erro=msg)
+
+    def add(self, pagina: int, titulo: str, horas: Optional[int], modalidade: Optional[str]) -> None:
+        self.pagina.append(pagina)
+        self.curso_titulo.append(titulo)
+        self.curso_horas.append(horas)
+        self.modalidade.append(modalidade)
+
+    def __len__(self) -> int:
+        return 1 if self.erro is not None else len(self.pagina)
+
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            return [self[i] for i in range(*k.indices(len(self)))]
+        n = len(self)
+        if k < 0:
+            k += n
+        if not 0 <= k < n:
+            raise IndexError(k)
+        if self.erro is not None:
+            row: Row = {c: None for c in OUTPUT_COLUMNS}
+            row["arquivo"], row["_erro"] = self.arquivo, self.erro
+            return row
+        return {
+            "arquivo": self.arquivo,
+            "pagina": self.pagina[k],
+            "requerente": self.requerente,
+            "matricula": self.matricula,
+            "cargo": self.cargo,
+            "lotacao": self.lotacao,
+            "curso_titulo": self.curso_titulo[k],
+            "curso_horas": self.curso_horas[k],
+            "modalidade": self.modalidade[k],
+        }
+
+    def __iter__(self) -> Iterator[Row]:
+        for k in range(len(self)):
+            yield self[k]
+
+    def __repr__(self) -> str:
+        state = f"erro={self.erro!r}" if self.erro is not None else f"{len(self)} linhas"
+        return f"FileRows({self.arquivo!r}, {state})"
+
+    def intern(self, pool: Dict[str, str]) -> "FileRows":
+        """
+        Troca os textos que se repetem entre arquivos (títulos, cargo,
+        lotação, matrícula, modalidade) pela cópia guardada em `pool`: num
+        lote grande, cada título distinto fica uma vez só na memória.
+        """
+        for c in HEADER_COLUMNS[1:]:
+            value = getattr(self, c)
+            if value is not None:
+                setattr(self, c, pool.setdefault(value, value))
+        self.curso_titulo = [pool.setdefault(t, t) for t in self.curso_titulo]
+        self.modalidade = [m if m is None else pool.setdefault(m, m) for m in self.modalidade]
+        return self
+
+    def column(self, col: str) -> list:
+        """Um valor por linha; as colunas de curso saem sem cópia."""
+        if col in COURSE_COLUMNS:
+            return [None] if self.erro is not None else getattr(self, col)
+        value = self.erro if col == "_erro" else getattr(self, col)
+        return [value] * len(self)
+
+    # --- serialização (cache) ---
+
+    def to_json(self) -> Dict:
+        data: Dict = {c: getattr(self, c) for c in HEADER_COLUMNS}
+        if self.erro is not None:
+            data["_erro"] = self.erro
+        else:
+            data.update({c: getattr(self, c) for c in COURSE_COLUMNS})
+        return data
+
+    @classmethod
+    def from_json(cls, data: Union[Dict, List[Row]]) -> "FileRows":
+        """Inverso de `to_json`; aceita também a lista de dicts do formato antigo."""
+        if isinstance(data, list):
+            return cls.from_dicts(data)
+        rows = cls(*(data.get(c) for c in HEADER_COLUMNS), erro=data.get("_erro"))
+        if rows.erro is None:
+            for c in COURSE_COLUMNS:
+                setattr(rows, c, list(data.get(c) or []))
+        return rows
+
+    @classmethod
+    def from_dicts(cls, dicts: Iterable[Row], arquivo: str = "") -> "FileRows":
+        """Lista de dicts (um arquivo só) para `FileRows`; o cabeçalho vem da primeira linha."""
+        dicts = list(dicts)
+        first = dicts[0] if dicts else {}
+        rows = cls(
+            first.get("arquivo") or arquivo,
+            *(first.get(c) for c in HEADER_COLUMNS[1:]),
+            erro=next((d["_erro"] for d in dicts if d.get("_erro")), None),
+        )
+        if rows.erro is None:
+            for d in dicts:
+                rows.add(d.get("pagina"), d.get("curso_titulo"), d.get("curso_horas"), d.get("modalidade"))
+        return rows
+
+
+def as_file_rows(rows: Union[FileRows, Iterable[Row]], arquivo: str = "") -> FileRows:
+    return rows if isinstance(rows, FileRows) else FileRows.from_dicts(rows, arquivo)
+
+
+def rows_frame(parts: Iterable[FileRows]) -> "pd.DataFrame":
+    """
+    DataFrame de saída com as linhas de vários arquivos, na ordem dada.
+    Cabeçalho, título, modalidade e erro viram `category` (os códigos do
+    cabeçalho saem direto da repetição por arquivo, sem montar uma lista
+    por linha); página e horas, `Int64`.
+    """
+    import numpy as np
+    import pandas as pd
+
+    parts = [p for p in parts if len(p)]
+    counts = np.fromiter((len(p) for p in parts), dtype=np.intp, count=len(parts))
+    data = {}
+    for col in HEADER_COLUMNS + ("_erro",):
+        attr = "erro" if col == "_erro" else col
+        per_file = pd.Categorical([getattr(p, attr) for p in parts])
+        data[col] = pd.Categorical.from_codes(np.repeat(per_file.codes, counts), dtype=per_file.dtype)
+    for col in INT_COLUMNS:
+        data[col] = pd.array(list(chain.from_iterable(p.column(col) for p in parts)), dtype="Int64")
+    data["curso_titulo"] = pd.Categorical(list(chain.from_iterable(p.column("curso_titulo") for p in parts)))
+    data["modalidade"] = pd.Categorical(
+        list(chain.from_iterable(p.column("modalidade") for p in parts)), categories=MODALIDADES
+    )
+    return pd.DataFrame(data, columns=OUTPUT_COLUMNS)
+
+
+def compact_frame(df: "pd.DataFrame") -> "pd.DataFrame":
+    """Mesmos tipos de `rows_frame` para um DataFrame montado de outro jeito (ex.: do banco)."""
+    import pandas as pd
+
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            if col == "modalidade":
+                df[col] = pd.Categorical(df[col], categories=MODALIDADES)
+            else:
+                df[col] = df[col].astype("category")
+    for col in INT_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("Int64")
+    return df
@@ -0,0 +1,376 @@
+# extract_sources.py
+import io
+import mmap
+import os
+import re
+import sys
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path, PurePosixPath
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+ZIP_SUFFIXES = (".zip",)
+TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+ARCHIVE_SUFFIXES = ZIP_SUFFIXES + TAR_SUFFIXES
+MEMBER_SEP = "!"  # chave de cache de um membro: "<pacote>!<membro>"
+
+_OPEN_LIMIT = 4  # pacotes mantidos abertos por processo (índice já lido)
+_open: Dict[Tuple[str, int, int], object] = {}
+# o Prefetcher lê da sua thread: o lock cobre o cache e cada leitura de
+# membro (TarFile não aceita leituras concorrentes, e o despejo não pode
+# fechar um pacote que outra thread está lendo)
+_open_lock = threading.RLock()
+
+
+class PdfSource(NamedTuple):
+    """
+    Um PDF de entrada: arquivo no disco ou membro de um ZIP/TAR, lido
+    direto para a memória (nada é extraído para o disco). `arquivo` é o
+    nome que vai para a saída: caminho relativo à pasta varrida, com o
+    pacote como se fosse uma pasta ("lote.zip/2024/03/x.pdf").
+
+    `data` é o conteúdo já lido (bytes ou mmap) por um `Prefetcher`; com
+    ele, `open`/`read_bytes` não voltam ao disco.
+    """
+
+    path: Path
+    member: Optional[str] = None
+    arquivo: str = ""
+    data: Optional[Union[bytes, mmap.mmap]] = None
+
+    @property
+    def name(self) -> str:
+        return self.arquivo or self.path.name
+
+    @property
+    def stem(self) -> str:
+        """Nome achatado sem ".pdf", seguro para nomes de arquivo (PNGs de depuração)."""
+        name = re.sub(r"\.pdf$", "", self.name, flags=re.I)
+        return re.sub(r"[\\/]+", "__", name)
+
+    @property
+    def key(self) -> str:
+        base = str(self.path.resolve())
+        return base if self.member is None else f"{base}{MEMBER_SEP}{self.member}"
+
+    def signature(self) -> Tuple[int, int]:
+        """(tamanho, carimbo) que muda quando o conteúdo muda: mtime no disco, CRC/mtime no pacote."""
+        if self.member is None:
+            st = self.path.stat()
+            return st.st_size, st.st_mtime_ns
+        with _open_lock:
+            archive = _archive(self.path)
+            if hasattr(archive, "getinfo"):
+                info = archive.getinfo(self.member)
+                return info.file_size, info.CRC
+            info = archive.getmember(self.member)
+            return info.size, int(info.mtime * 1_000_000_000)
+
+    def read_bytes(self) -> bytes:
+        if self.data is not None:
+            return self.data if isinstance(self.data, bytes) else self.data[:]
+        if self.member is None:
+            return self.path.read_bytes()
+        with _open_lock:
+            archive = _archive(self.path)
+            if hasattr(archive, "read"):
+                return archive.read(self.member)
+            f = archive.extractfile(self.member)
+            if f is None:
+                raise OSError(f"{self.name}: membro não é um arquivo")
+            return f.read()
+
+    def open(self) -> Union[Path, io.BytesIO, mmap.mmap]:
+        """O que `pdfplumber.open` aceita: o caminho, o conteúdo já lido ou os bytes do membro em memória."""
+        if isinstance(self.data, mmap.mmap):
+            self.data.seek(0)
+            return self.data
+        if self.data is None and self.member is None:
+            return self.path
+        return io.BytesIO(self.read_bytes())
+
+    def release(self) -> None:
+        """Solta o mmap de `data` (bytes ficam com o coletor de lixo)."""
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+
+def as_source(pdf: Union[Path, str, PdfSource]) -> PdfSource:
+    return pdf if isinstance(pdf, PdfSource) else PdfSource(Path(pdf))
+
+
+def is_archive(path: Path) -> bool:
+    return path.name.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def _archive(path: Path):
+    """
+    ZipFile/TarFile aberto (e com o índice lido) uma vez por processo. Quem
+    usa o pacote devolvido segura `_open_lock` até terminar a leitura.
+    """
+    st = path.stat()
+    key = (str(path.resolve()), st.st_size, st.st_mtime_ns)
+    with _open_lock:
+        archive = _open.get(key)
+        if archive is None:
+            if path.name.lower().endswith(ZIP_SUFFIXES):
+                import zipfile
+
+                archive = zipfile.ZipFile(path)
+            else:
+                import tarfile
+
+                archive = tarfile.open(path)
+                archive.getmembers()  # varre uma vez; depois getmember/extractfile vão direto
+            while len(_open) >= _OPEN_LIMIT:
+                _open.pop(next(iter(_open))).close()
+            _open[key] = archive
+        return archive
+
+
+def close_archives() -> None:
+    with _open_lock:
+        while _open:
+            _open.popitem()[1].close()
+
+
+def archive_members(path: Path, prefix: str = "") -> List[PdfSource]:
+    """PDFs dentro de um ZIP/TAR, em qualquer subpasta do pacote."""
+    with _open_lock:
+        archive = _archive(path)
+        if hasattr(archive, "infolist"):
+            names = [i.filename for i in archive.infolist() if not i.is_dir()]
+        else:
+            names = [m.name for m in archive.getmembers() if m.isfile()]
+    arquivo = f"{prefix}{path.name}"
+    return [
+        PdfSource(path, name, f"{arquivo}/{PurePosixPath(name).as_posix().lstrip('/')}")
+        for name in names
+        if name.lower().endswith(".pdf")
+    ]
+
+
+def _relative(path: Path, root: Optional[Path]) -> str:
+    if root is not None:
+        try:
+            return path.resolve().relative_to(root.resolve()).as_posix()
+        except ValueError:
+            pass
+    return path.name
+
+
+def list_sources(input_dir: Path, recursive: bool = False, archives: bool = False) -> List[PdfSource]:
+    """
+    PDFs de `input_dir`, em ordem de `arquivo`. Com `recursive`, desce nas
+    subpastas; com `archives`, abre os ZIP/TAR encontrados e lista os PDFs
+    de dentro deles.
+    """
+    if not recursive and not archives:  # caminho de sempre, sem custo extra
+        return [PdfSource(p, None, p.name) for p in sorted(input_dir.iterdir()) if p.name.lower().endswith(".pdf")]
+
+    found: List[PdfSource] = []
+    walk = os.walk(input_dir) if recursive else [next(os.walk(input_dir))]
+    for folder, _, names in walk:
+        prefix = Path(os.path.relpath(folder, input_dir)).as_posix()
+        prefix = "" if prefix == "." else prefix + "/"
+        for name in names:
+            path = Path(folder) / name
+            if name.lower().endswith(".pdf"):
+                found.append(PdfSource(path, None, prefix + name))
+            elif archives and is_archive(path):
+                found.extend(archive_members(path, prefix))
+    found.sort(key=lambda s: s.arquivo)
+    return found
+
+
+def expand_sources(
+    items: Iterable[Union[Path, str, PdfSource]], root: Optional[Path] = None
+) -> List[PdfSource]:
+    """
+    Lista explícita de entradas: PDFs, pacotes (viram os PDFs de dentro) ou
+    `PdfSource` prontos, na ordem dada. `arquivo` fica relativo a `root`
+    quando o caminho está dentro dela.
+    """
+    out: List[PdfSource] = []
+    for item in items:
+        if isinstance(item, PdfSource):
+            out.append(item)
+            continue
+        path = Path(item)
+        rel = _relative(path, root)
+        if is_archive(path):
+            out.extend(archive_members(path, rel[: -len(path.name)]))
+        else:
+            out.append(PdfSource(path, None, rel))
+    return out
+
+
+def read_file_list(list_path: Union[Path, str]) -> List[Path]:
+    """Um caminho por linha ("-" lê da entrada padrão); linhas vazias e "#..." são ignoradas."""
+    text = sys.stdin.read() if str(list_path) == "-" else Path(list_path).read_text(encoding="utf-8")
+    return [Path(line.strip()) for line in text.splitlines() if line.strip() and not line.lstrip().startswith("#")]
+
+
+# --- leitura antecipada ---
+
+DEFAULT_PREFETCH_MB = 256  # teto de bytes lidos e ainda não entregues
+NETWORK_FS = ("nfs", "nfs4", "cifs", "smb3", "smbfs", "afs", "9p", "ceph", "glusterfs", "lustre", "fuse.sshfs", "davfs")
+
+
+@lru_cache(maxsize=1)
+def _mounts() -> Tuple[Tuple[str, str], ...]:
+    """(ponto de montagem, tipo) de /proc/self/mounts, do mais longo ao mais curto."""
+    try:
+        with open("/proc/self/mounts", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return ()
+    found = []
+    for line in lines:
+        parts = line.split()
+        if len(parts) >= 3:
+            found.append((parts[1].replace("\\040", " "), parts[2]))
+    return tuple(sorted(found, key=lambda m: len(m[0]), reverse=True))
+
+
+def is_network_path(path: Path) -> bool:
+    """
+    O arquivo está num compartilhamento de rede (SMB/NFS...)? Na dúvida,
+    responde que sim: aí o conteúdo é copiado para a memória, que não
+    quebra se o arquivo remoto mudar no meio da leitura (um mmap quebraria).
+    """
+    resolved = str(path.resolve())
+    if os.name == "nt":
+        if resolved.startswith("\\\\"):
+            return True
+        import ctypes
+
+        return ctypes.windll.kernel32.GetDriveTypeW(resolved[:3]) == 4  # DRIVE_REMOTE
+    for mount, fstype in _mounts():
+        if resolved == mount or resolved.startswith(mount.rstrip("/") + "/"):
+            return fstype in NETWORK_FS
+    return True
+
+
+class Prefetcher:
+    """
+    Lê os próximos `depth` PDFs de `sources` numa thread de E/S enquanto o
+    atual é processado, sem passar de `memory_mb` lidos e ainda não
+    entregues. `take(source)` devolve o `PdfSource` com `data` preenchido
+    (espera a leitura, se ainda não acabou), então cada arquivo sai do
+    compartilhamento uma vez só, mesmo com OCR (que reabre o PDF).
+
+    Com `use_mmap`, arquivos em disco local são mapeados (mmap, com aviso
+    de leitura antecipada ao kernel) em vez de copiados; os de rede sempre
+    vão para a memória. mmap só serve no próprio processo: os
+    trabalhadores do modo paralelo recebem bytes.
+
+    Os pedidos vêm na ordem de `sources`; os que forem pulados (ex.: já
+    estavam no cache) são descartados. Arquivos maiores que `memory_mb`,
+    ou que falharem na leitura, saem sem `data` e são lidos do jeito
+    normal por quem os processa.
+    """
+
+    def __init__(
+        self, sources: List[PdfSource], depth: int, memory_mb: int = DEFAULT_PREFETCH_MB, use_mmap: bool = False
+    ):
+        self.sources = list(sources)
+        self.depth = max(1, depth)
+        self.budget = max(1, memory_mb) * 1024 * 1024
+        self.use_mmap = use_mmap
+        self._pos: Dict[PdfSource, int] = {}
+        for pos, source in enumerate(self.sources):
+            self._pos.setdefault(source, pos)
+        self._ready: Dict[int, PdfSource] = {}
+        self._taken = 0  # próxima posição que o consumidor ainda vai pedir
+        self._held = 0   # bytes prontos e não entregues
+        self._stop = False
+        self._cond = threading.Condition()
+        self.loaded = 0
+        self.bytes_read = 0
+        self.waited = 0.0  # s que o consumidor ficou esperando a E/S
+        self._thread = threading.Thread(target=self._run, name="prefetch", daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def _size(source: PdfSource) -> int:
+        return len(source.data) if source.data is not None else 0
+
+    def _load(self, source: PdfSource) -> PdfSource:
+        if self.use_mmap and source.member is None and not is_network_path(source.path):
+            with open(source.path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if hasattr(mmap, "MADV_WILLNEED"):
+                mm.madvise(mmap.MADV_WILLNEED)
+            return source._replace(data=mm)
+        return source._replace(data=source.read_bytes())
+
+    def _run(self) -> None:
+        for pos, source in enumerate(self.sources):
+            try:
+                size = source.signature()[0]
+            except (OSError, KeyError):
+                size = 0
+            with self._cond:
+                while not self._stop and pos >= self._taken and (
+                    pos - self._taken >= self.depth or (self._held and self._held + size > self.budget)
+                ):
+                    self._cond.wait()
+                if self._stop:
+                    return
+                skip = pos < self._taken
+            if skip:
+                continue
+            item = source
+            if size <= self.budget:
+                try:
+                    item = self._load(source)
+                except (OSError, ValueError, KeyError):
+                    item = source  # o erro aparece de novo (e direito) na leitura normal
+            with self._cond:
+                if self._stop or pos < self._taken:
+                    item.release()
+                    if self._stop:
+                        return
+                    continue
+                self._ready[pos] = item
+                self._held += self._size(item)
+                self.loaded += item.data is not None
+                self.bytes_read += self._size(item)
+                self._cond.notify_all()
+
+    def take(self, source: PdfSource) -> PdfSource:
+        pos = self._pos.get(source)
+        if pos is None:
+            return source
+        t0 = time.perf_counter()
+        with self._cond:
+            if pos < self._taken:
+                return source
+            for skipped in range(self._taken, pos):
+                item = self._ready.pop(skipped, None)
+                if item is not None:
+                    self._held -= self._size(item)
+                    item.release()
+            self._taken = pos
+            self._cond.notify_all()
+            while pos not in self._ready and not self._stop and self._thread.is_alive():
+                self._cond.wait(0.5)
+            item = self._ready.pop(pos, source)
+            self._held -= self._size(item)
+            self._taken = pos + 1
+            self._cond.notify_all()
+        self.waited += time.perf_counter() - t0
+        return item
+
+    def close(self) -> None:
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        self._thread.join(5)
+        with self._cond:
+            for item in self._ready.values():
+                item.release()
+            self._ready.clear()
+            self._held = 0
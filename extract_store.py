@@ -0,0 +1,216 @@
+# extract_store.py
+"""
+Banco local (SQLite) com as linhas de todas as execuções: cada
+`run_batch(store_path=...)` acrescenta só as suas linhas, com um número de
+execução, e a planilha de saída vira uma consulta sobre ele.
+
+    python extract_store.py resultados.sqlite --runs
+    python extract_store.py resultados.sqlite --matricula 12345 --output cursos.xlsx
+    python extract_store.py resultados.sqlite --lotacao SECOF --latest
+"""
+import argparse
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Sequence
+
+from extract_rows import compact_frame
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+STORE_COLUMNS = (
+    "arquivo", "pagina", "requerente", "matricula", "cargo", "lotacao",
+    "curso_titulo", "curso_horas", "modalidade", "_erro",
+)
+FILTER_COLUMNS = ("matricula", "arquivo", "lotacao", "modalidade")  # colunas com índice
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id       INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at   TEXT NOT NULL,
+    finished_at  TEXT,
+    status       TEXT NOT NULL,
+    input_dir    TEXT,
+    fingerprint  TEXT,
+    version      TEXT,
+    files        INTEGER,
+    rows         INTEGER
+);
+CREATE TABLE IF NOT EXISTS rows (
+    run_id        INTEGER NOT NULL REFERENCES runs(run_id),
+    arquivo       TEXT,
+    pagina        INTEGER,
+    requerente    TEXT,
+    matricula     TEXT,
+    cargo         TEXT,
+    lotacao       TEXT,
+    curso_titulo  TEXT,
+    curso_horas   INTEGER,
+    modalidade    TEXT,
+    _erro         TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_rows_run ON rows (run_id);
+CREATE INDEX IF NOT EXISTS ix_rows_matricula ON rows (matricula);
+CREATE INDEX IF NOT EXISTS ix_rows_arquivo ON rows (arquivo, run_id);
+CREATE INDEX IF NOT EXISTS ix_rows_lotacao ON rows (lotacao);
+CREATE INDEX IF NOT EXISTS ix_rows_modalidade ON rows (modalidade);
+"""
+
+
+def default_store_path(output_xlsx: Path) -> Path:
+    """Banco ao lado da planilha: 'dados_extraidos.store.sqlite'."""
+    return output_xlsx.with_name(output_xlsx.stem + ".store.sqlite")
+
+
+def _now() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+class ResultStore:
+    """
+    Linhas extraídas, só acrescentadas (nunca reescritas), uma execução por
+    `run_id`. Os índices em matrícula, arquivo, lotação e modalidade deixam
+    as consultas em milissegundos mesmo com milhões de linhas; uma execução
+    nova custa só as próprias linhas.
+    """
+
+    def __init__(self, db_path: Path, commit_every: int = 5000, timeout: float = 30.0):
+        self.db_path = db_path
+        self.commit_every = commit_every
+        self._pending = 0
+        self.conn = sqlite3.connect(str(db_path), timeout=timeout)
+        self.conn.execute("PRAGMA journal_mode=WAL")  # leitores não esperam a escrita
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+
+    # --- escrita ---
+
+    def begin_run(
+        self, input_dir: Optional[str] = None, fingerprint: Optional[str] = None, version: Optional[str] = None
+    ) -> int:
+        cur = self.conn.execute(
+            "INSERT INTO runs (started_at, status, input_dir, fingerprint, version) VALUES (?, 'running', ?, ?, ?)",
+            (_now(), input_dir, fingerprint, version),
+        )
+        self.conn.commit()
+        return int(cur.lastrowid)
+
+    def append(self, run_id: int, rows: Sequence[Dict[str, Optional[str]]]) -> None:
+        self.conn.executemany(
+            f"INSERT INTO rows (run_id, {', '.join(STORE_COLUMNS)}) VALUES (?{', ?' * len(STORE_COLUMNS)})",
+            [(run_id, *(row.get(c) for c in STORE_COLUMNS)) for row in rows],
+        )
+        self._pending += len(rows)
+        if self._pending >= self.commit_every:
+            self.conn.commit()
+            self._pending = 0
+
+    def finish_run(self, run_id: int, files: int, status: str = "done") -> None:
+        (rows,) = self.conn.execute("SELECT COUNT(*) FROM rows WHERE run_id = ?", (run_id,)).fetchone()
+        self.conn.execute(
+            "UPDATE runs SET finished_at = ?, status = ?, files = ?, rows = ? WHERE run_id = ?",
+            (_now(), status, files, rows, run_id),
+        )
+        self.conn.commit()
+        self._pending = 0
+
+    # --- consulta ---
+
+    def _where(self, run_id: Optional[int], latest: bool, filters: Dict[str, Optional[str]]):
+        unknown = set(filters) - set(FILTER_COLUMNS)
+        if unknown:
+            raise ValueError(f"Filtro desconhecido: {', '.join(sorted(unknown))} (use {', '.join(FILTER_COLUMNS)})")
+        clauses, params = [], []
+        for col, value in filters.items():
+            if value is not None:
+                clauses.append(f"r.{col} = ?")
+                params.append(value)
+        if run_id is not None:
+            clauses.append("r.run_id = ?")
+            params.append(run_id)
+        if latest:  # de cada arquivo, só a execução mais recente que o leu
+            clauses.append("r.run_id = (SELECT MAX(l.run_id) FROM rows l WHERE l.arquivo = r.arquivo)")
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def iter_rows(
+        self, run_id: Optional[int] = None, latest: bool = False, chunk: int = 5000, **filters
+    ) -> Iterator[List[Dict[str, Optional[str]]]]:
+        """Linhas (dicts) em blocos de `chunk`, na ordem em que foram gravadas."""
+        where, params = self._where(run_id, latest, filters)
+        cur = self.conn.execute(f"SELECT {', '.join(STORE_COLUMNS)} FROM rows r{where} ORDER BY r.rowid", params)
+        while True:
+            batch = cur.fetchmany(chunk)
+            if not batch:
+                return
+            yield [dict(zip(STORE_COLUMNS, values)) for values in batch]
+
+    def frame(self, run_id: Optional[int] = None, latest: bool = False, **filters) -> "pd.DataFrame":
+        """
+        Linhas como DataFrame (colunas de saída, na ordem de gravação, com os
+        tipos de `extract_rows.compact_frame`).
+        `run_id` restringe a uma execução; `latest` fica só com a leitura mais
+        recente de cada arquivo; os demais filtros são por igualdade em
+        matrícula, arquivo, lotação e modalidade.
+        """
+        import pandas as pd
+
+        where, params = self._where(run_id, latest, filters)
+        return compact_frame(pd.read_sql_query(
+            f"SELECT {', '.join(STORE_COLUMNS)} FROM rows r{where} ORDER BY r.rowid", self.conn, params=params
+        ))
+
+    def runs(self) -> List[Dict[str, object]]:
+        cur = self.conn.execute("SELECT * FROM runs ORDER BY run_id")
+        names = [d[0] for d in cur.description]
+        return [dict(zip(names, values)) for values in cur.fetchall()]
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from extract_output import OUTPUT_FORMATS, infer_output_format, write_frame
+
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("store", type=Path, help="banco criado por run_batch(store_path=...) / --store")
+    ap.add_argument("--runs", action="store_true", help="lista as execuções gravadas")
+    ap.add_argument("--run", type=int, default=None, help="só as linhas desta execução")
+    ap.add_argument("--latest", action="store_true", help="de cada arquivo, só a leitura mais recente")
+    for col in FILTER_COLUMNS:
+        ap.add_argument(f"--{col}", default=None, help=f"filtra por {col} (igualdade)")
+    ap.add_argument("--output", type=Path, default=None, help="grava o resultado (xlsx/parquet/csv/jsonl)")
+    ap.add_argument("--format", choices=OUTPUT_FORMATS, default=None)
+    args = ap.parse_args(argv)
+
+    if not args.store.exists():
+        print(f"Banco não encontrado: {args.store}", file=sys.stderr)
+        return 1
+    store = ResultStore(args.store)
+    try:
+        if args.runs:
+            for run in store.runs():
+                print(f"{run['run_id']:5d}  {run['started_at']}  {run['status']:9s}"
+                      f"  {run['files'] or 0:7d} arquivos  {run['rows'] or 0:9d} linhas  {run['input_dir'] or ''}")
+            return 0
+        import pandas  # noqa: F401  (fora da medição)
+
+        t0 = time.perf_counter()
+        df = store.frame(run_id=args.run, latest=args.latest, **{c: getattr(args, c) for c in FILTER_COLUMNS})
+        elapsed = time.perf_counter() - t0
+    finally:
+        store.close()
+
+    if args.output:
+        write_frame(df, args.output, args.format or infer_output_format(args.output))
+        print(f"{len(df)} linhas em {1000 * elapsed:.1f} ms -> {args.output}")
+    else:
+        print(df.to_string(index=False, max_rows=50))
+        print(f"{len(df)} linhas em {1000 * elapsed:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
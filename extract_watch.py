@@ -0,0 +1,270 @@
+# extract_watch.py
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from extract_cache import ExtractionCache, default_cache_path, default_layout_cache_path, default_ocr_cache_path
+from extract_core import (
+    DEFAULT_FILE_TIMEOUT,
+    EXTRACTOR_VERSION,
+    WorkerPool,
+    iter_batch,
+    params_fingerprint,
+)
+from extract_ocr import ocr_available
+from extract_output import APPEND_FORMATS, append_frame, infer_output_format
+from extract_rows import rows_frame
+
+DEFAULT_SETTLE_S = 2.0  # arquivo só entra depois de ficar esse tempo sem mudar
+DEFAULT_POLL_S = 2.0    # intervalo da varredura quando não há inotify
+_WAKE_S = 1.0           # acorda de tempos em tempos só para olhar o `cancel`
+
+# --- inotify (Linux) via ctypes, sem dependência externa ---
+
+_IN_MODIFY = 0x002
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len (seguido do nome)
+
+
+class _Inotify:
+    def __init__(self, folder: Path):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falhou")
+        mask = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+        if libc.inotify_add_watch(fd, os.fsencode(str(folder)), mask) < 0:
+            err = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(err, f"inotify_add_watch falhou em {folder}")
+        self.fd = fd
+
+    def read(self, timeout: Optional[float]) -> Set[str]:
+        """Nomes que tiveram eventos; bloqueia (sem gastar CPU) até `timeout`."""
+        names: Set[str] = set()
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        while ready:
+            try:
+                buf = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            pos = 0
+            while pos + _EVENT.size <= len(buf):
+                _, _, _, length = _EVENT.unpack_from(buf, pos)
+                pos += _EVENT.size
+                name = buf[pos:pos + length].rstrip(b"\0")
+                pos += length
+                if name:
+                    names.add(os.fsdecode(name))
+        return names
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def _signature(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+class FolderWatcher:
+    """
+    Informa quais PDFs da pasta podem ter mudado. Usa inotify no Linux
+    (acorda só quando algo acontece) e, nos demais casos, compara uma
+    varredura da pasta a cada `poll_interval`.
+    """
+
+    def __init__(self, folder: Path, poll_interval: float = DEFAULT_POLL_S, use_inotify: bool = True):
+        self.folder = folder
+        self.poll_interval = poll_interval
+        self._inotify: Optional[_Inotify] = None
+        if use_inotify and sys.platform.startswith("linux"):
+            try:
+                self._inotify = _Inotify(folder)
+            except (OSError, AttributeError):
+                self._inotify = None
+        self._seen = self._scan()
+        self._next_poll = time.monotonic() + poll_interval
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if self._inotify else "polling"
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        found = {}
+        for p in self.folder.iterdir():
+            if p.suffix.lower() != ".pdf":
+                continue
+            sig = _signature(p)
+            if sig:
+                found[p] = sig
+        return found
+
+    def existing(self) -> List[Path]:
+        return sorted(self._seen)
+
+    def wait(self, timeout: Optional[float]) -> Set[Path]:
+        """Espera até `timeout` s e devolve os PDFs criados/alterados nesse meio-tempo."""
+        if self._inotify:
+            names = self._inotify.read(timeout)
+            return {self.folder / n for n in names if Path(n).suffix.lower() == ".pdf"}
+
+        delay = max(0.0, self._next_poll - time.monotonic())
+        if timeout is not None and timeout < delay:
+            time.sleep(timeout)
+            return set()
+        time.sleep(delay)
+        self._next_poll = time.monotonic() + self.poll_interval
+        current = self._scan()
+        changed = {p for p, sig in current.items() if self._seen.get(p) != sig}
+        self._seen = current
+        return changed
+
+    def close(self) -> None:
+        if self._inotify:
+            self._inotify.close()
+
+
+def watch_folder(
+    input_dir: Path,
+    output: Path,
+    course_pages: List[int],
+    course_y_range: Tuple[float, float],
+    checkbox_columns: Dict[str, Tuple[float, float]],
+    y_tolerance: int,
+    header_pages: Optional[List[int]] = None,
+    workers: Optional[int] = None,
+    file_timeout: Optional[float] = DEFAULT_FILE_TIMEOUT,
+    max_memory_mb: Optional[int] = None,
+    cache_path: Optional[Path] = None,
+    output_format: Optional[str] = None,
+    ocr: bool = True,
+    ocr_cache_path: Optional[Path] = None,
+    header_y_range: Optional[Tuple[float, float]] = None,
+    auto_layout: bool = False,
+    settle: float = DEFAULT_SETTLE_S,
+    poll_interval: float = DEFAULT_POLL_S,
+    use_inotify: bool = True,
+    on_event: Optional[Callable[[Dict], None]] = None,
+    cancel=None,
+) -> int:
+    """
+    Fica observando `input_dir` até `cancel` ser acionado. Cada PDF novo ou
+    alterado entra depois de `settle` s sem mudar de tamanho/mtime, passa
+    por `iter_batch` com um `WorkerPool` que continua aquecido entre um
+    arquivo e outro e tem as linhas acrescentadas ao fim de `output` (csv
+    ou jsonl). Só entra na saída o par (caminho, conteúdo) que ainda não
+    foi gravado: um `touch` não duplica linhas e um PDF copiado com outro
+    nome sai do cache sem reprocessar. Os PDFs que já estavam na pasta e
+    estão no cache contam como gravados por uma execução anterior. Devolve
+    quantos PDFs foram acrescentados.
+
+    Com `ocr`, o Tesseract de cada recorte fica em `ocr_cache_path` (por
+    padrão "<saída>.ocr.sqlite", como em `run_batch`).
+
+    `on_event` recebe {"event": "watch", "mode", "dir"} ao começar e depois
+    os eventos de `iter_batch` de cada leva.
+    """
+    fmt = output_format or infer_output_format(output)
+    if fmt not in APPEND_FORMATS:
+        raise ValueError(f"O modo de observação acrescenta linhas e precisa de saída {' ou '.join(APPEND_FORMATS)}")
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    ocr = ocr and ocr_available()
+    ocr_cache_path = (ocr_cache_path or default_ocr_cache_path(output)) if ocr else None
+    cache = ExtractionCache(
+        cache_path or default_cache_path(output),
+        params_fingerprint(
+            course_pages, course_y_range, checkbox_columns, y_tolerance, header_pages, ocr, header_y_range, auto_layout
+        ),
+        EXTRACTOR_VERSION,
+    )
+    layout_cache_path = default_layout_cache_path(output) if auto_layout else None
+    watcher = FolderWatcher(input_dir, poll_interval, use_inotify)
+    worker_pool = WorkerPool(workers, max_memory_mb) if workers > 1 else None
+    cancelled = lambda: cancel is not None and cancel.is_set()  # noqa: E731
+
+    # arquivo -> (assinatura, desde quando está assim); os que já estavam na
+    # pasta contam a partir do mtime, então entram sem esperar
+    pending: Dict[Path, Tuple[Tuple[int, int], float]] = {}
+    appended: Dict[Path, str] = {}  # caminho -> hash do conteúdo já gravado na saída
+    for p in watcher.existing():
+        sig = _signature(p)
+        if not sig:
+            continue
+        if cache.contains(p):
+            appended[p] = cache.digest(p)
+        else:
+            pending[p] = (sig, sig[1] / 1e9)
+
+    processed = 0
+    if on_event:
+        on_event({"event": "watch", "mode": watcher.mode, "dir": str(input_dir)})
+    try:
+        while not cancelled():
+            now = time.time()
+            ready = []
+            for p, (sig, since) in list(pending.items()):
+                cur = _signature(p)
+                if cur is None:
+                    del pending[p]  # sumiu (movido/apagado) antes de estabilizar
+                elif cur != sig:
+                    pending[p] = (cur, now)
+                elif now - since >= settle:
+                    ready.append(p)
+                    del pending[p]
+
+            if ready:
+                ready.sort()
+                events = iter_batch(
+                    input_dir, course_pages, course_y_range, checkbox_columns, y_tolerance,
+                    header_pages=header_pages, workers=workers, file_timeout=file_timeout,
+                    max_memory_mb=max_memory_mb, cache=cache, cancel=cancel, ocr=ocr,
+                    ocr_cache_path=ocr_cache_path, header_y_range=header_y_range, files=ready,
+                    worker_pool=worker_pool, auto_layout=auto_layout, layout_cache_path=layout_cache_path,
+                )
+                for ev in events:
+                    if on_event:
+                        on_event(ev)
+                    if ev["event"] != "file":
+                        continue
+                    try:
+                        sha = cache.digest(ev["path"])
+                    except OSError:
+                        sha = None  # sumiu depois de lido: grava mesmo assim
+                    if sha is None or appended.get(ev["path"]) != sha:
+                        append_frame(rows_frame([ev["rows"]]), output, fmt)
+                        appended[ev["path"]] = sha
+                        processed += 1
+                cache.commit()
+                continue
+
+            # sem pendências, dorme até o próximo evento; com pendências, só até a próxima checagem
+            if pending:
+                wait = min(max(0.05, since + settle - now) for _, since in pending.values())
+            else:
+                wait = _WAKE_S
+            for p in watcher.wait(min(wait, _WAKE_S)):
+                sig = _signature(p)
+                if sig and (p not in pending or pending[p][0] != sig):
+                    pending[p] = (sig, time.time())
+    finally:
+        watcher.close()
+        if worker_pool:
+            worker_pool.close()
+        cache.close()
+    return processed
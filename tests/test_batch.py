@@ -0,0 +1,29 @@
+# tests/test_batch.py
+import threading
+
+import pytest
+
+from benchmarks.synthetic import generate_corpus
+from extract_core import DEFAULT_CHECKBOX_COLUMNS, DEFAULT_COURSE_Y_RANGE, DEFAULT_Y_TOLERANCE, run_batch
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_cancel_counts_only_finished_files(tmp_path, workers):
+    corpus = tmp_path / "pdfs"
+    generate_corpus(corpus, 8, courses=(1, 3))
+    cancel = threading.Event()
+    finished = []
+
+    def on_event(ev):
+        if ev["event"] == "file":
+            finished.append(ev["arquivo"])
+            if len(finished) == 2:
+                cancel.set()
+
+    df = run_batch(
+        corpus, tmp_path / "saida.csv", [1], DEFAULT_COURSE_Y_RANGE, DEFAULT_CHECKBOX_COLUMNS,
+        DEFAULT_Y_TOLERANCE, workers=workers, ocr=False, on_event=on_event, cancel=cancel,
+    )
+    assert df.attrs["cancelled"]
+    assert len(finished) < 8
+    assert (df.attrs["cache_hits"], df.attrs["cache_misses"]) == (0, len(finished))
@@ -0,0 +1,38 @@
+# tests/test_checkbox.py
+from benchmarks.synthetic import PAGE_H, write_pdf
+from extract_core import DEFAULT_CHECKBOX_COLUMNS, DEFAULT_COURSE_Y_RANGE, DEFAULT_Y_TOLERANCE, process_pdf
+
+
+def _extract(tmp_path, items):
+    pdf = tmp_path / "papeleta.pdf"
+    write_pdf(pdf, [items])
+    rows = process_pdf(pdf, [1], DEFAULT_COURSE_Y_RANGE, DEFAULT_CHECKBOX_COLUMNS, DEFAULT_Y_TOLERANCE)
+    return [(r["curso_titulo"], r["modalidade"]) for r in rows]
+
+
+def _x(col: str, y0: float, y1: float):
+    """X feito com dois traços, de y0 a y1 no referencial do PDF (origem embaixo)."""
+    x0, x1 = DEFAULT_CHECKBOX_COLUMNS[col]
+    top0, top1 = PAGE_H - y0, PAGE_H - y1
+    return [("line", x0 + 4, top0, x1 - 4, top1), ("line", x0 + 4, top1, x1 - 4, top0)]
+
+
+def test_mark_drawn_with_lines(tmp_path):
+    # o índice põe os traços pelo meio de y0/y1 (origem embaixo); os filtros
+    # das visões da página usam o mesmo referencial
+    items = [
+        ("text", 60, 300, 10, "Curso de Gestão Pública 20h"),
+        ("text", 60, 340, 10, "Oficina de Redação Oficial 8h"),
+        *_x("misto", 300, 312),
+        *_x("misto", 340, 352),
+    ]
+    assert _extract(tmp_path, items) == [
+        ("Curso de Gestão Pública", "misto"),
+        ("Oficina de Redação Oficial", "misto"),
+    ]
+
+
+def test_no_mark(tmp_path):
+    assert _extract(tmp_path, [("text", 60, 300, 10, "Curso de Gestão Pública 20h")]) == [
+        ("Curso de Gestão Pública", None),
+    ]
@@ -0,0 +1,45 @@
+# tests/test_header.py
+import pdfplumber
+
+from benchmarks.synthetic import write_pdf
+from extract_core import HeaderScanner, extract_header, extract_header_from_pdf
+
+
+def _text_page(*lines):
+    return [("text", 40, 80 + 15 * k, 10, line) for k, line in enumerate(lines)]
+
+
+def test_requerente_on_a_later_page_wins_over_nome(tmp_path):
+    pdf_path = tmp_path / "papeleta.pdf"
+    write_pdf(pdf_path, [
+        _text_page("Nome: FULANO DE TAL", "Matrícula: 12345", "Cargo: Auditor", "Lotação: SECOF"),
+        _text_page("Requerente: BELTRANO DA SILVA"),
+    ])
+    with pdfplumber.open(pdf_path) as pdf:
+        header = extract_header_from_pdf(pdf)
+    assert header == {
+        "requerente": "BELTRANO DA SILVA",
+        "matricula": "12345",
+        "cargo": "Auditor",
+        "lotacao": "SECOF",
+    }
+
+
+def test_scanner_matches_whole_text_across_page_breaks():
+    pages = [
+        ["Requerente: MARIA", "Lotação:"],      # valor da lotação só na página seguinte
+        ["Ramal: 12", "SEGEP - 107", "Cargo:"],
+        ["Analista", "Matrícula: 999"],
+    ]
+    scanner = HeaderScanner()
+    for lines in pages:
+        scanner.feed(lines)
+    assert scanner.result() == extract_header("\n".join("\n".join(p) for p in pages))
+    assert scanner.result()["lotacao"] == "SEGEP"
+    assert scanner.result()["cargo"] == "Analista"
+
+
+def test_scanner_stops_once_nothing_can_change():
+    scanner = HeaderScanner()
+    scanner.feed(["Requerente: MARIA", "Matrícula: 1", "Cargo: Analista", "Lotação: SEGEP", "x", "y"])
+    assert scanner.done
@@ -0,0 +1,30 @@
+# tests/test_memory.py
+import random
+
+from benchmarks.synthetic import papeleta_page, write_pdf
+from extract_core import DEFAULT_CHECKBOX_COLUMNS, DEFAULT_COURSE_Y_RANGE, DEFAULT_Y_TOLERANCE, process_pdf
+
+ENVELOPE_MB = 4.0  # folga entre o arquivo curto e o longo
+
+
+def _peak_mb(path, n_pages):
+    rnd = random.Random(1)
+    # sem "Cargo:": o cabeçalho nunca fica completo e todas as páginas são lidas
+    pages = [
+        [item for item in papeleta_page(rnd, 20, header=(i == 0)) if not str(item[4]).startswith("Cargo")]
+        for i in range(n_pages)
+    ]
+    write_pdf(path, pages)
+    timings = {}
+    process_pdf(
+        path, [1], DEFAULT_COURSE_Y_RANGE, DEFAULT_CHECKBOX_COLUMNS, DEFAULT_Y_TOLERANCE,
+        trace_memory=True, timings=timings,
+    )
+    return timings["peak_mem_mb"]
+
+
+def test_header_search_memory_does_not_grow_with_pages(tmp_path):
+    _peak_mb(tmp_path / "aquece.pdf", 2)  # importações preguiçosas fora da medida
+    short = _peak_mb(tmp_path / "curto.pdf", 5)
+    long = _peak_mb(tmp_path / "longo.pdf", 40)
+    assert long < short + ENVELOPE_MB, (short, long)
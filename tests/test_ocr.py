@@ -0,0 +1,40 @@
+# tests/test_ocr.py
+from PIL import Image, ImageDraw
+
+from extract_ocr import ink_boxes
+
+BOX = 40      # lado do checkbox, em pixels (~3,4 mm a 300 dpi)
+BORDER = 3    # espessura do contorno
+COLUMNS = [(20, 80), (120, 180), (220, 280)]
+
+
+def _page(marks=()):
+    """Uma faixa com três checkboxes vazios; `marks` diz em quais colunas desenhar um X."""
+    img = Image.new("L", (300, 100), 255)
+    draw = ImageDraw.Draw(img)
+    for i, (c0, _) in enumerate(COLUMNS):
+        x0, y0 = c0 + 10, 30
+        x1, y1 = x0 + BOX, y0 + BOX
+        draw.rectangle((x0, y0, x1, y1), outline=0, width=BORDER)
+        if i in marks:
+            draw.line((x0 + 6, y0 + 6, x1 - 6, y1 - 6), fill=0, width=4)
+            draw.line((x0 + 6, y1 - 6, x1 - 6, y0 + 6), fill=0, width=4)
+    return img
+
+
+def test_empty_boxes_are_not_marks():
+    assert ink_boxes(_page(), COLUMNS) == []
+
+
+def test_marked_box_is_found():
+    boxes = ink_boxes(_page(marks=[1]), COLUMNS)
+    assert len(boxes) == 1
+    x0, top, x1, bottom = boxes[0]
+    assert COLUMNS[1][0] <= x0 < x1 <= COLUMNS[1][1]
+    assert top <= 30 and bottom >= 30 + BOX
+
+
+def test_filled_box_is_found():
+    img = _page()
+    ImageDraw.Draw(img).rectangle((30, 30, 30 + BOX, 30 + BOX), fill=0)
+    assert [b[0] for b in ink_boxes(img, COLUMNS)] == [30]
@@ -0,0 +1,11 @@
+# tests/test_sources.py
+import pytest
+
+from extract_sources import list_sources
+
+
+@pytest.mark.parametrize("recursive", [False, True])
+def test_pdf_suffix_is_case_insensitive(tmp_path, recursive):
+    for name in ("a.pdf", "B.PDF", "c.Pdf", "notas.txt"):
+        (tmp_path / name).write_bytes(b"%PDF-1.4\n")
+    assert [s.arquivo for s in list_sources(tmp_path, recursive=recursive)] == ["B.PDF", "a.pdf", "c.Pdf"]
@@ -0,0 +1,24 @@
+# tests/test_startup.py
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from benchmarks.startup import DEFERRED_MODULES
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _eager_imports(module: str):
+    """Módulos pesados presentes em `sys.modules` logo depois de `import <module>`, num processo novo."""
+    code = f"import sys, {module}; print(' '.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        pytest.skip(proc.stderr.strip().splitlines()[-1])
+    return proc.stdout.split()
+
+
+@pytest.mark.parametrize("module", ["extract_core", "app_gui"])
+def test_heavy_modules_are_not_imported_at_startup(module):
+    assert _eager_imports(module) == []
@@ -0,0 +1,18 @@
+# tests/test_watch.py
+import pytest
+
+from extract_watch import FolderWatcher
+
+
+@pytest.mark.parametrize("use_inotify", [False, True])
+def test_upper_case_pdf_is_seen(tmp_path, use_inotify):
+    (tmp_path / "A.PDF").write_bytes(b"%PDF-1.4\n")
+    (tmp_path / "notas.txt").write_bytes(b"x")
+    watcher = FolderWatcher(tmp_path, poll_interval=0.01, use_inotify=use_inotify)
+    try:
+        assert watcher.existing() == [tmp_path / "A.PDF"]
+        (tmp_path / "b.Pdf").write_bytes(b"%PDF-1.4\n")
+        (tmp_path / "c.txt").write_bytes(b"x")
+        assert watcher.wait(1.0) == {tmp_path / "b.Pdf"}
+    finally:
+        watcher.close()